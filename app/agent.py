@@ -1,251 +1,429 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from app.tools import calculate, get_country_info
+from app.tools import get_country_info, data_version
+from app.calculators.math_engine import MathEngine
+from app.dispatcher import Dispatcher, Tool, ToolTimeoutError, CHEAP, MODERATE, EXPENSIVE
+from app.response.response_engine import ResponseEngine
+from app.cache import TTLCache, SemanticCache
 from app.memory import set_last_country, get_last_country
 from app.config import Config
-import re
+from app.generation import MicroBatcher
+from app.metrics import stage_timer, timed
+from app.logs import SAMPLED
+from app import model_runtime
+from app.prompts import GENERAL_QUESTION
+from app.router import Route, decompose, is_comparison, is_follow_up, AREA_MULT, DENSITY, PRONOUN, INFO, MATH, SMALLTALK
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import contextvars
 import logging
-import torch
+import threading
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL),
-    format=Config.LOG_FORMAT,
-    handlers=[logging.StreamHandler()]
-)
+SMALLTALK_REPLIES = {
+    "who": "I am an AI assistant that can help you with information about countries, calculations, and general knowledge questions.",
+    "what": "I can help you with: 1) Country information (capital, population, area), 2) Mathematical calculations, 3) General knowledge questions.",
+    "how": "I'm functioning well and ready to help you! What would you like to know?",
+}
+
+class AgentAnswer(NamedTuple):
+    """An answer, with the country it is about and how sure the name match was."""
+    response: str
+    country: Optional[str] = None
+    confidence: Optional[float] = None  # None when no country was involved
+
+# What a comparison compares, per intent and topic
+_COMPARED = {"population": "population", "area": "area", "density": "population density"}
+
+class _SharedCalls:
+    """
+    Tool calls made while answering one question: sub-questions that need
+    the same lookup share a single call, even when running concurrently.
+    """
+
+    def __init__(self, tools: Dispatcher):
+        self.tools = tools
+        self._calls: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def call(self, name: str, *args: Any) -> Any:
+        key = (name,) + args
+        with self._lock:
+            future = self._calls.get(key)
+            first = future is None
+            if first:
+                future = self._calls[key] = Future()
+        if first:
+            try:
+                future.set_result(self.tools.call(name, *args))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+class _Reply(NamedTuple):
+    """A reply, with the country to remember and whether it may be reused for later askers."""
+    response: Optional[str]
+    country: Optional[str] = None
+    confidence: Optional[float] = None
+    cacheable: bool = True  # False for errors and timeouts, which may not happen next time
+
+ERROR_REPLY = "I'm sorry, I encountered an error while processing your question. Please try again."
 
 class Agent:
-    def __init__(self):
+    def __init__(self, load_model: bool = None):
+        """
+        Args:
+            load_model: Load the T5 model now instead of on first use.
+                Defaults to Config.MODEL_PRELOAD.
+        """
         self.logger = logging.getLogger(__name__)
-        self.logger.info("Initializing T5 model...")
-        
-        # Load model and tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained(Config.MODEL_NAME)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(Config.MODEL_NAME)
-        
-        # Move model to GPU if available
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = self.model.to(self.device)
-        
-        self.logger.info(f"Model loaded successfully on {self.device}")
-
-    def process_question(self, question: str) -> str:
-        self.logger.info(f"Processing question: {question}")
-        response = None
-        q = question.strip().lower()
+        self.model_enabled = Config.MODEL_ENABLED
+        self._tokenizer = None
+        self._model = None
+        self._device = None
+        self._model_lock = threading.Lock()
+        self._cache = TTLCache(max_size=Config.CACHE_MAX_SIZE, ttl=Config.CACHE_TTL)
+        self._cache_version = data_version()
+        # Generated answers are reused for paraphrases of the same question
+        self._semantic_cache = SemanticCache(
+            self._embed, Config.CACHE_MAX_SIZE if Config.SEMANTIC_CACHE_ENABLED else 0,
+            Config.SEMANTIC_CACHE_THRESHOLD)
+        # Concurrent fallback questions share one generate() call
+        self.generator = MicroBatcher(self._generate_batch, Config.GENERATION_BATCH_SIZE,
+                                      Config.GENERATION_BATCH_WAIT_MS / 1000)
+        self.math_engine = MathEngine()
+        self.responses = ResponseEngine()
+        self.tools = Dispatcher()
+        self.tools.register(Tool("country", get_country_info, CHEAP))
+        self.tools.register(Tool("math", self._calculate, MODERATE, cacheable=True,
+                                 timeout=Config.TOOL_MATH_TIMEOUT,
+                                 max_concurrency=Config.TOOL_MATH_CONCURRENCY))
+        self.tools.register(Tool("generate", self._generate, EXPENSIVE,
+                                 timeout=Config.GENERATION_TIMEOUT,
+                                 max_concurrency=Config.TOOL_GENERATIVE_CONCURRENCY))
+        # Sub-questions of a compound question that wait on the math tool or the model
+        self._subquestions: Optional[ThreadPoolExecutor] = None
+        self._subquestions_lock = threading.Lock()
+
+        if load_model is None:
+            load_model = Config.MODEL_PRELOAD
+        if load_model and self.model_enabled:
+            self._load_model()
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def tokenizer(self):
+        self._load_model()
+        return self._tokenizer
+
+    @property
+    def model(self):
+        self._load_model()
+        return self._model
+
+    @property
+    def device(self) -> str:
+        self._load_model()
+        return self._device
+
+    def _load_model(self) -> None:
+        """Load the tokenizer and model once; torch is only imported then."""
+        if self._model is not None:
+            return
+        if not self.model_enabled:
+            raise RuntimeError("The generative model is disabled (MODEL_ENABLED=false)")
+        with self._model_lock:
+            if self._model is not None:
+                return
+            self.logger.info("Initializing T5 model (%s)...", Config.MODEL_RUNTIME)
+            tokenizer, model = model_runtime.load(Config.MODEL_NAME, Config.MODEL_RUNTIME)
+            if Config.MODEL_WARMUP:
+                self.logger.info("Model warm-up took %.2fs", model_runtime.warm_up(tokenizer, model))
 
+            # Inference runs on CPU only
+            device = "cpu"
+            self._tokenizer = tokenizer
+            self._device = device
+            self._model = model
+
+            self.logger.info("Model loaded successfully on %s", device)
+
+    @timed("inference")
+    def _generate_batch(self, prompts: List[str]) -> List[Tuple[str, int]]:
+        """Run one padded generate() call; returns (text, generated tokens) per prompt."""
+        import torch
+        tokenizer, model = self.tokenizer, self.model
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
+        options = {"max_new_tokens": Config.MAX_NEW_TOKENS, "num_beams": Config.NUM_BEAMS}
+        if Config.TEMPERATURE > 0:
+            options.update(do_sample=True, temperature=Config.TEMPERATURE, top_p=Config.TOP_P)
+        with torch.inference_mode():
+            outputs = model.generate(**inputs, **options)
+        texts = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        # Padding only follows the end of shorter answers
+        tokens = (outputs != tokenizer.pad_token_id).sum(dim=1).tolist()
+        return list(zip(texts, tokens))
+
+    @timed("embedding")
+    def _embed(self, question: str):
+        """Mean-pooled T5 encoder embedding of a question."""
+        return model_runtime.embed(self.tokenizer, self.model, [question])[0]
+
+    def _model_available(self) -> bool:
+        """Load the model if needed; a model that fails to load disables generation."""
+        if not self.model_enabled:
+            return False
         try:
-            # Função auxiliar para limpar o nome do país
-            def clean_country_name(name: str) -> str:
-                # Remove possessivos, palavras comuns e pontuação
-                name = re.sub(r"'s$", "", name)
-                name = re.sub(r"^(what is|how many|how big|how dense|the|a|an)\s+", "", name)
-                # Remove palavras extras do final
-                name = re.sub(r"\s+(capital|population|area|times|multiplied|multiply|by|in|has|a|an)$", "", name)
-                # Remove pontuação final
-                name = re.sub(r"[\?\.,!]+$", "", name)
-                return name.strip(" .!?").title()
-
-            # Função auxiliar para processar resposta de país
-            def process_country_response(country: str, info_type: str, value: str) -> str:
-                set_last_country(country)
-                return value
-
-            # 1. Área multiplicada (vários formatos)
-            area_mult_patterns = [
-                r"area of ([a-zA-Z\s]+?)(?=\s+(?:multiplied|multiply|times)\s+(?:by\s+)?\d+)",
-                r"([a-zA-Z\s]+?)'s?\s+area(?=\s+(?:multiplied|multiply|times)\s+(?:by\s+)?\d+)",
-                r"multiply the area of ([a-zA-Z\s]+?)(?=\s+(?:by\s+)?\d+)",
-                r"([a-zA-Z\s]+?)'s?\s+area(?=\s+times\s+\d+)",
-                r"area of ([a-zA-Z\s]+?)(?=\s+times\s+\d+)"
-            ]
-            for pat in area_mult_patterns:
-                m = re.search(pat, q)
-                if m:
-                    country = clean_country_name(m.group(1))
-                    # Extrair o multiplicador separadamente
-                    mult_match = re.search(r"(?:multiplied|multiply)\s+by\s+(\d+)|times\s+(\d+)", q)
-                    if not mult_match:
-                        continue
-                    multiplier = int(mult_match.group(1) or mult_match.group(2))
-                    country_info = get_country_info(country)
-                    if "error" in country_info:
-                        response = f"I couldn't find information about {country}."
-                        continue
-                    area = float(country_info["area"])
-                    result = calculate(f"{area} * {multiplier}")
-                    if result.startswith("Sorry"):
-                        response = result
-                    else:
-                        response = process_country_response(
-                            country,
-                            "area_mult",
-                            f"The area of {country} is {area:,.0f} km². Multiplied by {multiplier}, that is {float(result):,.0f} km²."
-                        )
-                    return response
-
-            # 2. Densidade populacional
-            dens_patterns = [
-                r"population density of ([a-zA-Z\s]+)",
-                r"density of ([a-zA-Z\s]+)",
-                r"([a-zA-Z\s]+)'s population density",
-                r"how dense is ([a-zA-Z\s]+)'s population"
-            ]
-            for pat in dens_patterns:
-                m = re.search(pat, q)
-                if m:
-                    country = clean_country_name(m.group(1))
-                    country_info = get_country_info(country)
-                    if "error" in country_info:
-                        response = f"I couldn't find information about {country}."
-                        continue
-                    pop = country_info["population"]
-                    area = country_info["area"]
-                    density = pop / area
-                    response = process_country_response(
-                        country,
-                        "density",
-                        f"The population density of {country} is {density:,.2f} people per km²."
-                    )
-                    return response
-
-            # 4. Perguntas com pronomes
-            if any(word in q for word in ["its capital", "its population", "its area", "and its capital", "and its population", "and its area", "what about its", "and the area"]):
-                country = get_last_country()
-                if not country:
-                    response = "I don't know which country you're referring to. Please mention a country first."
-                    return response
-                country_info = get_country_info(country)
-                if "error" in country_info:
-                    response = f"I couldn't find information about {country}."
-                    return response
-                if "capital" in q:
-                    response = f"The capital of {country} is {country_info['capital']}."
-                elif "population" in q:
-                    response = f"The population of {country} is {int(country_info['population']):,} people."
-                elif "area" in q:
-                    response = f"The area of {country} is {float(country_info['area']):,.0f} km²."
-                return response
-
-            # 3. Perguntas sobre capital, população, área (vários formatos)
-            info_patterns = [
-                (r"(capital|population|area) of ([a-zA-Z\s]+)", 1, 2),
-                (r"([a-zA-Z\s]+?)'s (capital|population|area)", 2, 1),
-                (r"([a-zA-Z\s]+) (capital|population|area)", 2, 1),
-                (r"what is the (capital|population|area) of ([a-zA-Z\s]+)", 1, 2),
-                (r"([a-zA-Z\s]+) (?:has )?(?:a )?(capital|population|area)", 2, 1),
-                (r"how many people live in ([a-zA-Z\s]+)[\?\.!]*", "population", 1),
-                (r"how big is ([a-zA-Z\s]+)[\?\.!]*", "area", 1),
-                (r"what is ([a-zA-Z\s]+)'s (capital|population|area)", 2, 1),
-                (r"([a-zA-Z\s]+) (?:has )?(?:a )?(?:population|area|capital)[\?\.!]*", "area", 1),
-                (r"([a-zA-Z\s]+) (?:has )?(?:a )?(?:population|area|capital)[\?\.!]*", "population", 1),
-                (r"([a-zA-Z\s]+) (?:has )?(?:a )?(?:population|area|capital)[\?\.!]*", "capital", 1)
-            ]
-            for pat in info_patterns:
-                if len(pat) == 3:
-                    pattern, topic_idx, country_idx = pat
-                    m = re.search(pattern, q)
-                    if m:
-                        topic = m.group(topic_idx).lower()
-                        country = clean_country_name(m.group(country_idx))
-                        country_info = get_country_info(country)
-                        if "error" in country_info:
-                            response = f"I couldn't find information about {country}."
-                            continue
-                        if topic == "capital":
-                            response = process_country_response(
-                                country,
-                                "capital",
-                                f"The capital of {country} is {country_info['capital']}."
-                            )
-                        elif topic == "population":
-                            response = process_country_response(
-                                country,
-                                "population",
-                                f"The population of {country} is {int(country_info['population']):,} people."
-                            )
-                        elif topic == "area":
-                            response = process_country_response(
-                                country,
-                                "area",
-                                f"The area of {country} is {float(country_info['area']):,.0f} km²."
-                            )
-                        return response
-                else:
-                    pattern, topic, country_idx = pat
-                    m = re.search(pattern, q)
-                    if m:
-                        country = clean_country_name(m.group(country_idx))
-                        country_info = get_country_info(country)
-                        if "error" in country_info:
-                            response = f"I couldn't find information about {country}."
-                            continue
-                        if topic == "population":
-                            response = process_country_response(
-                                country,
-                                "population",
-                                f"The population of {country} is {int(country_info['population']):,} people."
-                            )
-                        elif topic == "area":
-                            response = process_country_response(
-                                country,
-                                "area",
-                                f"The area of {country} is {float(country_info['area']):,.0f} km²."
-                            )
-                        return response
-
-            # 5. Perguntas matemáticas simples
-            if re.search(r"\d+\s*[\+\-\*/\^]\s*\d+", question):
-                match = re.search(r"(\d+\s*[\+\-\*/\^]\s*\d+)", question)
-                expression = match.group(1) if match else ""
-                if not expression:
-                    response = "I couldn't find a valid mathematical expression."
-                else:
-                    result = calculate(expression)
-                    if result.startswith("Sorry"):
-                        response = result
-                    else:
-                        response = f"{expression} = {result}"
-                return response
-
-            # 6. Perguntas gerais
-            if "who are you" in q:
-                return "I am an AI assistant that can help you with information about countries, calculations, and general knowledge questions."
-            if "what can you do" in q:
-                return "I can help you with: 1) Country information (capital, population, area), 2) Mathematical calculations, 3) General knowledge questions."
-            if "how are you" in q:
-                return "I'm functioning well and ready to help you! What would you like to know?"
-
-            # Fallback: detectar país conhecido na frase e responder com info básica
-            known_countries = ["Brazil", "France", "Japan", "Canada", "Germany"]
-            for country in known_countries:
-                if country.lower() in q:
-                    country_info = get_country_info(country)
-                    if "error" not in country_info:
-                        set_last_country(country)
-                        if "capital" in q:
-                            response = f"The capital of {country} is {country_info['capital']}."
-                        elif "population" in q:
-                            response = f"The population of {country} is {int(country_info['population']):,} people."
-                        elif "area" in q:
-                            response = f"The area of {country} is {float(country_info['area']):,.0f} km²."
-                        else:
-                            response = (
-                                f"{country}: Capital: {country_info['capital']}, "
-                                f"Population: {int(country_info['population']):,} people, "
-                                f"Area: {float(country_info['area']):,.0f} km²."
-                            )
-                        return response
-
-            # Se chegou aqui, nenhum padrão foi encontrado
-            self.logger.error("No response generated")
-            return "I'm sorry, I couldn't process your question. Please try again."
+            self._load_model()
+        except Exception as e:
+            self.logger.error("Could not load the model, disabling generation: %s", e)
+            self.model_enabled = False
+            return False
+        return True
+
+    def _generate(self, question: str) -> Optional[str]:
+        """The generative tool: a semantically cached, micro-batched model answer."""
+        cached = self._semantic_cache.get(question)
+        if cached is not None:
+            return cached
+        result = self.generator.generate(GENERAL_QUESTION.format(question=question.strip()))
+        self.logger.debug("Generated %d tokens in a batch of %d after %.1f ms in queue",
+                          result.tokens, result.batch_size, result.queue_wait * 1000)
+        text = result.text.strip()
+        if text:
+            self._semantic_cache.set(question, text)
+        return text or None
+
+    @timed("math")
+    def _calculate(self, expression: str) -> Dict:
+        """The math tool: MathEngine, with non-real results turned into errors."""
+        result = self.math_engine.calculate(expression)
+        if result.get("type") == "complex":
+            # sympy answers x/0 with complex infinity ("zoo") and 0/0 with nan
+            if result["result"] in ("zoo", "nan"):
+                return {"error": "division by zero"}
+            return {"error": "the result is not a real number"}
+        return result
+
+    def tool_stats(self) -> Dict[str, Dict]:
+        return self.tools.stats()
+
+    def generation_stats(self) -> Dict[str, float]:
+        return self.generator.stats()
+
+    def semantic_cache_stats(self) -> Dict[str, float]:
+        return self._semantic_cache.stats()
+
+    def process_question(self, question: str, session_id: str = None) -> str:
+        return self.answer(question, session_id).response
+
+    def answer(self, question: str, session_id: str = None) -> AgentAnswer:
+        """
+        Answer a question, reporting the country it resolved to.
+
+        Returns:
+            AgentAnswer: confidence is 1.0 for an exact country name or alias
+                and lower for a corrected typo ("germny")
+        """
+        self.logger.info("Processing question: %s", question, extra=SAMPLED)
+        try:
+            cached = self._get_cached_response(question, session_id)
+            if cached is not None:
+                return cached
+
+            response, country, confidence, cacheable = self._answer(question, session_id)
+            if country:
+                set_last_country(country, session_id)
+            if cacheable:
+                self._cache_response(question, session_id, response, country, confidence)
+            return AgentAnswer(response, country, confidence)
                 
         except Exception as e:
-            self.logger.error(f"Error processing question: {str(e)}")
-            return "I'm sorry, I encountered an error while processing your question. Please try again."
+            self.logger.error("Error processing question: %s", e)
+            return AgentAnswer(ERROR_REPLY)
+
+    def _cache_key(self, question: str, session_id: str = None) -> Tuple[str, Optional[str]]:
+        """Normalized question, plus the remembered country for follow-ups."""
+        q = question.strip().lower()
+        if is_follow_up(q):
+            return q, get_last_country(session_id)
+        return q, None
+
+    def _get_cached_response(self, question: str, session_id: str = None) -> Optional[AgentAnswer]:
+        """Return a cached answer, replaying its memory update, or None."""
+        version = data_version()
+        if version != self._cache_version:
+            self._cache.clear()
+            self._cache_version = version
+        entry = self._cache.get(self._cache_key(question, session_id))
+        if entry is None:
+            return None
+        if entry.country:
+            set_last_country(entry.country, session_id)
+        return entry
+
+    def _cache_response(self, question: str, session_id: str, response: Optional[str],
+                        country: Optional[str], confidence: Optional[float]) -> None:
+        if response is None:
+            return
+        self._cache.set(self._cache_key(question, session_id), AgentAnswer(response, country, confidence))
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+    def _answer(self, question: str, session_id: str = None) -> _Reply:
+        """Answer a question; also returns the country to remember, if any, and its match confidence."""
+        with stage_timer("routing"):
+            routes = decompose(question, Config.MAX_SUBQUESTIONS)
+        if len(routes) == 1:
+            return self._answer_route(routes[0], question, session_id, self.tools)
+        return self._answer_compound(question, routes, session_id)
+
+    def _answer_compound(self, question: str, routes: List[Route],
+                         session_id: str = None) -> _Reply:
+        """
+        Answer each sub-question and join the answers, in the question's order.
+
+        Country lookups take microseconds, so those parts run on this thread;
+        parts that call the math tool or the model wait on them concurrently,
+        one here and the rest on the sub-question pool, so the answer takes about as long
+        as the slowest part. Repeated lookups are made once.
+        """
+        tools = _SharedCalls(self.tools)
+        slow = [i for i, r in enumerate(routes) if r.intent in (MATH, AREA_MULT) or r.text]
+        futures = {i: self._subquestion_pool().submit(contextvars.copy_context().run, self._answer_route,
+                                                      routes[i], routes[i].text or question, session_id, tools)
+                   for i in slow[1:]}
+        answers = [futures[i].result() if i in futures
+                   else self._answer_route(r, r.text or question, session_id, tools)
+                   for i, r in enumerate(routes)]
+
+        responses = [answer.response for answer in answers if answer.response]
+        if is_comparison(question):
+            comparison = self._compare(routes, tools)
+            if comparison:
+                responses.append(comparison)
+        # Math answers ("2 + 2 = 4") end without a full stop
+        response = " ".join(text if text[-1] in ".!?" else text + "." for text in responses)
+        cacheable = all(answer.cacheable for answer in answers)
+        countries = [(answer.country, answer.confidence) for answer in answers if answer.country]
+        if not countries:
+            return _Reply(response, cacheable=cacheable)
+        # "its" in the next question means the last country named
+        return _Reply(response, countries[-1][0], min(confidence for _, confidence in countries), cacheable)
+
+    def _compare(self, routes: List[Route], tools: _SharedCalls) -> Optional[str]:
+        """Which country has the most of what every part asked about, if they all asked the same."""
+        topics = {"density" if r.intent == DENSITY else r.topic for r in routes}
+        countries = {r.country for r in routes}
+        if len(topics) != 1 or len(countries) != len(routes) or \
+                any(r.intent not in (INFO, DENSITY) for r in routes):
+            return None
+        topic = topics.pop()
+        if topic not in _COMPARED:
+            return None
+
+        def value(country: str) -> float:
+            info = tools.call("country", country)
+            if topic == "density":
+                return info["population"] / info["area"]
+            return float(info[topic])
+
+        largest = max((r.country for r in routes), key=value)
+        template = "compare_two" if len(routes) == 2 else "compare"
+        return self.responses.render("answer", template, country=largest, topic=_COMPARED[topic])
+
+    def _subquestion_pool(self) -> ThreadPoolExecutor:
+        if self._subquestions is None:
+            with self._subquestions_lock:
+                if self._subquestions is None:
+                    self._subquestions = ThreadPoolExecutor(max_workers=Config.SUBQUESTION_WORKERS,
+                                                            thread_name_prefix="subquestion")
+        return self._subquestions
+
+    def _answer_route(self, r: Route, question: str, session_id: str,
+                      tools: Any) -> _Reply:
+        """Answer one routed question, calling tools through `tools`."""
+        render = self.responses.render
+
+        if r.intent == AREA_MULT:
+            area = float(tools.call("country", r.country)["area"])
+            try:
+                result = tools.call("math", f"{area} * {r.multiplier}")
+            except ToolTimeoutError:
+                result = {"error": "it took too long"}
+            if "error" in result:
+                return _Reply(render("answer", "math_error", error=result["error"]), cacheable=False)
+            return _Reply(render("answer", "area_mult", country=r.country, area=area, multiplier=r.multiplier,
+                                 result=float(result["result"])), r.country, r.confidence)
+
+        if r.intent == DENSITY:
+            info = tools.call("country", r.country)
+            return _Reply(render("answer", "density", country=r.country,
+                                 density=info["population"] / info["area"]), r.country, r.confidence)
+
+        if r.intent == PRONOUN:
+            country = get_last_country(session_id)
+            if not country:
+                return _Reply(render("answer", "no_country"))
+            country_info = tools.call("country", country)
+            if "error" in country_info:
+                return _Reply(render("answer", "not_found", country=country))
+            if r.topic:
+                return _Reply(self._format_topic(country, country_info, r.topic))
+            return _Reply(None)
+
+        if r.intent == INFO:
+            info = tools.call("country", r.country)
+            return _Reply(self._format_topic(r.country, info, r.topic), r.country, r.confidence)
+
+        if r.intent == MATH:
+            try:
+                result = tools.call("math", r.expression)
+            except ToolTimeoutError:
+                result = {"error": "it took too long"}
+            if "error" in result:
+                return _Reply(render("answer", "math_error", error=result["error"]), cacheable=False)
+            return _Reply(render("answer", "math", expression=r.expression, result=result["result"]))
+
+        if r.intent == SMALLTALK:
+            return _Reply(SMALLTALK_REPLIES[r.topic])
+
+        if r.country:
+            info = tools.call("country", r.country)
+            if r.topic:
+                return _Reply(self._format_topic(r.country, info, r.topic), r.country, r.confidence)
+            return _Reply(render("answer", "summary", country=r.country, capital=info["capital"],
+                                 population=int(info["population"]), area=float(info["area"])), r.country, r.confidence)
+
+        # Nenhum padrão encontrado: o modelo responde
+        generating = self._model_available()
+        if generating:
+            try:
+                generated = tools.call("generate", question)
+            except Exception as e:
+                self.logger.error("Generation failed: %s", e)
+                generated = None
+            if generated:
+                return _Reply(generated)
+
+        self.logger.error("No response generated")
+        # A generation that failed or timed out may succeed next time
+        if r.text:
+            # Part of a compound question: say which part went unanswered
+            return _Reply(render("answer", "unanswered", question=r.text), cacheable=not generating)
+        return _Reply(render("answer", "unknown"), cacheable=not generating)
+
+    def _format_topic(self, country: str, country_info: dict, topic: str) -> str:
+        if topic == "capital":
+            return self.responses.render("answer", "capital", country=country, capital=country_info["capital"])
+        if topic == "population":
+            return self.responses.render("answer", "population", country=country,
+                                         population=int(country_info["population"]))
+        return self.responses.render("answer", "area", country=country, area=float(country_info["area"]))
 
 # Create a global agent instance
 agent = Agent()
 
-def process_question(question: str) -> str:
-    return agent.process_question(question)
+def process_question(question: str, session_id: str = None) -> str:
+    return agent.process_question(question, session_id)
@@ -0,0 +1,101 @@
+import queue
+from concurrent.futures import Executor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from app.router import is_follow_up
+
+BatchItem = Tuple[str, Optional[str]]
+
+def _answer_one(answer: Callable[[str, Optional[str]], str],
+                question: str, session_id: Optional[str]) -> Dict:
+    try:
+        return {"response": answer(question, session_id), "status": "success"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+def iter_batch(items: List[BatchItem],
+               answer: Callable[[str, Optional[str]], str],
+               executor: Executor) -> Iterator[List[Tuple[int, Dict]]]:
+    """
+    Answer many questions, yielding results as soon as they are ready.
+
+    Items without a session id are independent: identical questions are
+    answered once and the rest run in parallel. Items that share a session id
+    run in their original order within that session, while different
+    sessions run in parallel.
+
+    Args:
+        items: (question, session_id) pairs
+        answer: Function answering one question, e.g. Agent.process_question
+        executor: Pool the work is submitted to
+
+    Yields:
+        List[Tuple[int, Dict]]: (index, result) pairs that finished since the
+            previous chunk, in completion order
+    """
+    done: "queue.Queue[Tuple[int, Dict]]" = queue.Queue()
+    stateless: List[Tuple[str, List[int]]] = []
+    seen: Dict[str, int] = {}
+    sessions: Dict[str, List[int]] = {}
+
+    for i, (question, session_id) in enumerate(items):
+        if not question or not question.strip():
+            done.put((i, {"question": question, "status": "error", "error": "Empty question"}))
+        elif session_id:
+            sessions.setdefault(session_id, []).append(i)
+        else:
+            key = question.strip().lower()
+            if key in seen and not is_follow_up(key):
+                stateless[seen[key]][1].append(i)
+            else:
+                seen[key] = len(stateless)
+                stateless.append((question, [i]))
+
+    def run_stateless(question: str, indexes: List[int]) -> None:
+        outcome = _answer_one(answer, question, None)
+        for i in indexes:
+            done.put((i, {"question": items[i][0], **outcome}))
+
+    def run_session(session_id: str, indexes: List[int]) -> None:
+        # Questions of one session run in order so follow-ups see earlier answers
+        for i in indexes:
+            outcome = _answer_one(answer, items[i][0], session_id)
+            done.put((i, {"question": items[i][0], "session_id": session_id, **outcome}))
+
+    jobs = [(run_stateless, question, indexes) for question, indexes in stateless]
+    jobs += [(run_session, session_id, indexes) for session_id, indexes in sessions.items()]
+
+    remaining = len(items)
+    for job, *args in jobs:
+        executor.submit(job, *args)
+        # Hand back what already finished while the rest is still being queued
+        if not done.empty():
+            chunk = _drain(done, block=False)
+            remaining -= len(chunk)
+            yield chunk
+    while remaining:
+        chunk = _drain(done, block=True)
+        remaining -= len(chunk)
+        yield chunk
+
+def _drain(done: "queue.Queue", block: bool) -> List:
+    chunk = [done.get()] if block else []
+    while True:
+        try:
+            chunk.append(done.get_nowait())
+        except queue.Empty:
+            return chunk
+
+def process_batch(items: List[BatchItem],
+                  answer: Callable[[str, Optional[str]], str],
+                  executor: Executor) -> List[Dict]:
+    """
+    Answer many questions at once; see `iter_batch`.
+
+    Returns:
+        List[Dict]: One result per item, in input order
+    """
+    results: List[Optional[Dict]] = [None] * len(items)
+    for chunk in iter_batch(items, answer, executor):
+        for i, result in chunk:
+            results[i] = result
+    return results
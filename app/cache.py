@@ -0,0 +1,215 @@
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire `ttl` seconds after being stored.
+
+    A `max_size` of 0 disables the cache. Thread-safe.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. because the data behind them changed."""
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+_WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+# Capitalized only because they start the question
+_STARTERS = frozenset((
+    "who", "what", "when", "where", "why", "how", "which", "whose", "is", "are", "was", "were",
+    "do", "does", "did", "can", "could", "should", "would", "will", "tell", "please", "give",
+    "list", "name", "explain", "describe", "the", "a", "an", "i", "in", "on",
+))
+
+class _Terms(NamedTuple):
+    """What must agree between two questions for one's answer to serve the other."""
+    words: frozenset  # every word, lowercased
+    names: frozenset  # capitalized words, lowercased: likely names ("Hamlet", "Mozart")
+    numbers: frozenset
+
+def _terms(question: str) -> _Terms:
+    words = _WORD.findall(question)
+    names = {w.lower() for i, w in enumerate(words)
+             if w[0].isupper() and not (i == 0 and w.lower() in _STARTERS) and w.lower() != "i"}
+    return _Terms(frozenset(w.lower() for w in words), frozenset(names),
+                  frozenset(_NUMBER.findall(question)))
+
+def _same_subject(a: _Terms, b: _Terms) -> bool:
+    """
+    Whether two similar questions are about the same things: the same
+    numbers, and each one's names appear in the other. Embeddings of
+    "Who wrote Hamlet?" and "Who wrote Macbeth?" are close, but the
+    answers differ.
+    """
+    return a.numbers == b.numbers and a.names <= b.words and b.names <= a.words
+
+class SemanticCache:
+    """
+    Bounded LRU cache keyed by meaning rather than spelling.
+
+    Questions are embedded with `embed` and a lookup hits when a stored
+    question's embedding has a cosine similarity of at least `threshold`
+    with the new one, so "Who wrote Hamlet?" can answer "Hamlet author?".
+    A similar question that names something else or has other numbers
+    ("Who wrote Macbeth?") never hits, however close its embedding.
+    Vectors live in one preallocated NumPy matrix searched by brute force,
+    one matrix-vector product per lookup. A `max_size` of 0 disables the
+    cache. Thread-safe.
+    """
+
+    def __init__(self, embed: Callable[[str], np.ndarray], max_size: int, threshold: float,
+                 history: int = 1000):
+        # A miss is followed by a set() of the same question; embed it once
+        self._embed = lru_cache(maxsize=256)(embed)
+        self.max_size = max_size
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None  # (max_size, dim), unit rows
+        self._values: List[Any] = []
+        self._terms: List[_Terms] = []
+        self._last_used = np.zeros(max(max_size, 0), dtype=np.int64)
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._lookup_seconds = deque(maxlen=history)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0  # similar enough, but about something else
+
+    def _vector(self, question: str) -> np.ndarray:
+        vector = np.asarray(self._embed(question.strip().lower()), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, question: str) -> Optional[Any]:
+        if self.max_size <= 0:
+            return None
+        start = time.perf_counter()
+        vector = self._vector(question)
+        terms = _terms(question)
+        with self._lock:
+            value = None
+            if self._values:
+                similarities = self._vectors[:len(self._values)] @ vector
+                candidates = np.flatnonzero(similarities >= self.threshold)
+                # Most similar first
+                for slot in candidates[np.argsort(-similarities[candidates])]:
+                    if _same_subject(terms, self._terms[slot]):
+                        self._clock += 1
+                        self._last_used[slot] = self._clock
+                        value = self._values[slot]
+                        break
+                    self.rejected += 1
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._lookup_seconds.append(time.perf_counter() - start)
+            return value
+
+    def set(self, question: str, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        vector = self._vector(question)
+        terms = _terms(question)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.size), dtype=np.float32)
+            if len(self._values) < self.max_size:
+                slot = len(self._values)
+                self._values.append(value)
+                self._terms.append(terms)
+            else:
+                # Least recently used slot
+                slot = int(np.argmin(self._last_used))
+                self._values[slot] = value
+                self._terms[slot] = terms
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._clock += 1
+            self._last_used[slot] = self._clock
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._terms.clear()
+            self._last_used[:] = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters, plus embedding-and-search latency of the most recent lookups."""
+        with self._lock:
+            lookups = sorted(self._lookup_seconds)
+            total = self.hits + self.misses
+            return {
+                "size": len(self._values),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "lookup_mean_ms": sum(lookups) / len(lookups) * 1000 if lookups else 0.0,
+                "lookup_p95_ms": lookups[int(0.95 * (len(lookups) - 1))] * 1000 if lookups else 0.0,
+            }
@@ -1,7 +1,48 @@
-from sympy import sympify, solve, Symbol
 from decimal import Decimal, getcontext
-from typing import Dict, Union, List
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Union, List, Tuple
+from app.calculators import vectorized
+from app.calculators.safe_eval import compile_expression
+from app.config import Config
+import numpy as np
+import ast
 import re
+import time
+
+_DOTS = re.compile(r'\.+')
+_VALID_CHARS = re.compile(r'[0-9+\-*/.()^]+')
+_CONSECUTIVE_OPERATORS = re.compile(r'[\+\-\*\/\^]{2,}')
+
+class _NeedsSymbolic(Exception):
+    """The numeric tier cannot represent this result (e.g. 1/0, (-8)^(1/3))."""
+
+@lru_cache(maxsize=1024)
+def _parse_numeric(clean_expr: str) -> Tuple[object, List[str]]:
+    """Compile a validated expression for exact evaluation and describe its top-level step."""
+    python_expr = clean_expr.replace("^", "**")
+    compiled = compile_expression(python_expr, exact=True)
+    node = ast.parse(python_expr, mode="eval").body
+    steps = []
+    if isinstance(node, ast.BinOp):
+        left, right = ast.unparse(node.left), ast.unparse(node.right)
+        if isinstance(node.op, ast.Add):
+            steps.append(f"Adding terms: ({left}, {right})")
+        elif isinstance(node.op, ast.Sub):
+            steps.append(f"Subtracting terms: ({left}, {right})")
+        elif isinstance(node.op, ast.Mult):
+            steps.append(f"Multiplying factors: ({left}, {right})")
+        elif isinstance(node.op, ast.Div):
+            steps.append(f"Dividing: ({left}, {right})")
+        elif isinstance(node.op, ast.Pow):
+            steps.append(f"Calculating power: {left}^{right}")
+    return compiled, steps
+
+@lru_cache(maxsize=256)
+def _parse_symbolic(clean_expr: str):
+    # sympy is slow to import and only needed for the symbolic tier
+    from sympy import sympify
+    return sympify(clean_expr)
 
 class MathEngine:
     def __init__(self):
@@ -38,25 +79,135 @@ class MathEngine:
             clean_expr = self._clean_expression(expression)
             if not self._validate_expression(clean_expr):
                 return {"error": "Invalid mathematical expression"}
+
+            try:
+                return self._calculate_numeric(clean_expr)
+            except _NeedsSymbolic:
+                return self._calculate_symbolic(clean_expr)
             
-            # Parse expression
-            expr = sympify(clean_expr)
-            
-            # Calculate result
-            result = expr.evalf()
-            
-            # Get calculation steps
-            steps = self._get_calculation_steps(expr)
-            
+        except Exception as e:
+            return {"error": f"Calculation error: {str(e)}"}
+
+    def calculate_many(self, expressions: List[str]) -> List[Dict[str, Union[str, List[str], str]]]:
+        """
+        Calculate many expressions at once.
+
+        Expressions are grouped by shape ("3*4" and "5*6" are both "v0*v1");
+        each shape is parsed once and evaluated over all of its rows with
+        NumPy, carrying each value as an exact fraction. Rows that do not fit
+        that (huge numbers, division by zero, fractional powers) go through
+        `calculate`, so every result is exactly what `calculate` returns.
+
+        Args:
+            expressions (List[str]): The mathematical expressions to calculate
+
+        Returns:
+            List of `calculate` results, in input order
+        """
+        results: List[Dict] = [None] * len(expressions)
+        groups: Dict[Tuple[str, ...], List[Tuple[int, str, List[str]]]] = {}
+        for i, expression in enumerate(expressions):
+            try:
+                clean_expr = self._clean_expression(expression)
+            except Exception:
+                results[i] = self.calculate(expression)
+                continue
+            if not self._validate_expression(clean_expr):
+                results[i] = {"error": "Invalid mathematical expression"}
+                continue
+            if len(clean_expr) > Config.MATH_MAX_LENGTH or not vectorized.literals_fit(clean_expr):
+                results[i] = self.calculate(expression)
+                continue
+            shape, literals = vectorized.split_literals(clean_expr)
+            groups.setdefault(shape, []).append((i, clean_expr, literals))
+
+        for shape, rows in groups.items():
+            try:
+                compiled = vectorized.compile_shape(shape)
+            except (SyntaxError, ValueError):
+                for i, _, _ in rows:
+                    results[i] = self.calculate(expressions[i])
+                continue
+            numerators, denominators, unsafe = vectorized.evaluate_shape(
+                compiled, [literals for _, _, literals in rows])
+            with np.errstate(all="ignore"):
+                whole = np.fmod(numerators, denominators) == 0
+                # Both parts are exact, so this division is correctly rounded,
+                # just like float() of the exact tier's Fraction
+                values = (numerators / denominators).tolist()
+            for (i, clean_expr, literals), value, is_whole, skip in zip(
+                    rows, values, whole.tolist(), unsafe.tolist()):
+                if skip:
+                    results[i] = self.calculate(expressions[i])
+                    continue
+                results[i] = {
+                    "result": str(int(value)) if is_whole else f"{value:.15g}",
+                    "steps": vectorized.fill_steps(compiled.steps, literals),
+                    "type": "integer" if is_whole else "decimal",
+                    "expression": clean_expr
+                }
+        return results
+
+    def evaluate_template(self, template: str, **variables) -> "np.ndarray":
+        """
+        Evaluate one expression over whole arrays of inputs.
+
+        Args:
+            template (str): Expression over named variables, e.g. "price * (1 + rate)^years"
+            **variables: An array (or scalar) per variable; arrays broadcast together
+
+        Returns:
+            numpy.ndarray of float64 results; division by zero gives inf or nan
+        """
+        return vectorized.evaluate(self._clean_expression(template), variables)
+
+    def _calculate_numeric(self, clean_expr: str) -> Dict[str, Union[str, List[str], str]]:
+        """Fast tier: exact rational arithmetic without sympy."""
+        compiled, steps = _parse_numeric(clean_expr)
+        deadline = time.perf_counter() + Config.MATH_TIME_BUDGET
+        try:
+            result = compiled(deadline)
+        except ZeroDivisionError:
+            # Evaluation stopped at the division, but sympy would go on to
+            # compute the rest with no budget: check all of it first
+            compile_expression(clean_expr.replace("^", "**"), exact=True, zero_division=1)(deadline)
+            raise _NeedsSymbolic()
+        if isinstance(result, complex):
+            raise _NeedsSymbolic()
+
+        if isinstance(result, Fraction) and result.denominator == 1:
+            result = result.numerator
+        if isinstance(result, int):
             return {
                 "result": str(result),
-                "steps": steps,
-                "type": self._get_result_type(result),
+                "steps": list(steps),
+                "type": "integer",
                 "expression": clean_expr
             }
-            
-        except Exception as e:
-            return {"error": f"Calculation error: {str(e)}"}
+        return {
+            "result": f"{float(result):.15g}",
+            "steps": list(steps),
+            "type": "decimal",
+            "expression": clean_expr
+        }
+
+    def _calculate_symbolic(self, clean_expr: str) -> Dict[str, Union[str, List[str], str]]:
+        """Slow tier: sympy, for results the numeric tier cannot represent."""
+        # Parse expression
+        expr = _parse_symbolic(clean_expr)
+        
+        # Calculate result
+        result = expr.evalf()
+        
+        # Get calculation steps
+        steps = self._get_calculation_steps(expr)
+        
+        return {
+            "result": str(result),
+            "steps": steps,
+            "type": self._get_result_type(result),
+            "expression": clean_expr
+        }
     
     def _clean_expression(self, expression: str) -> str:
         """Clean the expression by removing unwanted characters and normalizing format."""
@@ -67,7 +218,7 @@ class MathEngine:
         expr = expr.replace("×", "*").replace("÷", "/")
         
         # Ensure proper decimal points
-        expr = re.sub(r'\.+', '.', expr)
+        expr = _DOTS.sub('.', expr)
         
         return expr
     
@@ -82,12 +233,11 @@ class MathEngine:
             return False
             
         # Check for valid characters
-        valid_chars = set('0123456789+-*/.()^')
-        if not all(c in valid_chars for c in expression):
+        if not _VALID_CHARS.fullmatch(expression):
             return False
             
         # Check for consecutive operators
-        if re.search(r'[\+\-\*\/\^]{2,}', expression):
+        if _CONSECUTIVE_OPERATORS.search(expression):
             return False
             
         return True
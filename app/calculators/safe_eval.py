@@ -0,0 +1,137 @@
+import ast
+import operator
+import time
+from fractions import Fraction
+from functools import lru_cache
+from typing import Callable, Optional, Union
+from app.config import Config
+
+Number = Union[int, float, Fraction]
+
+class EvaluationError(ValueError):
+    """Raised for expressions that are not plain arithmetic or exceed a budget."""
+
+def _bits(value: Number) -> int:
+    """Size of an exact number in bits; floats are fixed-size."""
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, Fraction):
+        return value.numerator.bit_length() + value.denominator.bit_length()
+    return 0
+
+def _check_int(value: Number, max_int_bits: int) -> Number:
+    if _bits(value) > max_int_bits:
+        raise EvaluationError("result too large")
+    return value
+
+def _make_mul(max_int_bits: int) -> Callable[[Number, Number], Number]:
+    def mul(a: Number, b: Number) -> Number:
+        if _bits(a) + _bits(b) > max_int_bits + 1:
+            raise EvaluationError("result too large")
+        return a * b
+    return mul
+
+def _make_pow(max_int_bits: int, max_exponent: int) -> Callable[[Number, Number], Number]:
+    def pow_(base: Number, exponent: Number) -> Number:
+        if abs(exponent) > max_exponent:
+            raise EvaluationError("exponent too large")
+        if (exponent > 0 and abs(base) not in (0, 1)
+                and (_bits(base) - 1) * exponent > max_int_bits):
+            raise EvaluationError("result too large")
+        return base ** exponent
+    return pow_
+
+def _make_total(op: Callable[[Number, Number], Number], zero_division: Number) -> Callable[[Number, Number], Number]:
+    def total(a: Number, b: Number) -> Number:
+        try:
+            return op(a, b)
+        except ZeroDivisionError:
+            return zero_division
+    return total
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+def _compile(node: ast.AST, ops: dict, max_int_bits: int, counter: list, max_ops: int, exact: bool):
+    counter[0] += 1
+    if counter[0] > max_ops:
+        raise EvaluationError("expression too complex")
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # repr() gives the shortest decimal for a float literal, e.g. 3.14 -> 157/50
+        value = Fraction(repr(node.value)) if exact else node.value
+        value = _check_int(value, max_int_bits)
+        return lambda deadline: value
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile(node.operand, ops, max_int_bits, counter, max_ops, exact)
+        return lambda deadline: op(operand(deadline))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in ops:
+        op = ops[type(node.op)]
+        left = _compile(node.left, ops, max_int_bits, counter, max_ops, exact)
+        right = _compile(node.right, ops, max_int_bits, counter, max_ops, exact)
+
+        def binop(deadline: float) -> Number:
+            a = left(deadline)
+            b = right(deadline)
+            if time.perf_counter() > deadline:
+                raise EvaluationError("time budget exceeded")
+            return _check_int(op(a, b), max_int_bits)
+        return binop
+
+    raise EvaluationError(f"unsupported expression element: {type(node).__name__}")
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str,
+                       max_int_bits: int = Config.MATH_MAX_INT_BITS,
+                       max_exponent: int = Config.MATH_MAX_EXPONENT,
+                       max_ops: int = Config.MATH_MAX_OPS,
+                       exact: bool = False,
+                       zero_division: Optional[Number] = None) -> Callable[[float], Number]:
+    """
+    Parse an arithmetic expression once into a closure.
+
+    Only numbers, + - * / // % **, unary +/- and parentheses are accepted.
+    The returned function takes a `time.perf_counter()` deadline and raises
+    EvaluationError once it is passed. With `exact`, literals become
+    Fractions so the result is exact unless a fractional power is taken.
+    With `zero_division`, a division by zero gives that value instead of
+    raising, so the rest of the expression is still checked against the
+    budgets.
+    """
+    if len(expression) > Config.MATH_MAX_LENGTH:
+        raise EvaluationError("expression too long")
+    # Same filename as eval() so syntax errors read the same as before
+    tree = ast.parse(expression.strip(), filename="<string>", mode="eval")
+    ops = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: _make_mul(max_int_bits),
+        ast.Div: operator.truediv,
+        ast.FloorDiv: operator.floordiv,
+        ast.Mod: operator.mod,
+        ast.Pow: _make_pow(max_int_bits, max_exponent),
+    }
+    if zero_division is not None:
+        ops = {node: _make_total(op, zero_division) for node, op in ops.items()}
+    return _compile(tree.body, ops, max_int_bits, [0], max_ops, exact)
+
+def safe_eval(expression: str, time_budget: float = None, exact: bool = False) -> Number:
+    """
+    Evaluate a Python-syntax arithmetic expression without eval().
+
+    Args:
+        expression: e.g. "2 ** 10 / 4"
+        time_budget: Seconds allowed for evaluation; defaults to Config.MATH_TIME_BUDGET
+        exact: Evaluate with Fractions instead of Python floats
+
+    Returns:
+        The result; without `exact`, exactly what eval() would compute
+    """
+    compiled = compile_expression(expression, exact=exact)
+    budget = Config.MATH_TIME_BUDGET if time_budget is None else time_budget
+    return compiled(time.perf_counter() + budget)
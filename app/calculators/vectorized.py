@@ -0,0 +1,247 @@
+import ast
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Tuple
+import numpy as np
+from app.config import Config
+
+_LITERAL = re.compile(r"(\d+\.?\d*|\.\d+)")
+_PLACEHOLDER = re.compile(r"v(\d+)")
+_UNFIT_LITERAL = re.compile(r"[\d.]{16}|(?<![\d.])0\d")
+
+# float64 holds every integer below this exactly
+_EXACT_INT_LIMIT = 2.0 ** 53
+
+_BIN_UFUNCS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+}
+
+_UNARY_UFUNCS = {
+    ast.UAdd: np.positive,
+    ast.USub: np.negative,
+}
+
+class TemplateError(ValueError):
+    """Raised for templates that are not plain arithmetic over known variables."""
+
+def _count(counter: list) -> None:
+    counter[0] += 1
+    if counter[0] > Config.MATH_MAX_OPS:
+        raise TemplateError("expression too complex")
+
+def _compile_node(node: ast.AST, names: frozenset, counter: list) -> Callable:
+    _count(counter)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = float(node.value)
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in names:
+            raise TemplateError(f"unknown variable: {node.id}")
+        name = node.id
+        return lambda env: env[name]
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_UFUNCS:
+        ufunc = _UNARY_UFUNCS[type(node.op)]
+        operand = _compile_node(node.operand, names, counter)
+        return lambda env: ufunc(operand(env))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_UFUNCS:
+        ufunc = _BIN_UFUNCS[type(node.op)]
+        left = _compile_node(node.left, names, counter)
+        right = _compile_node(node.right, names, counter)
+        return lambda env: ufunc(left(env), right(env))
+
+    raise TemplateError(f"unsupported expression element: {type(node).__name__}")
+
+@lru_cache(maxsize=256)
+def compile_template(template: str, names: frozenset) -> Callable[[Dict[str, np.ndarray]], np.ndarray]:
+    """
+    Compile an arithmetic template over named variables into a NumPy pipeline.
+
+    `^` means power, as in MathEngine. The returned function takes a mapping
+    of variable name to array (or scalar) and evaluates element-wise in
+    float64.
+    """
+    tree = ast.parse(template.replace("^", "**"), mode="eval")
+    return _compile_node(tree.body, names, [0])
+
+def evaluate(template: str, variables: Dict[str, object]) -> np.ndarray:
+    """Evaluate a template over arrays of inputs in one call."""
+    fn = compile_template(template, frozenset(variables))
+    env = {name: np.asarray(value, dtype=np.float64) for name, value in variables.items()}
+    with np.errstate(all="ignore"):
+        return np.asarray(fn(env), dtype=np.float64)
+
+# Bulk evaluation of concrete expressions. Every value is carried as an
+# exact fraction: a numerator and a positive denominator, both integers that
+# float64 holds exactly (below 2**53). A row whose fraction outgrows that,
+# divides by zero or needs something else the exact tier treats specially is
+# marked unsafe and left to MathEngine.calculate.
+
+def _is_int(x: np.ndarray) -> np.ndarray:
+    return x == np.floor(x)
+
+def _fits(*values: np.ndarray) -> np.ndarray:
+    fits = True
+    for value in values:
+        fits = fits & (np.abs(value) < _EXACT_INT_LIMIT)
+    return fits
+
+def _exact_add(a, b, sign: float):
+    (n1, d1, u1), (n2, d2, u2) = a, b
+    n2 = sign * n2
+    cross1, cross2 = n1 * d2, n2 * d1
+    same = d1 == d2
+    n = np.where(same, n1 + n2, cross1 + cross2)
+    d = np.where(same, d1, d1 * d2)
+    fits = np.where(same, True, _fits(cross1, cross2)) & _fits(n, d)
+    return n, d, u1 | u2 | ~fits
+
+def _exact_mul(a, b):
+    (n1, d1, u1), (n2, d2, u2) = a, b
+    n, d = n1 * n2, d1 * d2
+    return n, d, u1 | u2 | ~_fits(n, d)
+
+def _exact_div(a, b):
+    (n1, d1, u1), (n2, d2, u2) = a, b
+    n, d = n1 * d2, d1 * n2
+    # Keep the denominator positive
+    sign = np.where(d < 0, -1.0, 1.0)
+    return n * sign, d * sign, u1 | u2 | (n2 == 0) | ~_fits(n, d)
+
+def _exact_pow(a, b):
+    (n1, d1, u1), (n2, d2, u2) = a, b
+    # Only whole exponents up to the exact tier's limit stay exact
+    exponent = n2 / d2
+    unsafe = (u1 | u2 | ~_is_int(exponent) | (np.abs(exponent) > Config.MATH_MAX_EXPONENT)
+              | ((exponent < 0) & (n1 == 0)))
+    # x^-k is (1/x)^k
+    flip = exponent < 0
+    base_n, base_d = np.where(flip, d1, n1), np.where(flip, n1, d1)
+    sign = np.where(base_d < 0, -1.0, 1.0)
+    exponent = np.abs(exponent)
+    # NumPy's pow can be an ulp or two off even for integers float64 holds
+    # exactly; anything at or past 2**53 is rejected anyway
+    n = np.rint((base_n * sign) ** exponent)
+    d = np.rint((base_d * sign) ** exponent)
+    return n, d, unsafe | ~_fits(n, d)
+
+def _compile_exact(node: ast.AST, counter: list) -> Callable:
+    _count(counter)
+
+    if isinstance(node, ast.Name):
+        # Adjacent literals ("1.2.3") run together into one name
+        if not _PLACEHOLDER.fullmatch(node.id):
+            raise TemplateError(f"malformed number: {node.id}")
+        name = node.id
+        return lambda env: env[name]
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_UFUNCS:
+        operand = _compile_exact(node.operand, counter)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+
+        def neg(env):
+            n, d, unsafe = operand(env)
+            return -n, d, unsafe
+        return neg
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_UFUNCS:
+        left = _compile_exact(node.left, counter)
+        right = _compile_exact(node.right, counter)
+        op = type(node.op)
+        if op is ast.Add:
+            return lambda env: _exact_add(left(env), right(env), 1.0)
+        if op is ast.Sub:
+            return lambda env: _exact_add(left(env), right(env), -1.0)
+        if op is ast.Mult:
+            return lambda env: _exact_mul(left(env), right(env))
+        if op is ast.Div:
+            return lambda env: _exact_div(left(env), right(env))
+        return lambda env: _exact_pow(left(env), right(env))
+
+    raise TemplateError(f"unsupported expression element: {type(node).__name__}")
+
+class Shape(NamedTuple):
+    """A compiled skeleton shared by every expression of the same form."""
+    evaluate: Callable
+    steps: List[str]  # str.format templates taking the literals
+
+def split_literals(clean_expr: str) -> Tuple[Tuple[str, ...], List[str]]:
+    """
+    Split an expression into its shape and its literals.
+
+    "3.5*2+1" -> (("", "*", "+", ""), ["3.5", "2", "1"]); expressions with the
+    same shape are evaluated together.
+    """
+    parts = _LITERAL.split(clean_expr)
+    return tuple(parts[0::2]), parts[1::2]
+
+@lru_cache(maxsize=256)
+def compile_shape(shape: Tuple[str, ...]) -> Shape:
+    """
+    Compile a shape for bulk evaluation and describe its top-level step the
+    way MathEngine does, with the literals left as format fields.
+    """
+    skeleton = shape[0] + "".join(f"v{i}{text}" for i, text in enumerate(shape[1:]))
+    node = ast.parse(skeleton.replace("^", "**"), mode="eval").body
+    fn = _compile_exact(node, [0])
+    steps = []
+    if isinstance(node, ast.BinOp):
+        left, right = ast.unparse(node.left), ast.unparse(node.right)
+        if isinstance(node.op, ast.Add):
+            steps.append(f"Adding terms: ({left}, {right})")
+        elif isinstance(node.op, ast.Sub):
+            steps.append(f"Subtracting terms: ({left}, {right})")
+        elif isinstance(node.op, ast.Mult):
+            steps.append(f"Multiplying factors: ({left}, {right})")
+        elif isinstance(node.op, ast.Div):
+            steps.append(f"Dividing: ({left}, {right})")
+        elif isinstance(node.op, ast.Pow):
+            steps.append(f"Calculating power: {left}^{right}")
+    return Shape(fn, [_PLACEHOLDER.sub(r"{\1}", step) for step in steps])
+
+def fill_steps(steps: List[str], literals: List[str]) -> List[str]:
+    """Put literals back into a shape's steps, spelled as ast.unparse spells them."""
+    # Integer literals are already canonical (literals_fit rules out "007")
+    spelled = [repr(float(text)) if "." in text else text for text in literals]
+    return [step.format(*spelled) for step in steps]
+
+def literals_fit(clean_expr: str) -> bool:
+    """Whether every literal is a fraction small enough to carry exactly."""
+    # 15 digits stay below 2**53; "007" is a syntax error for the exact tier
+    return _UNFIT_LITERAL.search(clean_expr) is None
+
+def evaluate_shape(shape: Shape, literals: List[List[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluate one shape over many rows of literals.
+
+    Args:
+        shape: From compile_shape
+        literals: The literal strings of each row, all passing literals_fit
+
+    Returns:
+        (numerators, denominators, unsafe): each row's exact result as a
+        fraction, and the rows that must go through the exact tier instead
+    """
+    rows = len(literals)
+    flat = [text for row in literals for text in row]
+    values = np.array(flat, dtype=np.str_).astype(np.float64).reshape(rows, -1)
+    dots = np.fromiter(map(str.find, flat, ["."] * len(flat)), np.float64, len(flat))
+    lengths = np.fromiter(map(len, flat), np.float64, len(flat))
+    places = np.where(dots >= 0, lengths - dots - 1, 0).reshape(rows, -1)
+    denominators = 10.0 ** places
+    # "12.50" is 1250/100; float64 reads 12.5 to within half an ulp, so
+    # rounding after scaling recovers the numerator exactly
+    numerators = np.rint(values * denominators)
+    env = {f"v{j}": (numerators[:, j], denominators[:, j], False) for j in range(values.shape[1])}
+    with np.errstate(all="ignore"):
+        n, d, unsafe = shape.evaluate(env)
+        unsafe = unsafe | ~np.isfinite(n) | ~np.isfinite(d)
+    return np.broadcast_to(n, rows), np.broadcast_to(d, rows), np.broadcast_to(unsafe, rows)
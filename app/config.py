@@ -7,26 +7,93 @@ class Config:
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
     API_WORKERS: int = int(os.getenv("API_WORKERS", "1"))
+    API_MAX_REQUESTS: int = int(os.getenv("API_MAX_REQUESTS", "0"))  # requests before a worker is recycled; 0 never
+    API_MAX_REQUESTS_JITTER: int = int(os.getenv("API_MAX_REQUESTS_JITTER", "0"))  # spreads recycling across workers
+    API_GRACEFUL_TIMEOUT: int = int(os.getenv("API_GRACEFUL_TIMEOUT", "30"))  # seconds a stopping worker may finish requests
+    AGENT_WORKERS: int = int(os.getenv("AGENT_WORKERS", "4"))  # threads running the agent per API worker
+    AGENT_QUEUE_DEPTH: int = int(os.getenv("AGENT_QUEUE_DEPTH", "64"))  # queued requests before answering 503
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "1000"))
+    BATCH_WORKERS: int = int(os.getenv("BATCH_WORKERS", "4"))
     
     # Model Configuration
     MODEL_NAME: str = os.getenv("MODEL_NAME", "google/flan-t5-base")
+    MODEL_ENABLED: bool = os.getenv("MODEL_ENABLED", "true").lower() == "true"
+    MODEL_PRELOAD: bool = os.getenv("MODEL_PRELOAD", "false").lower() == "true"  # load at startup instead of first use
     MAX_NEW_TOKENS: int = int(os.getenv("MAX_NEW_TOKENS", "100"))
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.7"))
     TOP_P: float = float(os.getenv("TOP_P", "0.9"))
     NUM_BEAMS: int = int(os.getenv("NUM_BEAMS", "4"))
+    MODEL_RUNTIME: str = os.getenv("MODEL_RUNTIME", "fp32")  # "fp32", "int8" (dynamic quantization) or "onnx"
+    MODEL_ARTIFACT_DIR: str = os.getenv("MODEL_ARTIFACT_DIR", ".model_cache")  # exported models are cached here
+    MODEL_INTRA_OP_THREADS: int = int(os.getenv("MODEL_INTRA_OP_THREADS", "0"))  # 0 keeps torch's default
+    MODEL_INTER_OP_THREADS: int = int(os.getenv("MODEL_INTER_OP_THREADS", "0"))  # 0 keeps torch's default
+    MODEL_WARMUP: bool = os.getenv("MODEL_WARMUP", "true").lower() == "true"  # one short generation after loading
+    GENERATION_BATCH_SIZE: int = int(os.getenv("GENERATION_BATCH_SIZE", "8"))  # prompts per generate() call
+    GENERATION_BATCH_WAIT_MS: float = float(os.getenv("GENERATION_BATCH_WAIT_MS", "10"))  # wait for a batch to fill
+    GENERATION_TIMEOUT: float = float(os.getenv("GENERATION_TIMEOUT", "30"))  # seconds, queueing included
+    
+    # Tool Dispatch Configuration
+    TOOL_WORKERS: int = int(os.getenv("TOOL_WORKERS", "32"))  # threads for tools that have a timeout
+    TOOL_CACHE_SIZE: int = int(os.getenv("TOOL_CACHE_SIZE", "1024"))  # entries per cacheable tool
+    TOOL_MATH_TIMEOUT: float = float(os.getenv("TOOL_MATH_TIMEOUT", "2.0"))  # seconds, symbolic tier included
+    TOOL_MATH_CONCURRENCY: int = int(os.getenv("TOOL_MATH_CONCURRENCY", "4"))
+    TOOL_GENERATIVE_CONCURRENCY: int = int(os.getenv("TOOL_GENERATIVE_CONCURRENCY", "16"))  # uses GENERATION_TIMEOUT
+    MAX_SUBQUESTIONS: int = int(os.getenv("MAX_SUBQUESTIONS", "4"))  # longer compound questions are answered whole
+    SUBQUESTION_WORKERS: int = int(os.getenv("SUBQUESTION_WORKERS", "8"))  # threads for sub-questions waiting on math or the model
+    
+    # Math Configuration
+    MATH_MAX_LENGTH: int = int(os.getenv("MATH_MAX_LENGTH", "1000"))  # characters
+    MATH_MAX_OPS: int = int(os.getenv("MATH_MAX_OPS", "256"))  # syntax nodes per expression
+    MATH_MAX_INT_BITS: int = int(os.getenv("MATH_MAX_INT_BITS", "4096"))
+    MATH_MAX_EXPONENT: int = int(os.getenv("MATH_MAX_EXPONENT", "10000"))
+    MATH_TIME_BUDGET: float = float(os.getenv("MATH_TIME_BUDGET", "0.05"))  # seconds
+    
+    # Country Data Configuration
+    COUNTRY_DATA_PATH: str = os.getenv("COUNTRY_DATA_PATH", "")  # defaults to app/data/countries.csv
+    FUZZY_MAX_DISTANCE: int = int(os.getenv("FUZZY_MAX_DISTANCE", "2"))  # typos tolerated in country names; 0 disables
     
     # Cache Configuration
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour
     CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "1000"))
+    # Off by default: measure wrong hits for your model first (benchmarks/bench_semantic_cache.py)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"  # generated answers reused for paraphrases
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+    
+    # Session Memory Configuration
+    SESSION_TTL: int = int(os.getenv("SESSION_TTL", "1800"))  # 30 minutes
+    SESSION_MAX_SIZE: int = int(os.getenv("SESSION_MAX_SIZE", "10000"))
+    RESPONSE_HISTORY_SIZE: int = int(os.getenv("RESPONSE_HISTORY_SIZE", "50"))  # ResponseEngine interactions kept per session
+    MEMORY_PERSIST: bool = os.getenv("MEMORY_PERSIST", "false").lower() == "true"
+    MEMORY_FLUSH_INTERVAL: float = float(os.getenv("MEMORY_FLUSH_INTERVAL", "1.0"))  # seconds
+    MEMORY_SHARED: bool = os.getenv("MEMORY_SHARED", "false").lower() == "true"  # sessions read and written straight through SQLite, for several API workers
+    MEMORY_DB: str = os.getenv("MEMORY_DB", "")  # defaults to app/memory.sqlite3
     
     # Logging Configuration
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
-    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"  # console; the file gets JSON lines
     LOG_FILE: str = os.getenv("LOG_FILE", "agent.log")
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # fraction of per-request INFO lines kept
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records buffered before new ones are dropped
+    LOG_BATCH_SIZE: int = int(os.getenv("LOG_BATCH_SIZE", "256"))  # most records written per flush
+    
+    # Metrics Configuration
+    METRICS_DIR: str = os.getenv("METRICS_DIR", "")  # where API workers combine their metrics; app.serve picks one
+    METRICS_WRITE_INTERVAL: float = float(os.getenv("METRICS_WRITE_INTERVAL", "5.0"))  # seconds between a worker's writes
+    
+    # Profiling Configuration
+    PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN", "")  # X-Profile header value that profiles a request; empty disables it
+    PROFILE_SAMPLE_EVERY: int = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))  # profile one in N requests; 0 never
+    PROFILER: str = os.getenv("PROFILER", "cprofile")  # "cprofile" or "pyinstrument"
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", ".profiles")
+    PROFILE_MAX_FILES: int = int(os.getenv("PROFILE_MAX_FILES", "100"))  # profiles kept on disk
     
     # Security Configuration
     API_KEY_HEADER: str = "X-API-Key"
     RATE_LIMIT: int = int(os.getenv("RATE_LIMIT", "100"))  # requests per minute
+    RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # seconds
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "sqlite" (shared by workers)
+    RATE_LIMIT_DB: str = os.getenv("RATE_LIMIT_DB", "")  # defaults to a file in the temp directory
     
     @classmethod
     def get_all(cls) -> Dict[str, Any]:
@@ -41,23 +108,81 @@ class Config:
         """Validate configuration values."""
         if cls.API_PORT < 1 or cls.API_PORT > 65535:
             raise ValueError("Invalid API_PORT value")
+        if cls.API_WORKERS < 1:
+            raise ValueError("API_WORKERS must be positive")
+        if cls.API_MAX_REQUESTS < 0 or cls.API_MAX_REQUESTS_JITTER < 0:
+            raise ValueError("API_MAX_REQUESTS and API_MAX_REQUESTS_JITTER must be positive")
+        if cls.API_GRACEFUL_TIMEOUT < 0:
+            raise ValueError("API_GRACEFUL_TIMEOUT must be positive")
+        if cls.AGENT_WORKERS < 1:
+            raise ValueError("AGENT_WORKERS must be positive")
+        if cls.AGENT_QUEUE_DEPTH < 0:
+            raise ValueError("AGENT_QUEUE_DEPTH must be positive")
+        if cls.BATCH_MAX_SIZE < 1:
+            raise ValueError("BATCH_MAX_SIZE must be positive")
+        if cls.BATCH_WORKERS < 1:
+            raise ValueError("BATCH_WORKERS must be positive")
+        if cls.TOOL_WORKERS < 1:
+            raise ValueError("TOOL_WORKERS must be positive")
+        if cls.TOOL_MATH_CONCURRENCY < 1 or cls.TOOL_GENERATIVE_CONCURRENCY < 1:
+            raise ValueError("TOOL_MATH_CONCURRENCY and TOOL_GENERATIVE_CONCURRENCY must be positive")
+        if cls.MAX_SUBQUESTIONS < 1:
+            raise ValueError("MAX_SUBQUESTIONS must be positive")
+        if cls.SUBQUESTION_WORKERS < 1:
+            raise ValueError("SUBQUESTION_WORKERS must be positive")
         if cls.CACHE_TTL < 0:
             raise ValueError("CACHE_TTL must be positive")
         if cls.CACHE_MAX_SIZE < 0:
             raise ValueError("CACHE_MAX_SIZE must be positive")
+        if cls.SEMANTIC_CACHE_THRESHOLD < -1 or cls.SEMANTIC_CACHE_THRESHOLD > 1:
+            raise ValueError("SEMANTIC_CACHE_THRESHOLD must be between -1 and 1")
+        if cls.SESSION_TTL < 0:
+            raise ValueError("SESSION_TTL must be positive")
+        if cls.SESSION_MAX_SIZE < 1:
+            raise ValueError("SESSION_MAX_SIZE must be positive")
+        if cls.RESPONSE_HISTORY_SIZE < 1:
+            raise ValueError("RESPONSE_HISTORY_SIZE must be positive")
+        if cls.FUZZY_MAX_DISTANCE < 0:
+            raise ValueError("FUZZY_MAX_DISTANCE must be positive")
+        if cls.LOG_LEVEL not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+            raise ValueError("LOG_LEVEL must be DEBUG, INFO, WARNING, ERROR or CRITICAL")
+        if cls.LOG_SAMPLE_RATE < 0 or cls.LOG_SAMPLE_RATE > 1:
+            raise ValueError("LOG_SAMPLE_RATE must be between 0 and 1")
+        if cls.LOG_QUEUE_SIZE < 1 or cls.LOG_BATCH_SIZE < 1:
+            raise ValueError("LOG_QUEUE_SIZE and LOG_BATCH_SIZE must be positive")
+        if cls.METRICS_WRITE_INTERVAL <= 0:
+            raise ValueError("METRICS_WRITE_INTERVAL must be positive")
+        if cls.PROFILE_SAMPLE_EVERY < 0:
+            raise ValueError("PROFILE_SAMPLE_EVERY must be positive")
+        if cls.PROFILER not in ("cprofile", "pyinstrument"):
+            raise ValueError("PROFILER must be 'cprofile' or 'pyinstrument'")
+        if cls.PROFILE_MAX_FILES < 1:
+            raise ValueError("PROFILE_MAX_FILES must be positive")
         if cls.RATE_LIMIT < 0:
             raise ValueError("RATE_LIMIT must be positive")
+        if cls.RATE_LIMIT_WINDOW < 1:
+            raise ValueError("RATE_LIMIT_WINDOW must be positive")
+        if cls.RATE_LIMIT_BACKEND not in ("memory", "sqlite"):
+            raise ValueError("RATE_LIMIT_BACKEND must be 'memory' or 'sqlite'")
         if cls.TEMPERATURE < 0 or cls.TEMPERATURE > 1:
             raise ValueError("TEMPERATURE must be between 0 and 1")
         if cls.TOP_P < 0 or cls.TOP_P > 1:
             raise ValueError("TOP_P must be between 0 and 1")
         if cls.NUM_BEAMS < 1:
             raise ValueError("NUM_BEAMS must be positive")
+        if cls.MODEL_RUNTIME not in ("fp32", "int8", "onnx"):
+            raise ValueError("MODEL_RUNTIME must be 'fp32', 'int8' or 'onnx'")
+        if cls.MODEL_INTRA_OP_THREADS < 0 or cls.MODEL_INTER_OP_THREADS < 0:
+            raise ValueError("MODEL_INTRA_OP_THREADS and MODEL_INTER_OP_THREADS must be positive")
+        if cls.GENERATION_BATCH_SIZE < 1:
+            raise ValueError("GENERATION_BATCH_SIZE must be positive")
+        if cls.GENERATION_BATCH_WAIT_MS < 0:
+            raise ValueError("GENERATION_BATCH_WAIT_MS must be positive")
 
 class Settings(BaseSettings):
     # API Configuration
     API_KEY: str = "your-secret-key-here"
-    CACHE_TTL: int = 3600  # Cache time-to-live in seconds
+    CACHE_TTL: int = Config.CACHE_TTL  # Cache time-to-live in seconds
 
     class Config:
         env_file = ".env"
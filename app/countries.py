@@ -0,0 +1,310 @@
+import csv
+import os
+import re
+import unicodedata
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from app.config import Config
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "countries.csv")
+
+# Words, keeping inner apostrophes and dots ("d'ivoire", "u.s.a") together
+_TOKEN = re.compile(r"\w+(?:['’.]\w+)*|&")
+_INNER_PUNCTUATION = re.compile(r"['’.]")
+
+def _fold(token: str) -> str:
+    """Fold one lower-case token: accents, possessive, inner punctuation, "st" and "&"."""
+    if not token.isascii():
+        token = "".join(c for c in unicodedata.normalize("NFKD", token) if not unicodedata.combining(c))
+    if token.endswith(("'s", "’s")):
+        token = token[:-2]
+    token = _INNER_PUNCTUATION.sub("", token)
+    if token == "st":
+        return "saint"
+    if token == "&":
+        return "and"
+    return token
+
+def _tokens(text: str) -> Iterator[Tuple[str, int, int]]:
+    """(folded token, start, end) for each word of text."""
+    for m in _TOKEN.finditer(text.lower()):
+        yield _fold(m.group()), m.start(), m.end()
+
+def normalize(name: str) -> str:
+    """
+    Fold a country name to its index key.
+
+    Case, accents, punctuation, a leading "the" and "St" for "Saint" are
+    ignored, so "Côte d'Ivoire", "cote divoire" and "COTE D'IVOIRE" agree.
+    """
+    words = [token for token, _, _ in _tokens(name)]
+    if words and words[0] == "the":
+        words = words[1:]
+    return " ".join(words)
+
+class Mention(NamedTuple):
+    """A country named in a text, with the character span that names it."""
+    country: "Country"
+    start: int
+    end: int
+
+class Resolution(NamedTuple):
+    """A country resolved from a possibly misspelled name."""
+    country: "Country"
+    confidence: float  # 1.0 for an exact name or alias
+
+_END = ""
+
+# Shorter names are too easy to mistake for one another to correct
+_FUZZY_MIN_LENGTH = 4
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+def _bounded_distance(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance counting adjacent transpositions as one edit ("cnada"),
+    or limit + 1 as soon as it must exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _number(text: str) -> Union[int, float]:
+    return float(text) if "." in text else int(text)
+
+class Country:
+    """One country; slotted since every country stays in memory."""
+    __slots__ = ("name", "capital", "population", "area", "aliases")
+
+    def __init__(self, name: str, capital: str, population: Union[int, float],
+                 area: Union[int, float], aliases: Tuple[str, ...] = ()):
+        self.name = name
+        self.capital = capital
+        self.population = population
+        self.area = area
+        self.aliases = aliases
+
+    def as_dict(self) -> dict:
+        """The fields get_country_info has always returned."""
+        return {"capital": self.capital, "population": self.population, "area": self.area}
+
+    def __repr__(self) -> str:
+        return f"Country({self.name!r})"
+
+class CountryKnowledgeBase(Mapping):
+    """
+    Countries indexed by name and alias.
+
+    Iterates over canonical names. Lookups accept the canonical name or any
+    alias in any case or accents; names already in canonical or lower case
+    are found without normalizing.
+    """
+
+    def __init__(self, countries: Iterable[Country] = ()):
+        self._countries: Dict[str, Country] = {}
+        self._index: Dict[str, Country] = {}
+        self._trie: Optional[dict] = None
+        self._grams: Optional[dict] = None
+        for country in countries:
+            self.add(country)
+
+    @classmethod
+    def load(cls, path: str = None) -> "CountryKnowledgeBase":
+        """
+        Load countries from a CSV file with name, capital, population, area
+        and ';'-separated aliases columns.
+        """
+        with open(path or DATA_PATH, newline="", encoding="utf-8") as f:
+            return cls(
+                Country(row["name"], row["capital"], _number(row["population"]), _number(row["area"]),
+                        tuple(alias for alias in row["aliases"].split(";") if alias))
+                for row in csv.DictReader(f)
+            )
+
+    def add(self, country: Country) -> None:
+        """Add a country, replacing any country of the same name."""
+        previous = self._countries.get(country.name)
+        if previous is not None:
+            self._index = {key: c for key, c in self._index.items() if c is not previous}
+        self._countries[country.name] = country
+        # The exact canonical name hits without normalizing
+        self._index[country.name] = country
+        for alias in (country.name, *country.aliases):
+            self._index.setdefault(normalize(alias), country)
+        self._trie = None
+        self._grams = None
+
+    def lookup(self, name: str) -> Optional[Country]:
+        """Find a country by name or alias."""
+        country = self._index.get(name)
+        if country is None:
+            country = self._index.get(name.lower()) or self._index.get(normalize(name))
+        return country
+
+    def resolve(self, name: str, max_distance: int = None) -> Optional[Resolution]:
+        """
+        Find a country by name or alias, tolerating a few typos.
+
+        Candidates come from a trigram index of every name and alias
+        sharing the first letter; the closest within max_distance edits
+        (at most one per four letters) wins.
+
+        Args:
+            name: e.g. "Germny"
+            max_distance: Defaults to Config.FUZZY_MAX_DISTANCE; 0 only
+                accepts exact names
+
+        Returns:
+            Resolution with confidence 1 - distance / length, or None
+        """
+        country = self.lookup(name)
+        if country is not None:
+            return Resolution(country, 1.0)
+        key = normalize(name)
+        limit = Config.FUZZY_MAX_DISTANCE if max_distance is None else max_distance
+        limit = min(limit, len(key) // 4)
+        if len(key) < _FUZZY_MIN_LENGTH or limit < 1:
+            return None
+
+        grams = self._grams
+        if grams is None:
+            grams = self._grams = self._build_grams()
+        # Names are only corrected to names with the same first letter
+        # ("woman" is not Oman), so only that letter's index is searched
+        keys, postings = grams.get(key[0], ((), {}))
+        shared: Dict[int, int] = {}
+        query = _trigrams(key)
+        for gram in query:
+            for key_id in postings.get(gram, ()):
+                shared[key_id] = shared.get(key_id, 0) + 1
+
+        best = None
+        best_distance = limit + 1
+        for key_id, count in shared.items():
+            candidate, country = keys[key_id]
+            # One edit changes at most four trigrams (a transposition does)
+            if count < max(len(query), len(candidate) + 1) - 4 * limit:
+                continue
+            distance = _bounded_distance(key, candidate, min(limit, best_distance - 1))
+            if distance < best_distance:
+                best, best_distance = (candidate, country), distance
+        if best is None:
+            return None
+        candidate, country = best
+        return Resolution(country, round(1 - best_distance / max(len(key), len(candidate)), 3))
+
+    def build_index(self) -> None:
+        """Build the fuzzy-match index now instead of on the first misspelled name."""
+        if self._grams is None:
+            self._grams = self._build_grams()
+
+    def _build_grams(self) -> Dict[str, Tuple[List[Tuple[str, Country]], Dict[str, List[int]]]]:
+        # first letter -> (index keys, trigram -> positions in those keys)
+        grams: Dict[str, Tuple[List[Tuple[str, Country]], Dict[str, List[int]]]] = {}
+        for key, country in self._index.items():
+            if not key or key != normalize(key):
+                continue
+            keys, postings = grams.setdefault(key[0], ([], {}))
+            for gram in set(_trigrams(key)):
+                postings.setdefault(gram, []).append(len(keys))
+            keys.append((key, country))
+        return grams
+
+    def update(self, name: str, info: dict) -> Country:
+        """Replace a country's capital, population and area, adding it if unknown."""
+        country = self.lookup(name)
+        if country is None:
+            country = Country(name.strip().title(), None, None, None)
+            self.add(country)
+        country.capital = info.get("capital")
+        country.population = info.get("population")
+        country.area = info.get("area")
+        return country
+
+    def mentions(self, text: str) -> List[Mention]:
+        """
+        Every country named in text, left to right, in one pass over its words.
+
+        Names match whole words only ("oman" is not in "romania") and the
+        longest name starting at a word wins ("Papua New Guinea", not
+        "Guinea"); matches do not overlap.
+        """
+        trie = self._trie
+        if trie is None:
+            trie = self._trie = self._build_trie()
+        lowered = text.lower()
+        words = [word if word.isascii() and word.isalpha() and word != "st" else _fold(word)
+                 for word in _TOKEN.findall(lowered)]
+        matches = []
+        i = 0
+        while i < len(words):
+            node = trie.get(words[i])
+            if node is None:
+                i += 1
+                continue
+            match = (node[_END], i + 1) if _END in node else None
+            j = i + 1
+            while j < len(words):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    match = (node[_END], j)
+            if match is None:
+                i += 1
+                continue
+            matches.append((match[0], i, match[1]))
+            i = match[1]
+        if not matches:
+            return []
+        # Character spans are only needed for the words that matched
+        spans = [m.span() for m in _TOKEN.finditer(lowered)]
+        return [Mention(country, spans[i][0], spans[j - 1][1]) for country, i, j in matches]
+
+    def _build_trie(self) -> dict:
+        # Nested dicts keyed by folded word; _END marks a complete name
+        root: dict = {}
+        for alias, country in self.aliases():
+            node = root
+            for token, _, _ in _tokens(alias):
+                node = node.setdefault(token, {})
+            node.setdefault(_END, country)
+        return root
+
+    def aliases(self) -> Iterator[Tuple[str, Country]]:
+        """Every (name or alias, country) pair, canonical names first."""
+        for country in self._countries.values():
+            yield country.name, country
+        for country in self._countries.values():
+            for alias in country.aliases:
+                yield alias, country
+
+    def __getitem__(self, name: str) -> dict:
+        country = self.lookup(name)
+        if country is None:
+            raise KeyError(name)
+        return country.as_dict()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._countries)
+
+    def __len__(self) -> int:
+        return len(self._countries)
+
+knowledge_base = CountryKnowledgeBase.load(Config.COUNTRY_DATA_PATH or None)
@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from app.cache import TTLCache
+from app.config import Config
+from app.metrics import Histogram
+
+# Cost classes, for tuning and reporting
+CHEAP = "cheap"
+MODERATE = "moderate"
+EXPENSIVE = "expensive"
+
+class Tool(NamedTuple):
+    """A function the agent can call, with how the dispatcher should treat it."""
+    name: str
+    fn: Callable[..., Any]
+    cost: str = CHEAP
+    cacheable: bool = False  # results depend only on the arguments
+    timeout: Optional[float] = None  # seconds; None runs inline without one
+    max_concurrency: Optional[int] = None  # simultaneous calls; None is unlimited
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool does not get a slot or finish within its timeout."""
+
+class _ToolState:
+    def __init__(self, tool: Tool):
+        self.tool = tool
+        self.cache = TTLCache(max_size=Config.TOOL_CACHE_SIZE, ttl=Config.CACHE_TTL) if tool.cacheable else None
+        self.slots = threading.BoundedSemaphore(tool.max_concurrency) if tool.max_concurrency else None
+        self.latency = Histogram()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+
+class Dispatcher:
+    """
+    Calls registered tools, applying each one's cache, timeout and
+    concurrency limit, and keeps a latency histogram per tool.
+
+    Tools with a timeout run on the dispatcher's pool so the caller can stop
+    waiting; the call itself cannot be interrupted and keeps its
+    concurrency slot until it returns, so the limit also bounds abandoned
+    work. Thread-safe.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, _ToolState] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def register(self, tool: Tool) -> None:
+        """Add a tool, replacing any tool of the same name."""
+        self._tools[tool.name] = _ToolState(tool)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def call(self, name: str, *args: Any) -> Any:
+        """
+        Call a tool.
+
+        Raises:
+            KeyError: No tool of that name
+            ToolTimeoutError: No free slot or no result within the tool's timeout
+        """
+        state = self._tools[name]
+        if state.cache is not None:
+            cached = state.cache.get(args)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        with state.lock:
+            state.calls += 1
+        try:
+            result = self._run(state, args, start)
+        except ToolTimeoutError:
+            with state.lock:
+                state.timeouts += 1
+            raise
+        except Exception:
+            with state.lock:
+                state.errors += 1
+            raise
+        finally:
+            state.latency.observe(time.perf_counter() - start)
+
+        if state.cache is not None and result is not None:
+            state.cache.set(args, result)
+        return result
+
+    def _run(self, state: _ToolState, args: tuple, start: float) -> Any:
+        tool, slots = state.tool, state.slots
+        if slots is not None and not slots.acquire(timeout=tool.timeout):
+            raise ToolTimeoutError(f"{tool.name}: no free slot within {tool.timeout}s")
+        if tool.timeout is None:
+            try:
+                return tool.fn(*args)
+            finally:
+                if slots is not None:
+                    slots.release()
+
+        try:
+            future = self._executor().submit(tool.fn, *args)
+        except BaseException:
+            if slots is not None:
+                slots.release()
+            raise
+        if slots is not None:
+            # The slot is held until the call really ends, even after a timeout
+            future.add_done_callback(lambda _: slots.release())
+        try:
+            # Waiting for a slot counts against the same timeout
+            return future.result(timeout=max(0.0, tool.timeout - (time.perf_counter() - start)))
+        except FutureTimeout:
+            raise ToolTimeoutError(f"{tool.name}: no result within {tool.timeout}s")
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=Config.TOOL_WORKERS, thread_name_prefix="tool")
+        return self._pool
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per tool: cost class, call/error/timeout counts, cache counters and latency."""
+        out = {}
+        for name, state in self._tools.items():
+            with state.lock:
+                counts = {"calls": state.calls, "errors": state.errors, "timeouts": state.timeouts}
+            out[name] = {
+                "cost": state.tool.cost,
+                **counts,
+                "cache": state.cache.stats() if state.cache is not None else None,
+                "latency": state.latency.snapshot(),
+            }
+        return out
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+class QueueFullError(Exception):
+    """Raised when the executor already holds as many jobs as it accepts."""
+
+class BoundedExecutor:
+    """
+    Thread pool that accepts at most `max_workers + queue_depth` jobs at once.
+
+    Submitting beyond that raises QueueFullError instead of queueing without
+    limit, so callers can shed load (e.g. answer 503) rather than let latency
+    grow unbounded.
+    """
+
+    def __init__(self, max_workers: int, queue_depth: int, name: str = "agent"):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + queue_depth)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError("Too many requests in progress")
+        with self._lock:
+            self.in_flight += 1
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        self._acquire()
+        try:
+            # The job sees the caller's context variables, e.g. the request id
+            future = self._pool.submit(contextvars.copy_context().run, fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run fn in the pool and await its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def reserve(self) -> Callable[[], None]:
+        """
+        Take a slot for work that runs outside the pool, e.g. a streamed response.
+
+        Returns:
+            Callable: Gives the slot back; calls after the first do nothing
+
+        Raises:
+            QueueFullError: No slot is free
+        """
+        self._acquire()
+        released = threading.Event()
+
+        def release() -> None:
+            with self._lock:
+                if released.is_set():
+                    return
+                released.set()
+            self._release()
+
+        return release
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+# Takes a batch of prompts, returns (text, generated tokens) per prompt
+GenerateBatch = Callable[[List[str]], List[Tuple[str, int]]]
+
+class GenerationResult(NamedTuple):
+    """One generated answer and what it cost."""
+    text: str
+    tokens: int
+    queue_wait: float  # seconds between submit and the start of its batch
+    batch_size: int
+
+class MicroBatcher:
+    """
+    Collects concurrent generation requests into batches.
+
+    A single worker thread takes the first waiting prompt, then keeps
+    collecting until it has `max_batch_size` prompts or `max_wait` seconds
+    have passed, runs one `generate_batch` call for all of them and hands
+    each caller its own result. The worker starts on the first submit.
+    """
+
+    def __init__(self, generate_batch: GenerateBatch, max_batch_size: int, max_wait: float,
+                 history: int = 1000):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[str, float, Future]]" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._waits = deque(maxlen=history)
+        self._requests = 0
+        self._batches = 0
+        self._tokens = 0
+        self._generate_seconds = 0.0
+
+    def submit(self, prompt: str) -> Future:
+        """Queue a prompt; the future resolves to a GenerationResult."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((prompt, time.perf_counter(), future))
+        return future
+
+    def generate(self, prompt: str, timeout: float = None) -> GenerationResult:
+        """Generate for one prompt, waiting for the batch it joins."""
+        return self.submit(prompt).result(timeout)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                worker = threading.Thread(target=self._run, name="generation", daemon=True)
+                worker.start()
+                self._worker = worker
+
+    def _collect(self) -> List[Tuple[str, float, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [item for item in self._collect() if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                outputs = self.generate_batch([prompt for prompt, _, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - start
+
+            waits = [start - submitted for _, submitted, _ in batch]
+            with self._stats_lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._tokens += sum(tokens for _, tokens in outputs)
+                self._generate_seconds += elapsed
+                self._waits.extend(waits)
+            for (_, _, future), (text, tokens), wait in zip(batch, outputs, waits):
+                future.set_result(GenerationResult(text, tokens, wait, len(batch)))
+
+    def stats(self) -> Dict[str, float]:
+        """Throughput and queue wait so far; waits cover the most recent requests."""
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            requests, batches = self._requests, self._batches
+            tokens, seconds = self._tokens, self._generate_seconds
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "tokens": tokens,
+            "tokens_per_second": tokens / seconds if seconds else 0.0,
+            "queue_wait_mean_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "queue_wait_p95_ms": waits[int(0.95 * (len(waits) - 1))] * 1000 if waits else 0.0,
+        }
@@ -0,0 +1,233 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import IO, List, Optional, Sequence, Tuple
+
+# Set per HTTP request by the middleware in app.main; copied into the agent's
+# worker threads by BoundedExecutor
+request_id: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+
+# Pass as extra= on per-request INFO lines that may be sampled under load:
+#     logger.info("Processing question: %s", question, extra=SAMPLED)
+SAMPLED = {"sampled": True}
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the current request id."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps `rate` of the INFO records marked with SAMPLED, evenly spaced
+    rather than at random. Other records always pass.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.INFO or not getattr(record, "sampled", False) or self.rate >= 1:
+            return True
+        with self._lock:
+            self._credit += self.rate
+            if self._credit < 1:
+                return False
+            self._credit -= 1
+            return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, request_id, message and exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread untouched: the message is %-formatted
+    there, not in the caller. A full queue drops the record and counts it
+    rather than blocking the request.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LogWriter:
+    """
+    Background thread that drains the log queue and writes each batch of
+    records to its streams with one write and one flush per stream.
+    """
+
+    def __init__(self, log_queue: queue.Queue, targets: Sequence[Tuple[IO[str], logging.Formatter]],
+                 batch_size: int = 256):
+        self.queue = log_queue
+        self.targets = list(targets)
+        self.batch_size = batch_size
+        self.written = 0
+        self.flushes = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write everything already queued, then end the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self._write([r for r in batch if r is not None])
+            if stop:
+                return
+
+    def _write(self, records: List[logging.LogRecord]) -> None:
+        if not records:
+            return
+        for stream, formatter in self.targets:
+            lines = []
+            for record in records:
+                try:
+                    lines.append(formatter.format(record))
+                except Exception:
+                    lines.append(f"unformattable log record: {record.msg!r}")
+            try:
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except Exception:
+                pass
+        self.written += len(records)
+        self.flushes += 1
+
+_writer: Optional[LogWriter] = None
+_handler: Optional[_QueueHandler] = None
+_settings: Optional[dict] = None
+
+def setup_logging(level: str, log_file: Optional[str] = None, console: bool = True,
+                  sample_rate: float = 1.0, queue_size: int = 10000, batch_size: int = 256,
+                  text_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s") -> None:
+    """
+    Route the root logger through a bounded queue to a background writer.
+
+    The log file gets JSON lines, the console the usual text format with
+    the request id. Calling it again replaces the previous pipeline; a
+    forked worker process gets its own.
+
+    Args:
+        level: Root log level name, e.g. "INFO"
+        log_file: JSON lines file, or None for none
+        console: Also write text lines to stderr
+        sample_rate: Fraction of SAMPLED INFO records kept
+        queue_size: Records held before new ones are dropped
+        batch_size: Most records written per flush
+    """
+    global _settings
+    shutdown_logging()
+    _settings = dict(level=level, log_file=log_file, console=console, sample_rate=sample_rate,
+                     queue_size=queue_size, batch_size=batch_size, text_format=text_format)
+    _start(**_settings)
+
+def _start(level: str, log_file: Optional[str], console: bool, sample_rate: float,
+           queue_size: int, batch_size: int, text_format: str) -> None:
+    global _writer, _handler
+    targets = []
+    if log_file:
+        targets.append((open(log_file, "a", encoding="utf-8"), JsonFormatter()))
+    if console:
+        targets.append((sys.stderr, logging.Formatter(text_format.replace(
+            "%(message)s", "[%(request_id)s] %(message)s"))))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _writer = LogWriter(log_queue, targets, batch_size)
+    _handler = _QueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(sample_rate))
+    _handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(getattr(logging, level))
+    _writer.start()
+
+def _restart_after_fork() -> None:
+    # The writer thread did not survive the fork and the queue may have been
+    # locked by it, so the child starts over; the inherited file stays with
+    # the parent
+    global _writer, _handler
+    if _settings is None:
+        return
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+    _writer = _handler = None
+    _start(**_settings)
+
+def shutdown_logging() -> None:
+    """Flush the queue and close the log file."""
+    global _writer, _handler, _settings
+    _settings = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _writer is not None:
+        _writer.stop()
+        for stream, _ in _writer.targets:
+            if stream is not sys.stderr:
+                stream.close()
+        _writer = None
+
+def logging_stats() -> dict:
+    """Records written, flushes, records dropped on a full queue and queue depth."""
+    if _writer is None or _handler is None:
+        return {"written": 0, "flushes": 0, "dropped": 0, "queued": 0}
+    return {
+        "written": _writer.written,
+        "flushes": _writer.flushes,
+        "dropped": _handler.dropped,
+        "queued": _writer.queue.qsize(),
+    }
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -1,20 +1,33 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import APIKeyHeader
-from app.agent import process_question
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from app.agent import process_question, agent
+from app.batch import process_batch, iter_batch
+from app.executor import BoundedExecutor, QueueFullError
+from app.ratelimit import create_limiter
 from app.config import Config
+from app.metrics import registry, SharedMetrics
+from app.logs import setup_logging, request_id
+from app.profiling import RequestProfiler, ProfilingMiddleware
+import json
 import time
-from typing import Dict, List
+import uuid
+from typing import Callable, Iterator, List, Optional, Union
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL),
-    format=Config.LOG_FORMAT,
-    handlers=[
-        logging.FileHandler(Config.LOG_FILE),
-        logging.StreamHandler()
-    ]
+# Configure logging: records go through a queue to a background writer, so
+# requests never wait on disk
+setup_logging(
+    Config.LOG_LEVEL,
+    log_file=Config.LOG_FILE,
+    sample_rate=Config.LOG_SAMPLE_RATE,
+    queue_size=Config.LOG_QUEUE_SIZE,
+    batch_size=Config.LOG_BATCH_SIZE,
+    text_format=Config.LOG_FORMAT
 )
 
 logger = logging.getLogger(__name__)
@@ -35,29 +48,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in profiling of single requests, listed at /profiles
+profiler = RequestProfiler(
+    Config.PROFILE_DIR,
+    max_profiles=Config.PROFILE_MAX_FILES,
+    token=Config.PROFILE_TOKEN,
+    sample_every=Config.PROFILE_SAMPLE_EVERY,
+    engine=Config.PROFILER
+)
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Metrics exported by /metrics; several workers (app.serve) combine theirs
+shared_metrics = SharedMetrics(Config.METRICS_DIR) if Config.METRICS_DIR else None
+REQUESTS = registry.counter("agent_requests_total", "HTTP requests by endpoint and status code",
+                            ("endpoint", "status"))
+ERRORS = registry.counter("agent_errors_total", "Requests that failed with a server error", ("endpoint",))
+REJECTIONS = registry.counter("agent_rejections_total", "Requests turned away (rate_limit, queue_full)",
+                              ("reason",))
+REQUEST_LATENCY = registry.histogram("agent_request_duration_seconds", "HTTP request latency by endpoint",
+                                     ("endpoint",))
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag the request's log records with its X-Request-ID, or a new one."""
+    rid = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    token = request_id.set(rid)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id.reset(token)
+    response.headers["X-Request-ID"] = rid
+    return response
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template ("/ask"), not the raw path, keeps label values bounded
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUESTS.inc(endpoint, str(status))
+        if status >= 500:
+            ERRORS.inc(endpoint)
+        REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+
+# Agent work runs off the event loop in a bounded pool
+agent_executor = BoundedExecutor(
+    max_workers=Config.AGENT_WORKERS,
+    queue_depth=Config.AGENT_QUEUE_DEPTH
+)
+
+def _server_busy() -> HTTPException:
+    REJECTIONS.inc("queue_full")
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy. Please try again later.",
+        headers={"Retry-After": "1"}
+    )
+
 # Rate limiting
-request_times: Dict[str, List[float]] = {}
+rate_limiter = create_limiter(
+    Config.RATE_LIMIT_BACKEND,
+    limit=Config.RATE_LIMIT,
+    window=Config.RATE_LIMIT_WINDOW,
+    max_keys=Config.RATE_LIMIT_MAX_KEYS,
+    db_path=Config.RATE_LIMIT_DB or None
+)
 
 def check_rate_limit(request: Request):
     """Check if the request is within rate limits."""
-    client_ip = request.client.host
-    current_time = time.time()
-    
-    # Initialize or clean old requests
-    if client_ip not in request_times:
-        request_times[client_ip] = []
-    request_times[client_ip] = [t for t in request_times[client_ip] 
-                              if current_time - t < 60]
-    
-    # Check rate limit
-    if len(request_times[client_ip]) >= Config.RATE_LIMIT:
+    if not rate_limiter.allow(request.client.host):
+        REJECTIONS.inc("rate_limit")
         raise HTTPException(
             status_code=429,
             detail="Too many requests. Please try again later."
         )
-    
-    # Add current request
-    request_times[client_ip].append(current_time)
 
 # API key security
 api_key_header = APIKeyHeader(name=Config.API_KEY_HEADER)
@@ -81,10 +151,22 @@ async def ping():
     """Health check endpoint."""
     return {"message": "pong", "status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Request counts, rejections and per-stage latency histograms in the Prometheus text format.
+
+    With several workers, the sum over all of them; other workers' values
+    may be up to METRICS_WRITE_INTERVAL seconds old.
+    """
+    text = shared_metrics.render() if shared_metrics is not None else registry.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
 @app.get("/ask")
 async def ask(
     question: str,
     request: Request,
+    session_id: Optional[str] = None,
     api_key: str = Depends(verify_api_key)
 ):
     """
@@ -93,49 +175,219 @@ async def ask(
     Args:
         question: The question to process
         request: The FastAPI request object
+        session_id: Optional conversation id used to resolve follow-ups like "its capital"
         api_key: The API key for authentication
         
     Returns:
-        dict: The response containing the agent's answer
+        dict: The agent's answer, plus the country it resolved (if any) and
+            the confidence of that name match
     """
     try:
         # Check rate limit
         check_rate_limit(request)
         
         # Process the question
-        logger.info(f"Processing question: {question}")
-        response = process_question(question)
+        answer = await agent_executor.run(profiler.call, agent.answer, question, session_id)
         
         return {
-            "response": response,
+            "response": answer.response,
+            "country": answer.country,
+            "confidence": answer.confidence,
             "status": "success"
         }
         
+    except HTTPException:
+        raise
+    except QueueFullError:
+        raise _server_busy()
     except Exception as e:
-        logger.error(f"Error processing question: {str(e)}", exc_info=True)
+        logger.error("Error processing question: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail="An error occurred while processing your question"
         )
 
+class BatchQuestion(BaseModel):
+    question: str
+    session_id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    questions: List[Union[str, BatchQuestion]]
+    session_id: Optional[str] = None
+
+batch_executor = ThreadPoolExecutor(max_workers=Config.BATCH_WORKERS, thread_name_prefix="batch")
+
+def _check_batch_size(batch: BatchRequest) -> None:
+    if len(batch.questions) > Config.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {Config.BATCH_MAX_SIZE} questions)"
+        )
+
+def _batch_items(batch: BatchRequest) -> List[tuple]:
+    return [
+        (q, batch.session_id) if isinstance(q, str) else (q.question, q.session_id or batch.session_id)
+        for q in batch.questions
+    ]
+
+@app.post("/ask/batch")
+async def ask_batch(
+    batch: BatchRequest,
+    request: Request,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Process many questions in one request.
+
+    Each entry of `questions` is either a plain string or an object with
+    `question` and `session_id`; the top-level `session_id` applies to plain
+    strings. Identical stateless questions are answered once.
+
+    Returns:
+        dict: Per-question results in input order, each with its own status
+    """
+    check_rate_limit(request)
+    _check_batch_size(batch)
+
+    items = _batch_items(batch)
+    try:
+        results = await agent_executor.run(process_batch, items, process_question, batch_executor)
+    except QueueFullError:
+        raise _server_busy()
+    except Exception as e:
+        logger.error("Error processing batch: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while processing your questions"
+        )
+
+    return {
+        "results": results,
+        "status": "success"
+    }
+
+def _ndjson_events(items: List[tuple], release: Callable[[], None]) -> Iterator[str]:
+    try:
+        for chunk in iter_batch(items, process_question, batch_executor):
+            yield "".join(
+                json.dumps({"type": "answer", "index": index, **result}, ensure_ascii=False) + "\n"
+                for index, result in chunk
+            )
+    finally:
+        release()
+
+def _sse_events(items: List[tuple], release: Callable[[], None]) -> Iterator[str]:
+    try:
+        for chunk in iter_batch(items, process_question, batch_executor):
+            yield "".join(
+                f"event: answer\ndata: {json.dumps({'type': 'answer', 'index': index, **result}, ensure_ascii=False)}\n\n"
+                for index, result in chunk
+            )
+        yield "event: end\ndata: {}\n\n"
+    finally:
+        release()
+
+@app.post("/ask/stream")
+async def ask_stream(
+    batch: BatchRequest,
+    request: Request,
+    format: str = "ndjson",
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Stream answers as they become ready instead of waiting for the whole batch.
+
+    Takes the same body as /ask/batch. Each event carries the item's `index`
+    since answers arrive in completion order.
+
+    Args:
+        format: "ndjson" (one JSON object per line) or "sse" (Server-Sent Events)
+    """
+    check_rate_limit(request)
+    _check_batch_size(batch)
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    items = _batch_items(batch)
+
+    # The stream holds an agent slot while it runs, like /ask/batch, so
+    # streams are shed with 503 under the same limit
+    try:
+        release = agent_executor.reserve()
+    except QueueFullError:
+        raise _server_busy()
+    # The generator releases the slot when it ends; the background task
+    # covers a client that disconnects before the first answer
+    if format == "sse":
+        return StreamingResponse(_sse_events(items, release), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"}, background=BackgroundTask(release))
+    return StreamingResponse(_ndjson_events(items, release), media_type="application/x-ndjson",
+                             background=BackgroundTask(release))
+
 @app.get("/config")
 async def get_config(api_key: str = Depends(verify_api_key)):
     """Get the current configuration (excluding sensitive values)."""
     config = Config.get_all()
     # Remove sensitive information
     config.pop("API_KEY_HEADER", None)
+    config.pop("PROFILE_TOKEN", None)
     return config
 
+@app.get("/cache/stats")
+async def cache_stats(api_key: str = Depends(verify_api_key)):
+    """Get response cache counters (hits, misses, evictions, ...)."""
+    return agent.cache_stats()
+
+@app.get("/cache/semantic/stats")
+async def semantic_cache_stats(api_key: str = Depends(verify_api_key)):
+    """Get semantic cache counters for generated answers (hit rate, lookup latency, ...)."""
+    return agent.semantic_cache_stats()
+
+@app.get("/tools/stats")
+async def tool_stats(api_key: str = Depends(verify_api_key)):
+    """Get per-tool counters, cache stats and latency histograms."""
+    return agent.tool_stats()
+
+@app.get("/generation/stats")
+async def generation_stats(api_key: str = Depends(verify_api_key)):
+    """Get generative fallback counters (batch sizes, tokens/sec, queue wait)."""
+    return agent.generation_stats()
+
+@app.get("/profiles")
+async def list_profiles(api_key: str = Depends(verify_api_key)):
+    """List stored request profiles, newest first (request id, reason, duration, ...)."""
+    return {"profiles": profiler.list()}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, api_key: str = Depends(verify_api_key)):
+    """Get a profile's metadata and its text summary (top functions by cumulative time)."""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@app.get("/profiles/{profile_id}/raw")
+async def download_profile(profile_id: str, api_key: str = Depends(verify_api_key)):
+    """Download the raw profile: a pstats file for cProfile, an HTML page for pyinstrument."""
+    path = profiler.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=path.rsplit("/", 1)[-1])
+
 if __name__ == "__main__":
     import uvicorn
     
     # Validate configuration
     Config.validate()
     
+    # Several workers are forked from one preloaded process by app.serve
+    if Config.API_WORKERS > 1:
+        import os
+        import sys
+        os.execv(sys.executable, [sys.executable, "-m", "app.serve"])
+    
     # Start the server
     uvicorn.run(
         "app.main:app",
         host=Config.API_HOST,
-        port=Config.API_PORT,
-        workers=Config.API_WORKERS
+        port=Config.API_PORT
     )
@@ -1,30 +1,218 @@
 import sqlite3
 import os
+import queue
+import threading
+import time
+import atexit
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from app.config import Config
+from app.metrics import stage_timer, timed
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'memory.sqlite3')
+DEFAULT_SESSION = "default"
 
-def _init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS memory (id INTEGER PRIMARY KEY, last_country TEXT)''')
-    # Garante que sempre exista uma linha
-    c.execute('''INSERT OR IGNORE INTO memory (id, last_country) VALUES (1, NULL)''')
-    conn.commit()
-    conn.close()
-
-_init_db()
-
-def set_last_country(country: str) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''UPDATE memory SET last_country = ? WHERE id = 1''', (country,))
-    conn.commit()
-    conn.close()
-
-def get_last_country() -> str:
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''SELECT last_country FROM memory WHERE id = 1''')
-    row = c.fetchone()
-    conn.close()
-    return row[0] if row and row[0] else None
+class ConnectionPool:
+    """
+    A small pool of SQLite connections opened in WAL mode.
+
+    A forked worker opens its own connections on first use; the ones it
+    inherited stay with the parent.
+    """
+
+    def __init__(self, db_path: str, size: int = 2):
+        self.db_path = db_path
+        self.size = size
+        self._inherited = None
+        self._open()
+        with self.connection() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_country TEXT,
+                updated_at REAL
+            )''')
+
+    def _open(self) -> None:
+        self._pid = os.getpid()
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(self.size):
+            self._pool.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if self._pid != os.getpid():
+            # Closing the inherited connections could disturb the parent's
+            # locks, so they are left unused
+            self._inherited = self._pool
+            self._open()
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+class SessionStore:
+    """
+    Per-session conversational memory.
+
+    Reads and writes go to an in-process LRU map whose entries expire after
+    `ttl` seconds without use. When a database path is given, writes are
+    queued and flushed to SQLite by a background thread (write-behind), and
+    sessions missing from memory are looked up there.
+
+    With `shared`, SQLite is the only copy: reads and writes go straight
+    through, so API worker processes see each other's sessions at once.
+    Every `cleanup_every` writes, rows older than `ttl` are deleted.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 1800,
+                 db_path: Optional[str] = None, flush_interval: float = 1.0,
+                 shared: bool = False, cleanup_every: int = 1000):
+        if shared and not db_path:
+            raise ValueError("A shared session store needs a database path")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.shared = shared
+        self.cleanup_every = cleanup_every
+        self._writes = 0
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._dirty: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._pool = ConnectionPool(db_path) if db_path else None
+        self._flush_event = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def get(self, session_id: str) -> Optional[str]:
+        if self.shared:
+            return self._load(session_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is not None:
+                country, touched = entry
+                if now - touched <= self.ttl:
+                    self._data[session_id] = (country, now)
+                    self._data.move_to_end(session_id)
+                    return country
+                del self._data[session_id]
+                return None
+        if self._pool is None:
+            return None
+        return self._load(session_id)
+
+    def set(self, session_id: str, country: str) -> None:
+        if self.shared:
+            self._write([(session_id, country, time.time())])
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._put(session_id, country, now)
+            if self._pool is not None:
+                self._dirty[session_id] = (country, time.time())
+        if self._pool is not None:
+            self._ensure_writer()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._dirty.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _put(self, session_id: str, country: str, now: float) -> None:
+        self._data[session_id] = (country, now)
+        self._data.move_to_end(session_id)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def _load(self, session_id: str) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                '''SELECT last_country, updated_at FROM sessions WHERE session_id = ?''',
+                (session_id,)
+            ).fetchone()
+        if not row or not row[0] or time.time() - row[1] > self.ttl:
+            return None
+        if self.shared:
+            return row[0]
+        with self._lock:
+            self._put(session_id, row[0], time.monotonic())
+        return row[0]
+
+    def flush(self) -> None:
+        """Write pending session updates to SQLite in one transaction."""
+        if self._pool is None:
+            return
+        with self._lock:
+            pending, self._dirty = self._dirty, {}
+        if not pending:
+            return
+        with stage_timer("memory_flush"):
+            self._write([(sid, country, ts) for sid, (country, ts) in pending.items()])
+
+    def _write(self, rows: List[Tuple[str, str, float]]) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    '''INSERT INTO sessions (session_id, last_country, updated_at) VALUES (?, ?, ?)
+                       ON CONFLICT(session_id) DO UPDATE SET
+                       last_country = excluded.last_country, updated_at = excluded.updated_at''',
+                    rows
+                )
+                self._writes += 1
+                if self._writes % self.cleanup_every == 0:
+                    conn.execute('''DELETE FROM sessions WHERE updated_at < ?''', (time.time() - self.ttl,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_loop, name="memory-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def _write_loop(self) -> None:
+        while not self._flush_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        self._flush_event.set()
+        self.flush()
+        if self._pool is not None:
+            self._pool.close()
+
+store = SessionStore(
+    max_size=Config.SESSION_MAX_SIZE,
+    ttl=Config.SESSION_TTL,
+    db_path=(Config.MEMORY_DB or DB_PATH) if Config.MEMORY_PERSIST or Config.MEMORY_SHARED else None,
+    flush_interval=Config.MEMORY_FLUSH_INTERVAL,
+    shared=Config.MEMORY_SHARED,
+)
+
+@timed("memory")
+def set_last_country(country: str, session_id: Optional[str] = None) -> None:
+    store.set(session_id or DEFAULT_SESSION, country)
+
+@timed("memory")
+def get_last_country(session_id: Optional[str] = None) -> str:
+    return store.get(session_id or DEFAULT_SESSION)
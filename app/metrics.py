@@ -0,0 +1,377 @@
+import bisect
+import fcntl
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond lookups to model inference
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus style.
+
+    observe() is a bisect and three increments under a lock. Thread-safe.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def cumulative(self) -> List[int]:
+        """Observations at or below each bucket bound, +Inf last."""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        out = []
+        for c in counts:
+            total += c
+            out.append(total)
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (0 when empty)."""
+        cumulative = self.cumulative()
+        if not cumulative[-1]:
+            return 0.0
+        rank = q * cumulative[-1]
+        i = bisect.bisect_left(cumulative, rank)
+        return self.buckets[i] if i < len(self.buckets) else float("inf")
+
+    def state(self) -> Tuple[List[int], float, int]:
+        """Per-bucket counts (not cumulative), sum and count."""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def add(self, counts: Sequence[int], total: float, count: int) -> None:
+        """Add another histogram's state, with the same buckets, to this one."""
+        with self._lock:
+            for i, c in enumerate(counts):
+                self._counts[i] += c
+            self._sum += total
+            self._count += count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self._sum = 0.0
+            self._count = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            count, total = self._count, self._sum
+        return {
+            "count": count,
+            "sum_s": total,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": self.quantile(0.5) * 1000,
+            "p95_ms": self.quantile(0.95) * 1000,
+            "p99_ms": self.quantile(0.99) * 1000,
+        }
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with labels, e.g. requests by endpoint and status."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [[list(labelvalues), value] for labelvalues, value in self._values.items()]
+        return {"type": "counter", "help": self.help, "labelnames": list(self.labelnames), "values": values}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_number(value)}")
+        return lines
+
+class HistogramFamily:
+    """Histograms sharing a name and buckets, one per combination of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labelvalues: str) -> Histogram:
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, Histogram(self.buckets))
+        return child
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            children = list(self._children.items())
+        return {"type": "histogram", "help": self.help, "labelnames": list(self.labelnames),
+                "buckets": list(self.buckets),
+                "children": [[list(labelvalues), *histogram.state()] for labelvalues, histogram in children]}
+
+    def reset(self) -> None:
+        # Children are zeroed in place: stage_timer and timed hold on to them
+        with self._lock:
+            children = list(self._children.values())
+        for histogram in children:
+            histogram.reset()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            children = sorted(self._children.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [_format_number(b) for b in self.buckets] + ["+Inf"]
+        for labelvalues, histogram in children:
+            for bound, count in zip(bounds, histogram.cumulative()):
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            snapshot = histogram.snapshot()
+            lines.append(f"{self.name}_sum{labels} {_format_number(snapshot['sum_s'])}")
+            lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+class Registry:
+    """The metrics /metrics exports, in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = ()) -> HistogramFamily:
+        with self._lock:
+            return self._metrics.setdefault(name, HistogramFamily(name, help, labelnames))
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        """Every metric's values, as JSON-serializable data for merge()."""
+        with self._lock:
+            metrics = list(self._metrics.items())
+        return {name: metric.state() for name, metric in metrics}
+
+    def merge(self, state: Dict[str, Dict[str, Any]]) -> None:
+        """Add the values of another registry's state() to this one."""
+        for name, metric in state.items():
+            if metric["type"] == "counter":
+                counter = self.counter(name, metric["help"], metric["labelnames"])
+                for labelvalues, value in metric["values"]:
+                    counter.inc(*labelvalues, amount=value)
+            else:
+                family = self.histogram(name, metric["help"], metric["labelnames"])
+                if list(family.buckets) != metric["buckets"]:
+                    continue
+                for labelvalues, counts, total, count in metric["children"]:
+                    family.labels(*labelvalues).add(counts, total, count)
+
+    def reset(self) -> None:
+        """Zero every metric, e.g. in a worker forked from a process that recorded some."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+class SharedMetrics:
+    """
+    Combines the metrics of several worker processes through a directory.
+
+    Each worker writes its registry's state to <directory>/<pid>.json every
+    `interval` seconds and when it stops, and render() sums the files of
+    all workers, so any worker can answer a scrape for all of them. The
+    supervisor folds the file of a worker that exited into archive.json, so
+    totals do not drop when workers are recycled.
+    """
+
+    ARCHIVE = "archive.json"
+
+    def __init__(self, directory: str, registry: Registry = registry):
+        self.directory = directory
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _locked(self, exclusive: bool):
+        # Readers and the archiver agree through a lock file, so a worker's
+        # counts are never read both from its file and from the archive
+        lock = open(self._path(".lock"), "a")
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return lock
+
+    def _read(self, name: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, name: str, state: Dict[str, Dict[str, Any]]) -> None:
+        tmp = self._path(f".{name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self._path(name))
+
+    def write(self) -> None:
+        """Write this process's metrics to its file."""
+        self._write(f"{os.getpid()}.json", self.registry.state())
+
+    def render(self) -> str:
+        """The metrics of every worker, summed, in the Prometheus text format."""
+        own = f"{os.getpid()}.json"
+        self.write()
+        combined = Registry()
+        # This process first, so metrics keep its registration order
+        combined.merge(self.registry.state())
+        with self._locked(exclusive=False):
+            for name in sorted(os.listdir(self.directory)):
+                if name.endswith(".json") and name != own:
+                    combined.merge(self._read(name))
+        return combined.render()
+
+    def archive(self, pid: int) -> None:
+        """Fold the file of a worker that exited into the archive."""
+        name = f"{pid}.json"
+        with self._locked(exclusive=True):
+            state = self._read(name)
+            if not state:
+                return
+            archive = Registry()
+            archive.merge(self._read(self.ARCHIVE))
+            archive.merge(state)
+            self._write(self.ARCHIVE, archive.state())
+            os.remove(self._path(name))
+
+    def clear(self) -> None:
+        """Remove every worker file and the archive."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(self._path(name))
+
+    def start(self, interval: float) -> None:
+        """Write this process's metrics every `interval` seconds in a background thread."""
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.write()
+                except OSError as e:
+                    logger.error("Could not write metrics: %s", e)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background writer and write the final values."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+STAGES = registry.histogram(
+    "agent_stage_duration_seconds",
+    "Time spent in each stage of answering (routing, country_lookup, math, memory, inference, ...)",
+    ("stage",),
+)
+
+class stage_timer:
+    """
+    Time a block as one stage observation:
+
+        with stage_timer("routing"):
+            r = route(question)
+    """
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, stage: str):
+        self._histogram = STAGES.labels(stage)
+
+    def __enter__(self) -> "stage_timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """Decorator timing every call of a function as one stage observation."""
+    histogram = STAGES.labels(stage)
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,90 @@
+import logging
+import os
+import time
+from typing import List, Tuple
+import numpy as np
+from app.config import Config
+
+RUNTIMES = ("fp32", "int8", "onnx")
+
+logger = logging.getLogger(__name__)
+
+def artifact_path(model_name: str, runtime: str) -> str:
+    """Where an exported model is cached, e.g. .model_cache/google--flan-t5-base-onnx."""
+    return os.path.join(Config.MODEL_ARTIFACT_DIR, f"{model_name.replace('/', '--')}-{runtime}")
+
+def configure_threads() -> None:
+    """Apply MODEL_INTRA_OP_THREADS / MODEL_INTER_OP_THREADS; 0 keeps torch's default."""
+    import torch
+    if Config.MODEL_INTRA_OP_THREADS > 0:
+        torch.set_num_threads(Config.MODEL_INTRA_OP_THREADS)
+    if Config.MODEL_INTER_OP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(Config.MODEL_INTER_OP_THREADS)
+        except RuntimeError:
+            # Only allowed before torch runs any parallel work
+            logger.warning("Inter-op threads already fixed; MODEL_INTER_OP_THREADS ignored")
+
+def _load_onnx(model_name: str):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise RuntimeError("MODEL_RUNTIME=onnx needs optimum[onnxruntime] installed")
+    path = artifact_path(model_name, "onnx")
+    if os.path.exists(os.path.join(path, "config.json")):
+        return ORTModelForSeq2SeqLM.from_pretrained(path)
+    logger.info("Exporting %s to ONNX in %s...", model_name, path)
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+    model.save_pretrained(path)
+    return model
+
+def load(model_name: str, runtime: str = "fp32") -> Tuple[object, object]:
+    """
+    Load a tokenizer and a seq2seq model for CPU inference.
+
+    Args:
+        model_name: Hugging Face model id or path
+        runtime: "fp32" (plain torch), "int8" (Linear layers dynamically
+            quantized to int8) or "onnx" (onnxruntime, exported once and
+            cached under MODEL_ARTIFACT_DIR)
+
+    Returns:
+        (tokenizer, model); model.generate() works the same for all runtimes
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown model runtime: {runtime}")
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    configure_threads()
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if runtime == "onnx":
+        return tokenizer, _load_onnx(model_name)
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name).to("cpu")
+    model.eval()
+    if runtime == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+def embed(tokenizer, model, texts: List[str]) -> np.ndarray:
+    """Mean-pooled encoder states, one float32 row per text."""
+    import torch
+    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+    # onnxruntime models expose the encoder as an attribute
+    encoder = model.get_encoder() if hasattr(model, "get_encoder") else model.encoder
+    with torch.inference_mode():
+        hidden = encoder(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1)
+    return pooled.float().numpy()
+
+def warm_up(tokenizer, model) -> float:
+    """Run one short generation so the first request does not pay for lazy setup; returns seconds."""
+    import torch
+    start = time.perf_counter()
+    inputs = tokenizer(["Answer the following question.\nQuestion: What is the capital of France?\nAnswer:"],
+                       return_tensors="pt")
+    with torch.inference_mode():
+        model.generate(**inputs, max_new_tokens=8)
+    return time.perf_counter() - start
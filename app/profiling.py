@@ -0,0 +1,198 @@
+import contextlib
+import contextvars
+import hmac
+import io
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.logs import request_id
+
+logger = logging.getLogger(__name__)
+
+# Set to "header" by ProfilingMiddleware for requests that asked to be
+# profiled; copied into the agent's worker thread
+_requested: contextvars.ContextVar = contextvars.ContextVar("profile_requested", default=None)
+
+# Microseconds since the epoch, then process id and a counter so ids from
+# several workers sharing the directory do not collide; sorts by age
+_PROFILE_ID = re.compile(r"^[0-9]{16}-[0-9a-f]{8}$")
+
+class RequestProfiler:
+    """
+    Profiles the agent call of selected requests and keeps the last
+    `max_profiles` profiles on disk, oldest removed first.
+
+    A call is profiled when its request carries `X-Profile: <token>` or,
+    with `sample_every`, once every that many calls. Unprofiled calls cost
+    a context variable lookup.
+
+    Only the thread running the call is profiled: time spent in tool pool or
+    generation threads shows up as waiting. A profile that cannot be saved
+    is logged and dropped; the call's result or exception is unchanged.
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 100, token: str = "",
+                 sample_every: int = 0, engine: str = "cprofile"):
+        """
+        Args:
+            directory: Where profiles are written
+            max_profiles: Profiles kept
+            token: X-Profile header value that asks for a profile; empty disables the header
+            sample_every: Profile one in this many calls; 0 never
+            engine: "cprofile" or "pyinstrument" (optional dependency)
+        """
+        if engine not in ("cprofile", "pyinstrument"):
+            raise ValueError(f"Unknown profiler: {engine}")
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.token = token
+        self.sample_every = sample_every
+        self.engine = engine
+        self._calls = itertools.count(1)
+        self._saved = itertools.count()
+        self._lock = threading.Lock()
+
+    def authorized(self, header: str) -> bool:
+        """Whether an X-Profile header value asks for a profile."""
+        return bool(self.token) and hmac.compare_digest(header, self.token)
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Call fn, under the profiler if its request asked for it or it is sampled."""
+        reason = _requested.get()
+        if reason is None:
+            if not self.sample_every or next(self._calls) % self.sample_every:
+                return fn(*args)
+            reason = "sampled"
+        if self.engine == "pyinstrument":
+            return self._call_pyinstrument(reason, fn, args)
+        return self._call_cprofile(reason, fn, args)
+
+    def _call_cprofile(self, reason: str, fn: Callable[..., Any], args: tuple) -> Any:
+        import cProfile
+        import pstats
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(fn, *args)
+        finally:
+            duration = time.perf_counter() - start
+            summary = io.StringIO()
+            pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(30)
+            self._save(reason, fn, args, duration, summary.getvalue(), "prof", profile.dump_stats)
+
+    def _call_pyinstrument(self, reason: str, fn: Callable[..., Any], args: tuple) -> Any:
+        from pyinstrument import Profiler
+
+        profiler = Profiler(async_mode="disabled")
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            return fn(*args)
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - start
+
+            def write_html(path: str) -> None:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+
+            self._save(reason, fn, args, duration, profiler.output_text(), "html", write_html)
+
+    def _save(self, reason: str, fn: Callable[..., Any], args: tuple, duration: float,
+              summary: str, extension: str, write: Callable[[str], None]) -> None:
+        profile_id = f"{time.time_ns() // 1000:016d}-{os.getpid() % 0x10000:04x}{next(self._saved) % 0x10000:04x}"
+        meta = {
+            "id": profile_id,
+            "request_id": request_id.get(),
+            "reason": reason,
+            "call": f"{getattr(fn, '__qualname__', fn)}{args!r}"[:200],
+            "duration_ms": round(duration * 1000, 3),
+            "created": time.time(),
+            "engine": self.engine,
+            "file": f"{profile_id}.{extension}",
+        }
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                write(os.path.join(self.directory, meta["file"]))
+                with open(os.path.join(self.directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+                    json.dump({**meta, "summary": summary}, f)
+                self._evict()
+            except OSError as e:
+                logger.error("Could not save profile %s: %s", profile_id, e)
+
+    def _evict(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_profiles)]:
+            for name in os.listdir(self.directory):
+                if name.startswith(profile_id + "."):
+                    # Another worker sharing the directory may have removed it
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(self.directory, name))
+
+    def _ids(self) -> List[str]:
+        """Stored profile ids, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory)
+                      if name.endswith(".json") and _PROFILE_ID.match(name[:-5]))
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of the stored profiles, newest first."""
+        out = []
+        for profile_id in reversed(self._ids()):
+            profile = self.get(profile_id)
+            if profile is not None:
+                profile.pop("summary")
+                out.append(profile)
+        return out
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """A profile's metadata and text summary, or None."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{profile_id}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """The raw profile file (.prof for pstats/snakeviz, .html for pyinstrument), or None."""
+        profile = self.get(profile_id)
+        if profile is None:
+            return None
+        path = os.path.join(self.directory, profile["file"])
+        return path if os.path.exists(path) else None
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that marks requests carrying a valid X-Profile header
+    for RequestProfiler. A plain pass-through without a token configured.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.token:
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                if self.profiler.authorized(value.decode("latin-1")):
+                    token = _requested.set("header")
+                    try:
+                        await self.app(scope, receive, send)
+                    finally:
+                        _requested.reset(token)
+                    return
+                break
+        await self.app(scope, receive, send)
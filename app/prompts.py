@@ -0,0 +1,2 @@
+# Prompt for questions no rule answers; flan-t5 follows plain instructions
+GENERAL_QUESTION = "Answer the following question in one or two sentences.\nQuestion: {question}\nAnswer:"
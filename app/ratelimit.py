@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+def _slide(state: List[int], window_index: int) -> None:
+    """Roll a [window, current, previous] state forward to window_index."""
+    if state[0] == window_index:
+        return
+    state[2] = state[1] if state[0] == window_index - 1 else 0
+    state[1] = 0
+    state[0] = window_index
+
+def _estimate(state: List[int], elapsed: float) -> float:
+    # Requests in the last `window` seconds, assuming the previous window's
+    # requests were spread evenly over it
+    return state[2] * (1 - elapsed) + state[1]
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window rate limiter with constant memory and work per key.
+
+    Each key keeps two counters (current and previous fixed window) instead
+    of one timestamp per request. Keys idle for more than two windows are
+    dropped, and at most `max_keys` are kept (least recently seen go first).
+    """
+
+    def __init__(self, limit: int, window: float = 60, max_keys: int = 100000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def allow(self, key: str, now: float = None) -> bool:
+        """Count a request for key; return False if it exceeds the limit."""
+        now = time.time() if now is None else now
+        window_index, elapsed = divmod(now / self.window, 1)
+        window_index = int(window_index)
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = [window_index, 0, 0]
+                self._keys[key] = state
+            else:
+                self._keys.move_to_end(key)
+                _slide(state, window_index)
+            self._evict(window_index)
+
+            if _estimate(state, elapsed) >= self.limit:
+                self.rejected += 1
+                return False
+            state[1] += 1
+            return True
+
+    def _evict(self, window_index: int) -> None:
+        keys = self._keys
+        while len(keys) > self.max_keys:
+            keys.popitem(last=False)
+        # The front is the least recently seen key; stop at the first live one
+        while keys:
+            oldest = next(iter(keys.values()))
+            if oldest[0] >= window_index - 1:
+                break
+            keys.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+class SQLiteSlidingWindowLimiter:
+    """
+    The same sliding-window algorithm with counters kept in a SQLite file, so
+    every worker process on the host shares one limit per key.
+    """
+
+    def __init__(self, limit: int, window: float = 60, db_path: str = None,
+                 cleanup_every: int = 1000):
+        self.limit = limit
+        self.window = window
+        self.db_path = db_path or os.path.join(tempfile.gettempdir(), "agent_ratelimit.sqlite3")
+        self.cleanup_every = cleanup_every
+        self._local = threading.local()
+        self._calls = 0
+        self.rejected = 0
+        conn = self._connection()
+        conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            window_index INTEGER,
+            current INTEGER,
+            previous INTEGER
+        )''')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A forked worker must not use the connection it inherited
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def allow(self, key: str, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        window_index, elapsed = divmod(now / self.window, 1)
+        window_index = int(window_index)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                '''SELECT window_index, current, previous FROM rate_limits WHERE key = ?''', (key,)
+            ).fetchone()
+            state = list(row) if row else [window_index, 0, 0]
+            _slide(state, window_index)
+            allowed = _estimate(state, elapsed) < self.limit
+            if allowed:
+                state[1] += 1
+            conn.execute(
+                '''INSERT INTO rate_limits (key, window_index, current, previous) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                   window_index = excluded.window_index, current = excluded.current, previous = excluded.previous''',
+                (key, *state)
+            )
+            self._calls += 1
+            if self._calls % self.cleanup_every == 0:
+                conn.execute('''DELETE FROM rate_limits WHERE window_index < ?''', (window_index - 1,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not allowed:
+            self.rejected += 1
+        return allowed
+
+    def __len__(self) -> int:
+        return self._connection().execute('''SELECT COUNT(*) FROM rate_limits''').fetchone()[0]
+
+    def reset(self) -> None:
+        self._connection().execute('''DELETE FROM rate_limits''')
+
+def create_limiter(backend: str, limit: int, window: float, max_keys: int, db_path: str = None):
+    """Build the limiter selected by RATE_LIMIT_BACKEND ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        return SQLiteSlidingWindowLimiter(limit, window, db_path)
+    if backend == "memory":
+        return SlidingWindowLimiter(limit, window, max_keys)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
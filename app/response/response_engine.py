@@ -1,124 +1,196 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from typing import Dict, List, Optional
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Mapping, Optional
+from app.config import Config
 import json
 import os
+import re
+import threading
+
+_GREETING = re.compile(r"^\s*(hello|hi|hey|good (morning|afternoon|evening))\b", re.IGNORECASE)
+_FAREWELL = re.compile(r"^\s*(bye|goodbye|see you|farewell)\b", re.IGNORECASE)
+
+# History key for calls without a session id
+DEFAULT_SESSION = "default"
 
 class ResponseEngine:
-    def __init__(self, model_name: str = "gpt2-medium"):
+    """
+    Template-based responses with per-session history.
+
+    Templates are read from templates.json once at construction and
+    rendered with str.format_map. The language model is only loaded when
+    `model` or `tokenizer` is first used, since no response path needs it.
+    History keeps the last RESPONSE_HISTORY_SIZE interactions of each of
+    the SESSION_MAX_SIZE most recent sessions. Safe to share across threads.
+    """
+
+    def __init__(self, model_name: str = "gpt2-medium", load_model: bool = False):
         """
-        Initialize the response engine with a language model.
-        
+        Initialize the response engine.
+
         Args:
             model_name: Name of the pre-trained model to use
+            load_model: Load the model now instead of on first use
         """
         self.model_name = model_name
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
-        
+        self._tokenizer = None
+        self._model = None
+        self._model_lock = threading.Lock()
+
         # Load response templates
         self.templates = self._load_templates()
-        
-        # Initialize conversation history
-        self.conversation_history: List[Dict] = []
-        
+        self._formatters: Dict[str, Dict[str, Callable[[Mapping], str]]] = {
+            template_type: {key: text.format_map for key, text in templates.items()}
+            for template_type, templates in self.templates.items()
+        }
+
+        # Conversation history per session, least recently used first
+        self._history: "OrderedDict[str, deque]" = OrderedDict()
+        self._history_lock = threading.Lock()
+
+        if load_model:
+            self._load_model()
+
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def tokenizer(self):
+        self._load_model()
+        return self._tokenizer
+
+    @property
+    def model(self):
+        self._load_model()
+        return self._model
+
+    def _load_model(self) -> None:
+        """Load the tokenizer and model once; transformers is only imported here."""
+        if self._model is not None:
+            return
+        with self._model_lock:
+            if self._model is not None:
+                return
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self._model = AutoModelForCausalLM.from_pretrained(self.model_name)
+
     def _load_templates(self) -> Dict:
         """Load response templates from JSON file."""
         template_path = os.path.join(os.path.dirname(__file__), 'templates.json')
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return self._create_default_templates()
-            
-    def _create_default_templates(self) -> Dict:
-        """Create default response templates."""
-        return {
-            "math": {
-                "success": "The result of {expression} is {result}.",
-                "error": "I couldn't calculate {expression}. {error}"
-            },
-            "country": {
-                "success": "{country} has a {property} of {value}.",
-                "error": "I couldn't find information about {country}."
-            },
-            "general": {
-                "greeting": "Hello! How can I help you today?",
-                "farewell": "Goodbye! Have a great day!",
-                "unknown": "I'm not sure about that. Could you rephrase your question?"
-            }
-        }
-        
-    def generate_response(self, 
-                         question: str, 
+        with open(template_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def generate_response(self,
+                         question: str,
                          context: Dict,
-                         template_type: str = "general") -> str:
+                         template_type: str = "general",
+                         session_id: str = None) -> str:
         """
         Generate a natural language response based on the question and context.
-        
+
         Args:
             question: The user's question
             context: Additional context for the response
             template_type: Type of response template to use
-            
+            session_id: Conversation whose history records the interaction
+
         Returns:
             A natural language response
         """
         # Add to conversation history
-        self.conversation_history.append({
+        self._remember(session_id, {
             "question": question,
             "context": context,
             "type": template_type
         })
-        
+
         # Get appropriate template
-        template = self._get_template(template_type, context)
-        
+        formatter = self._get_formatter(template_type, question, context)
+
         # Generate response
         if template_type == "math":
-            return self._format_math_response(template, context)
+            return self._format_math_response(formatter, context)
         elif template_type == "country":
-            return self._format_country_response(template, context)
+            return self._format_country_response(formatter, context)
         else:
-            return self._format_general_response(template, context)
-            
-    def _get_template(self, template_type: str, context: Dict) -> str:
-        """Get the appropriate response template."""
-        templates = self.templates.get(template_type, {})
-        return templates.get("success" if "error" not in context else "error", 
-                           self.templates["general"]["unknown"])
-                           
-    def _format_math_response(self, template: str, context: Dict) -> str:
+            return self._format_general_response(formatter, context)
+
+    def render(self, template_type: str, name: str, **values) -> str:
+        """
+        Render one named template without recording history.
+
+        Args:
+            template_type: Template group, e.g. "answer"
+            name: Template within the group, e.g. "capital"
+            **values: The template's fields
+
+        Returns:
+            The rendered text
+        """
+        return self._formatters[template_type][name](values)
+
+    def _get_formatter(self, template_type: str, question: str, context: Dict) -> Callable[[Mapping], str]:
+        """Get the formatter of the template for a response."""
+        if template_type not in ("math", "country"):
+            general = self._formatters["general"]
+            if _GREETING.match(question) and "greeting" in general:
+                return general["greeting"]
+            if _FAREWELL.match(question) and "farewell" in general:
+                return general["farewell"]
+        formatters = self._formatters.get(template_type, {})
+        return formatters.get("success" if "error" not in context else "error",
+                              self._formatters["general"]["unknown"])
+
+    def _format_math_response(self, formatter: Callable[[Mapping], str], context: Dict) -> str:
         """Format a mathematical response."""
         if "error" in context:
-            return template.format(
-                expression=context.get("expression", "the expression"),
-                error=context["error"]
-            )
-            
-        return template.format(
-            expression=context.get("expression", "the calculation"),
-            result=context.get("result", "the result")
-        )
-        
-    def _format_country_response(self, template: str, context: Dict) -> str:
+            return formatter({
+                "expression": context.get("expression", "the expression"),
+                "error": context["error"]
+            })
+
+        return formatter({
+            "expression": context.get("expression", "the calculation"),
+            "result": context.get("result", "the result")
+        })
+
+    def _format_country_response(self, formatter: Callable[[Mapping], str], context: Dict) -> str:
         """Format a country information response."""
         if "error" in context:
-            return template.format(country=context.get("country", "that country"))
-            
-        return template.format(
-            country=context.get("country", "The country"),
-            property=context.get("property", "information"),
-            value=context.get("value", "the value")
-        )
-        
-    def _format_general_response(self, template: str, context: Dict) -> str:
+            return formatter({"country": context.get("country", "that country")})
+
+        return formatter({
+            "country": context.get("country", "The country"),
+            "property": context.get("property", "information"),
+            "value": context.get("value", "the value")
+        })
+
+    def _format_general_response(self, formatter: Callable[[Mapping], str], context: Dict) -> str:
         """Format a general response."""
-        return template.format(**context)
-        
-    def get_conversation_history(self) -> List[Dict]:
-        """Get the conversation history."""
-        return self.conversation_history
-        
-    def clear_history(self) -> None:
-        """Clear the conversation history."""
-        self.conversation_history = [] 
\ No newline at end of file
+        return formatter(context)
+
+    def _remember(self, session_id: Optional[str], entry: Dict) -> None:
+        key = session_id or DEFAULT_SESSION
+        with self._history_lock:
+            history = self._history.get(key)
+            if history is None:
+                history = self._history[key] = deque(maxlen=Config.RESPONSE_HISTORY_SIZE)
+                while len(self._history) > Config.SESSION_MAX_SIZE:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(key)
+            history.append(entry)
+
+    def get_conversation_history(self, session_id: str = None) -> List[Dict]:
+        """Get a copy of a session's recent history, oldest first."""
+        with self._history_lock:
+            return list(self._history.get(session_id or DEFAULT_SESSION, ()))
+
+    def clear_history(self, session_id: str = None) -> None:
+        """Clear one session's history, or every session's when none is given."""
+        with self._history_lock:
+            if session_id is None:
+                self._history.clear()
+            else:
+                self._history.pop(session_id, None)
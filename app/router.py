@@ -0,0 +1,283 @@
+from app.countries import knowledge_base
+from typing import List, NamedTuple, Optional, Set, Tuple
+import re
+
+# Intent names
+AREA_MULT = "area_mult"
+DENSITY = "density"
+PRONOUN = "pronoun"
+INFO = "info"
+MATH = "math"
+SMALLTALK = "smalltalk"
+FALLBACK = "fallback"
+
+
+class Route(NamedTuple):
+    """Result of classifying a question."""
+    intent: str
+    country: Optional[str] = None  # canonical name; the agent fetches its data through the country tool
+    topic: Optional[str] = None
+    multiplier: Optional[int] = None
+    expression: Optional[str] = None
+    confidence: float = 1.0  # below 1.0 when the country name was a near miss
+    text: Optional[str] = None  # the sub-question, for parts of a compound question no rule answers
+
+# Single scan over the question that tells which pattern families can match.
+# Each family below is only tried when its trigger was seen, so questions that
+# match nothing pay for one pass instead of the whole cascade.
+_TRIGGERS = re.compile(
+    r"(?P<mult>multiplied\s+by\s+\d+|multiply\b.*?\bby\s+\d+|times\s+\d+)"
+    r"|(?P<pronoun>its capital|its population|its area|what about its|and the area)"
+    r"|(?P<dens>dens)"
+    r"|(?P<info>capital|population|area|how many people live in|how big is)"
+    r"|(?P<who>who are you)"
+    r"|(?P<what>what can you do)"
+    r"|(?P<how>how are you)"
+)
+
+_FOLLOW_UP = re.compile(r"its capital|its population|its area|what about its|and the area")
+
+_MULTIPLIER = re.compile(r"(?:multiplied\s+|multiply\b.*?\b)by\s+(\d+)|times\s+(\d+)")
+
+_AREA_MULT_PATTERNS = [re.compile(p) for p in (
+    r"area of ([a-zA-Z\s]+?)(?=\s+(?:multiplied|multiply|times)\s+(?:by\s+)?\d+)",
+    r"([a-zA-Z\s]+?)'s?\s+area(?=\s+(?:multiplied|multiply|times)\s+(?:by\s+)?\d+)",
+    r"multiply the area of ([a-zA-Z\s]+?)(?=\s+(?:by\s+)?\d+)",
+    r"([a-zA-Z\s]+?)'s?\s+area(?=\s+times\s+\d+)",
+    r"area of ([a-zA-Z\s]+?)(?=\s+times\s+\d+)",
+)]
+
+_DENSITY_PATTERNS = [re.compile(p) for p in (
+    r"population density of ([a-zA-Z\s]+)",
+    r"density of ([a-zA-Z\s]+)",
+    r"([a-zA-Z\s]+)'s population density",
+    r"how dense is ([a-zA-Z\s]+)'s population",
+)]
+
+# (pattern, topic group or fixed topic, country group)
+_INFO_PATTERNS = [(re.compile(p), topic, country) for p, topic, country in (
+    (r"(capital|population|area) of ([a-zA-Z\s]+)", 1, 2),
+    (r"([a-zA-Z\s]+?)'s (capital|population|area)", 2, 1),
+    (r"([a-zA-Z\s]+) (capital|population|area)", 2, 1),
+    (r"what is the (capital|population|area) of ([a-zA-Z\s]+)", 1, 2),
+    (r"([a-zA-Z\s]+) (?:has )?(?:a )?(capital|population|area)", 2, 1),
+    (r"how many people live in ([a-zA-Z\s]+)[\?\.!]*", "population", 1),
+    (r"how big is ([a-zA-Z\s]+)[\?\.!]*", "area", 1),
+    (r"what is ([a-zA-Z\s]+)'s (capital|population|area)", 2, 1),
+)]
+
+_MATH = re.compile(r"(\d+\s*[\+\-\*/\^]\s*\d+)")
+
+# Where a compound question may split into sub-questions
+_SEPARATOR = re.compile(r"\s*[?;]\s+|\s*,\s+(?:and\s+)?|\s+(?:and|&)\s+")
+_LEADING_AND = re.compile(r"^(?:and|also)\s+", re.IGNORECASE)
+_TOPIC_ONLY = re.compile(r"^(?:what(?:'s| is| about)\s+)?(?:the\s+)?(capital|population|area)$")
+_COMPARISON = re.compile(r"\b(?:compare|comparison|versus|vs)\b")
+
+_POSSESSIVE = re.compile(r"'s$")
+_LEADING_WORDS = re.compile(r"^(what is|how many|how big|how dense|the|a|an)\s+")
+_TRAILING_WORD = re.compile(r"\s+(capital|population|area|times|multiplied|multiply|by|in|has|a|an)$")
+_TRAILING_PUNCT = re.compile(r"[\?\.,!]+$")
+
+def clean_country_name(name: str) -> str:
+    """Strip possessives, filler words and punctuation from a captured country name."""
+    name = _POSSESSIVE.sub("", name)
+    name = _LEADING_WORDS.sub("", name)
+    name = _TRAILING_WORD.sub("", name)
+    name = _TRAILING_PUNCT.sub("", name)
+    return name.strip(" .!?").title()
+
+def _lookup(raw: str) -> Tuple[Optional[str], float]:
+    """(canonical country name or None, confidence) for a captured country name."""
+    country = clean_country_name(raw)
+    record = knowledge_base.lookup(country)
+    if record is not None:
+        return record.name, 1.0
+    # The capture may hold more than the name ("beautiful brazil")
+    mentions = knowledge_base.mentions(raw)
+    if mentions:
+        return mentions[0].country.name, 1.0
+    # ...or a typo ("germny")
+    resolution = knowledge_base.resolve(country)
+    if resolution is None:
+        return None, 0.0
+    return resolution.country.name, resolution.confidence
+
+def _scan(q: str) -> Set[str]:
+    return {m.lastgroup for m in _TRIGGERS.finditer(q)}
+
+def _topic(q: str) -> Optional[str]:
+    for topic in ("capital", "population", "area"):
+        if topic in q:
+            return topic
+    return None
+
+def is_follow_up(question: str) -> bool:
+    """Whether the answer may depend on the previously mentioned country."""
+    return _FOLLOW_UP.search(question.strip().lower()) is not None
+
+def route(question: str) -> Route:
+    """
+    Classify a question into a single intent.
+
+    Families are tried in the same order as the original cascade (area
+    multiplication, density, pronoun follow-up, info, math, smalltalk,
+    fallback), but only those whose trigger words appear in the question.
+
+    Args:
+        question: The raw user question
+
+    Returns:
+        Route: The intent and the values extracted for it
+    """
+    q = question.strip().lower()
+    triggers = _scan(q)
+
+    # 1. Área multiplicada
+    if "mult" in triggers:
+        mult_match = _MULTIPLIER.search(q)
+        for pat in _AREA_MULT_PATTERNS:
+            m = pat.search(q)
+            if m:
+                country, confidence = _lookup(m.group(1))
+                if country is not None:
+                    multiplier = int(mult_match.group(1) or mult_match.group(2))
+                    return Route(AREA_MULT, country, "area", multiplier, confidence=confidence)
+
+    # 2. Densidade populacional
+    if "dens" in triggers:
+        for pat in _DENSITY_PATTERNS:
+            m = pat.search(q)
+            if m:
+                country, confidence = _lookup(m.group(1))
+                if country is not None:
+                    return Route(DENSITY, country, "density", confidence=confidence)
+
+    # 3. Perguntas com pronomes
+    if "pronoun" in triggers:
+        return Route(PRONOUN, topic=_topic(q))
+
+    # 4. Capital, população, área
+    if "info" in triggers:
+        for pat, topic, country_idx in _INFO_PATTERNS:
+            m = pat.search(q)
+            if m:
+                country, confidence = _lookup(m.group(country_idx))
+                if country is not None:
+                    if isinstance(topic, int):
+                        topic = m.group(topic)
+                    return Route(INFO, country, topic, confidence=confidence)
+
+    # 5. Matemática simples
+    m = _MATH.search(question)
+    if m:
+        return Route(MATH, expression=m.group(1))
+
+    # 6. Perguntas gerais
+    for key in ("who", "what", "how"):
+        if key in triggers:
+            return Route(SMALLTALK, topic=key)
+
+    # Fallback: país conhecido mencionado na frase
+    mentions = knowledge_base.mentions(q)
+    if mentions:
+        return Route(FALLBACK, mentions[0].country.name, _topic(q))
+
+    return Route(FALLBACK)
+
+def is_comparison(question: str) -> bool:
+    """Whether the question asks to compare its parts ("Compare the area of Brazil and Canada")."""
+    return _COMPARISON.search(question.lower()) is not None
+
+def _split(q: str, text: str) -> List[str]:
+    """Parts of `text`, split where its lowercase form `q` has separators."""
+    # A separator inside a country name ("bosnia and herzegovina") is not one
+    names = [(m.start, m.end) for m in knowledge_base.mentions(q)]
+    parts, start = [], 0
+    for m in _SEPARATOR.finditer(q):
+        if any(s < m.end() and m.start() < e for s, e in names):
+            continue
+        parts.append(text[start:m.start()])
+        start = m.end()
+    parts.append(text[start:])
+    parts = (_LEADING_AND.sub("", part.strip(" ?!.")) for part in parts)
+    return [part for part in parts if part]
+
+def _country_only(part: str, r: Route) -> bool:
+    return r.intent == FALLBACK and r.country is not None and r.topic is None \
+        and knowledge_base.lookup(clean_country_name(part)) is not None
+
+def _topic_only(part: str, r: Route) -> Optional[str]:
+    """The topic of a part that names no country ("the population", "its area")."""
+    if r.intent == PRONOUN:
+        return r.topic
+    if r.intent == FALLBACK and r.country is None:
+        m = _TOPIC_ONLY.match(part.lower())
+        return m.group(1) if m else None
+    return None
+
+def _borrow(part: str, r: Route, other: Route, before: bool) -> Route:
+    """Fill in what a part leaves out from the part next to it."""
+    if _country_only(part, r) and other.intent in (INFO, DENSITY, AREA_MULT):
+        # "the capital of france and japan"
+        return other._replace(country=r.country, confidence=r.confidence)
+    topic = _topic_only(part, r)
+    if topic is not None:
+        if r.intent == PRONOUN and not before:
+            return r  # "its" refers back, never forward
+        if other.intent == PRONOUN and other.topic:
+            # "its capital and population"
+            return Route(PRONOUN, topic=topic)
+        if other.country is not None:
+            # "the capital and population of france", "... of france and its area"
+            return Route(INFO, other.country, topic, confidence=other.confidence)
+    return r
+
+def _complete(r: Route) -> bool:
+    """Whether a part can be answered on its own."""
+    if r.intent == PRONOUN:
+        return r.topic is not None
+    if r.intent == FALLBACK:
+        return r.country is not None
+    return True
+
+def decompose(question: str, max_parts: int = 4) -> List[Route]:
+    """
+    Split a compound question into one route per sub-question.
+
+    "What is the capital of France and the population of Japan?" gives two
+    INFO routes. A part that names only a country or only a topic takes the
+    other from the part next to it ("the capital of France and Japan", "the
+    capital and population of France"), and "its" in a later part means the
+    country of the part before. Parts no rule answers become FALLBACK
+    routes carrying their own text ("Who wrote Hamlet and what is the
+    capital of France?"). A question where no part is answered by a rule,
+    or with more than `max_parts` parts, is routed whole.
+
+    Args:
+        question: The raw user question
+        max_parts: Most sub-questions answered separately
+
+    Returns:
+        List[Route]: One route, unless the question is compound
+    """
+    text = question.strip()
+    q = text.lower()
+    if _SEPARATOR.search(q) is None:
+        return [route(question)]
+    # Lowercasing may change the length of some non-ASCII text
+    parts = _split(q, text if len(text) == len(q) else q)
+    if not 2 <= len(parts) <= max_parts:
+        return [route(question)]
+
+    routed: List[Tuple[str, Route]] = [(part, route(part)) for part in parts]
+    for i in range(1, len(routed)):
+        part, r = routed[i]
+        routed[i] = part, _borrow(part, r, routed[i - 1][1], True)
+    for i in range(len(routed) - 2, -1, -1):
+        part, r = routed[i]
+        routed[i] = part, _borrow(part, r, routed[i + 1][1], False)
+
+    if not any(_complete(r) for _, r in routed):
+        return [route(question)]
+    return [r if _complete(r) else Route(FALLBACK, text=part) for part, r in routed]
@@ -0,0 +1,262 @@
+"""
+Production serving: several API worker processes forked from one preloaded
+parent.
+
+The parent imports the app and builds everything read-only up front (the
+country knowledge base and its fuzzy index, the router, the response
+templates and, unless the runtime is ONNX, the model weights),
+freezes the garbage collector and then forks. The workers share those pages
+copy-on-write instead of each loading its own copy. Per-user state that has
+to agree across workers (rate-limit counters, conversation memory) moves to
+SQLite, unless set explicitly in the environment. Each worker writes its
+metrics to a shared directory, so /metrics reports the sum over all workers
+whichever one answers the scrape.
+
+Workers that exit (after API_MAX_REQUESTS requests, or a crash) are replaced
+from the same preloaded image. SIGHUP replaces every worker one by one
+without closing the listening socket; SIGTERM or SIGINT drains them and
+stops.
+
+Usage:
+    API_WORKERS=4 python -m app.serve
+"""
+import gc
+import logging
+import os
+import random
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from typing import Dict, Optional
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+def _use_shared_state() -> None:
+    # Only defaults: an explicit environment setting wins
+    if "RATE_LIMIT_BACKEND" not in os.environ:
+        Config.RATE_LIMIT_BACKEND = "sqlite"
+    if "MEMORY_SHARED" not in os.environ:
+        Config.MEMORY_SHARED = True
+    if not Config.METRICS_DIR:
+        Config.METRICS_DIR = tempfile.mkdtemp(prefix="agent-metrics-")
+
+def preload() -> bool:
+    """
+    Import the app and build its read-only data before forking.
+
+    Returns:
+        bool: Whether workers should warm the model up after the fork
+    """
+    warm_up = Config.MODEL_WARMUP
+    # A forward pass starts torch's thread pools, which do not survive a fork
+    Config.MODEL_WARMUP = False
+
+    from app import main
+    from app.countries import knowledge_base
+
+    # onnxruntime sessions own thread pools too, so workers load those themselves
+    if "MODEL_PRELOAD" not in os.environ and Config.MODEL_RUNTIME != "onnx":
+        # As on a single process's first question, a model that fails to
+        # load disables generation instead of stopping the server
+        main.agent._model_available()
+
+    knowledge_base.build_index()
+
+    # Objects that exist now are never collected, so the collector does not
+    # write to (and un-share) the pages holding them
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded the app (model loaded: %s)", main.agent.model_loaded)
+    return warm_up
+
+def _listen(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+class _RequestLimit:
+    """
+    ASGI wrapper that asks the worker's server to shut down gracefully after
+    `limit` requests. uvicorn's own limit_max_requests undercounts requests
+    that pass through the app's http middlewares.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.limit = 0
+        self.server = None
+        self.count = 0
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+        if scope["type"] == "http" and self.server is not None:
+            self.count += 1
+            if self.count >= self.limit:
+                self.server.should_exit = True
+
+def _run_worker(sock: socket.socket, warm_up: bool) -> None:
+    import uvicorn
+    from app import main, model_runtime
+    from app.logs import shutdown_logging
+    from app.memory import store
+    from app.metrics import registry
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(sig, signal.SIG_DFL)
+    random.seed()
+    # Anything recorded before the fork is not this worker's
+    registry.reset()
+    if main.shared_metrics is not None:
+        main.shared_metrics.start(Config.METRICS_WRITE_INTERVAL)
+
+    agent = main.agent
+    if warm_up and agent.model_enabled:
+        try:
+            logger.info("Worker %d model warm-up took %.2fs", os.getpid(),
+                        model_runtime.warm_up(agent.tokenizer, agent.model))
+        except Exception as e:
+            logger.error("Worker %d could not warm the model up: %s", os.getpid(), e)
+
+    app = _RequestLimit(main.app)
+    config = uvicorn.Config(
+        app,
+        timeout_graceful_shutdown=Config.API_GRACEFUL_TIMEOUT,
+        log_config=None,  # records go through app.logs like everything else
+        access_log=False,
+    )
+    server = uvicorn.Server(config)
+    if Config.API_MAX_REQUESTS:
+        app.limit = Config.API_MAX_REQUESTS + random.randint(0, Config.API_MAX_REQUESTS_JITTER)
+        app.server = server
+    try:
+        server.run(sockets=[sock])
+    finally:
+        # The worker ends with os._exit, which skips atexit handlers
+        store.flush()
+        if main.shared_metrics is not None:
+            main.shared_metrics.stop()
+        shutdown_logging()
+
+class Supervisor:
+    """Forks the workers and replaces any that exit until asked to stop."""
+
+    def __init__(self, sock: socket.socket, workers: int, warm_up: bool, metrics=None):
+        self.sock = sock
+        self.workers = workers
+        self.warm_up = warm_up
+        self.metrics = metrics  # SharedMetrics the workers write to
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self._stopping = False
+        self._reload = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                _run_worker(self.sock, self.warm_up)
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                status = 1
+            finally:
+                os._exit(status)
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._recycle)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            if self._reload:
+                self._reload = False
+                self._replace_all()
+            pid = self._reap()
+            if pid is None:
+                time.sleep(0.1)
+                continue
+            started = self.children.pop(pid)
+            self._archive(pid)
+            if self._stopping:
+                continue
+            if time.monotonic() - started < 1:
+                # Dying right away will not be fixed by restarting at full speed
+                time.sleep(1)
+            logger.info("Worker %d exited, starting a new one", pid)
+            self.spawn()
+
+    def _reap(self) -> Optional[int]:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return None
+        return pid or None
+
+    def _replace_all(self) -> None:
+        # New workers start before the old ones stop, so capacity never drops
+        for pid in list(self.children):
+            self.spawn()
+            self.children.pop(pid, None)
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+            self._archive(pid)
+
+    def _archive(self, pid: int) -> None:
+        if self.metrics is not None:
+            try:
+                self.metrics.archive(pid)
+            except OSError as e:
+                logger.error("Could not archive the metrics of worker %d: %s", pid, e)
+
+    def _stop(self, signum, frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _recycle(self, signum, frame) -> None:
+        self._reload = True
+
+def serve(workers: int = None, host: str = None, port: int = None) -> None:
+    """
+    Preload the app, bind the port and run `workers` forked worker processes.
+
+    Args:
+        workers: Worker processes (default API_WORKERS)
+        host: Address to listen on (default API_HOST)
+        port: Port to listen on (default API_PORT)
+    """
+    workers = workers or Config.API_WORKERS
+    own_metrics_dir = workers > 1 and not Config.METRICS_DIR
+    if workers > 1:
+        _use_shared_state()
+    Config.validate()
+    warm_up = preload()
+    from app import main
+
+    metrics = main.shared_metrics
+    if metrics is not None:
+        # Counts left by an earlier run are not this one's
+        metrics.clear()
+    sock = _listen(host or Config.API_HOST, port or Config.API_PORT)
+    try:
+        Supervisor(sock, workers, warm_up, metrics).run()
+    finally:
+        if own_metrics_dir:
+            shutil.rmtree(Config.METRICS_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    serve()
@@ -1,48 +1,40 @@
 import requests
 import re
+from app.calculators.safe_eval import safe_eval
+from app.countries import knowledge_base
+from app.metrics import timed
 
 def calculate(expression: str) -> str:
     """Calculate the result of a mathematical expression."""
     try:
         # Replace ^ with ** for exponentiation
         expression = expression.replace('^', '**')
-        result = eval(expression)
+        result = safe_eval(expression)
         return str(result)
     except Exception as e:
         return f"Sorry, I couldn't calculate that: {str(e)}"
 
-# Basic country information database
-COUNTRY_DATA = {
-    "Brazil": {
-        "capital": "Brasília",
-        "population": 214300000,
-        "area": 8515770
-    },
-    "Japan": {
-        "capital": "Tokyo",
-        "population": 125700000,
-        "area": 377975
-    },
-    "France": {
-        "capital": "Paris",
-        "population": 67390000,
-        "area": 551695
-    },
-    "Canada": {
-        "capital": "Ottawa",
-        "population": 38250000,
-        "area": 9984670
-    },
-    "Germany": {
-        "capital": "Berlin",
-        "population": 83240000,
-        "area": 357022
-    }
-}
+# Country information, loaded from app/data/countries.csv. Maps any name or
+# alias to {"capital", "population", "area"}.
+COUNTRY_DATA = knowledge_base
 
+# Bumped whenever COUNTRY_DATA changes so cached answers can be invalidated
+_data_version = 0
+
+def data_version() -> int:
+    """Return the current version of the country data."""
+    return _data_version
+
+def update_country_info(country: str, info: dict) -> None:
+    """Add or replace a country's information."""
+    global _data_version
+    knowledge_base.update(country, info)
+    _data_version += 1
+
+@timed("country_lookup")
 def get_country_info(country: str) -> dict:
-    """Get information about a country."""
-    country = country.strip().title()
-    if country in COUNTRY_DATA:
-        return COUNTRY_DATA[country]
-    return {"error": f"Country {country} not found"}
+    """Get information about a country, by name or alias."""
+    record = knowledge_base.lookup(country)
+    if record is not None:
+        return record.as_dict()
+    return {"error": f"Country {country.strip().title()} not found"}
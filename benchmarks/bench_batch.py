@@ -0,0 +1,38 @@
+"""
+Throughput of POST /ask/batch versus one GET /ask per question.
+
+Runs the app in-process through the ASGI test client, so the numbers cover
+request parsing, auth, rate limiting and JSON framing but not the network.
+
+Usage:
+    python -m benchmarks.bench_batch [questions]
+"""
+import sys
+import time
+from fastapi.testclient import TestClient
+from app.main import app, rate_limiter
+from test_api import TEST_QUESTIONS
+
+HEADERS = {"X-API-Key": "development-key"}
+
+def main(total: int = 2000) -> None:
+    rate_limiter.limit = total * 2
+    client = TestClient(app)
+    questions = [TEST_QUESTIONS[i % len(TEST_QUESTIONS)] for i in range(total)]
+
+    start = time.perf_counter()
+    for q in questions:
+        client.get("/ask", params={"question": q}, headers=HEADERS)
+    single = total / (time.perf_counter() - start)
+    print(f"{'GET /ask':<28} {single:>10.0f} questions/s")
+
+    for size in (10, 100, 1000):
+        rate_limiter.reset()
+        start = time.perf_counter()
+        for i in range(0, total, size):
+            client.post("/ask/batch", json={"questions": questions[i:i + size]}, headers=HEADERS)
+        rate = total / (time.perf_counter() - start)
+        print(f"{f'POST /ask/batch (size {size})':<28} {rate:>10.0f} questions/s  ({rate / single:.1f}x)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,38 @@
+"""
+tools.calculate with the AST evaluator versus the previous eval() path.
+
+Usage:
+    python -m benchmarks.bench_calculate [repeat]
+"""
+import sys
+from app.calculators.safe_eval import compile_expression
+from app.tools import calculate
+from benchmarks.common import summarize, time_calls, print_table
+
+EXPRESSIONS = [
+    "2 + 2", "5 * 10", "100 / 4", "2^10", "(2 + 3) * 4 - 7 / 2",
+    "8515770.0 * 3", "377975.0 * 4", "3.14 * 2 ^ 8 / 7 + 1",
+]
+
+def eval_calculate(expression: str) -> str:
+    """The previous implementation of tools.calculate."""
+    try:
+        return str(eval(expression.replace('^', '**')))
+    except Exception as e:
+        return f"Sorry, I couldn't calculate that: {str(e)}"
+
+def main(repeat: int = 2000) -> None:
+    rows = {}
+    for expression in EXPRESSIONS:
+        assert calculate(expression) == eval_calculate(expression), expression
+        rows[f"eval      {expression}"] = summarize(time_calls(lambda: eval_calculate(expression), repeat))
+
+        def cold() -> None:
+            compile_expression.cache_clear()
+            calculate(expression)
+        rows[f"ast cold  {expression}"] = summarize(time_calls(cold, repeat))
+        rows[f"ast warm  {expression}"] = summarize(time_calls(lambda: calculate(expression), repeat))
+    print_table("tools.calculate", rows)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
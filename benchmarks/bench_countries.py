@@ -0,0 +1,42 @@
+"""
+Country knowledge base: load time and lookup cost, next to the previous
+five-entry dict lookup.
+
+Usage:
+    python -m benchmarks.bench_countries [repeat]
+"""
+import sys
+import time
+import tracemalloc
+from app.countries import CountryKnowledgeBase, knowledge_base
+from benchmarks.common import summarize, time_calls, print_table
+
+LEGACY = {"Japan": {"capital": "Tokyo", "population": 125700000, "area": 377975}}
+
+def legacy_lookup(country: str) -> dict:
+    """The previous get_country_info."""
+    country = country.strip().title()
+    if country in LEGACY:
+        return LEGACY[country]
+    return {"error": f"Country {country} not found"}
+
+def main(repeat: int = 20000) -> None:
+    loads = [0.0] * 20
+    for i in range(len(loads)):
+        start = time.perf_counter()
+        CountryKnowledgeBase.load()
+        loads[i] = time.perf_counter() - start
+    print_table(f"load ({len(knowledge_base)} countries)", {"CountryKnowledgeBase.load()": summarize(loads)})
+    tracemalloc.start()
+    kb = CountryKnowledgeBase.load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory: {size / 1024:.0f} KiB for {len(kb)} countries")
+
+    rows = {"legacy dict      'japan'": summarize(time_calls(lambda: legacy_lookup("japan"), repeat))}
+    for name in ("Japan", "japan", "Deutschland", "COTE D'IVOIRE", "Narnia"):
+        rows[f"lookup           {name!r}"] = summarize(time_calls(lambda: knowledge_base.lookup(name), repeat))
+    print_table("lookup", rows)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
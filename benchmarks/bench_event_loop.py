@@ -0,0 +1,82 @@
+"""
+Load test: /ping latency while /ask is saturated.
+
+The agent is replaced by a function that blocks for a fixed time, standing in
+for slow work such as model inference. A separate process keeps more /ask
+requests in flight than the agent pool accepts, so some are shed with 503,
+while this process samples /ping.
+
+Usage:
+    python -m benchmarks.bench_event_loop [seconds] [concurrency]
+"""
+import asyncio
+import multiprocessing
+import sys
+import time
+import httpx
+from app import main as api
+from app.config import Config
+from benchmarks.common import start_server, summarize
+
+HEADERS = {"X-API-Key": "development-key"}
+WORK_SECONDS = 0.05
+
+def slow_process_question(question: str, session_id: str = None) -> str:
+    time.sleep(WORK_SECONDS)
+    return "done"
+
+def sample_ping(client: httpx.Client, seconds: float) -> list:
+    samples = []
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        start = time.perf_counter()
+        client.get("/ping")
+        samples.append(time.perf_counter() - start)
+        time.sleep(0.005)
+    return samples
+
+async def _flood(base_url: str, seconds: float, concurrency: int) -> dict:
+    counts: dict = {}
+    until = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while time.perf_counter() < until:
+            r = await client.get("/ask", params={"question": "load"})
+            counts[r.status_code] = counts.get(r.status_code, 0) + 1
+            if r.status_code == 503:
+                # Back off like a client honoring Retry-After would, scaled down
+                await asyncio.sleep(WORK_SECONDS)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=HEADERS, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return counts
+
+def flood_ask(base_url: str, seconds: float, concurrency: int, results) -> None:
+    results.put(asyncio.run(_flood(base_url, seconds, concurrency)))
+
+def main(seconds: float = 5, concurrency: int = 128) -> None:
+    api.rate_limiter.limit = 10 ** 9
+    api.process_question = slow_process_question
+    base_url = start_server(api.app)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    with httpx.Client(base_url=base_url, headers=HEADERS, timeout=30) as client:
+        idle = sample_ping(client, 1)
+        flooder = ctx.Process(target=flood_ask, args=(base_url, seconds, concurrency, results))
+        flooder.start()
+        time.sleep(0.5)  # let the flood ramp up
+        busy = sample_ping(client, seconds - 1)
+        counts = results.get()
+        flooder.join()
+
+    for name, samples in (("/ping idle", idle), ("/ping while /ask saturated", busy)):
+        s = summarize(samples)
+        print(f"{name:<28} p50={s['p50_ms']:.2f} ms p99={s['p99_ms']:.2f} ms (n={s['n']})")
+    print(f"/ask responses by status: {dict(sorted(counts.items()))}")
+    print(f"agent pool: {Config.AGENT_WORKERS} workers, queue depth {Config.AGENT_QUEUE_DEPTH}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 5, int(args[1]) if len(args) > 1 else 128)
@@ -0,0 +1,78 @@
+"""
+Typo-tolerant country resolution: recall and latency of
+CountryKnowledgeBase.resolve over every canonical name with one random
+edit (deletion, insertion, substitution or adjacent swap), against a linear
+scan that computes the edit distance to every name.
+
+Usage:
+    python -m benchmarks.bench_fuzzy [typos per name]
+"""
+import random
+import string
+import sys
+import time
+from app.countries import knowledge_base, normalize, _bounded_distance
+from benchmarks.common import summarize, print_table
+
+def make_typo(name: str, rng: random.Random) -> str:
+    # Keep the first letter; resolve only considers names that share it
+    i = rng.randrange(1, len(name))
+    kind = rng.choice(("delete", "insert", "substitute", "swap"))
+    if kind == "delete":
+        return name[:i] + name[i + 1:]
+    if kind == "insert":
+        return name[:i] + rng.choice(string.ascii_lowercase) + name[i:]
+    if kind == "substitute":
+        return name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+    if i == len(name) - 1:
+        i -= 1
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def linear_scan(name: str, keys):
+    key = normalize(name)
+    best, best_distance = None, 3
+    for candidate, country in keys:
+        distance = _bounded_distance(key, candidate, 2)
+        if distance < best_distance:
+            best, best_distance = country, distance
+    return best
+
+def run(resolver, cases):
+    samples, hits = [], 0
+    for typo, expected in cases:
+        start = time.perf_counter()
+        country = resolver(typo)
+        samples.append(time.perf_counter() - start)
+        hits += country is expected
+    return hits / len(cases), summarize(samples)
+
+def main(per_name: int = 5) -> None:
+    rng = random.Random(42)
+    countries = [knowledge_base.lookup(name) for name in knowledge_base]
+    cases = [(make_typo(c.name.lower(), rng), c) for c in countries
+             if len(normalize(c.name)) >= 8 for _ in range(per_name)]
+    keys = [(normalize(alias), country) for alias, country in knowledge_base.aliases()]
+
+    def resolve(typo):
+        resolution = knowledge_base.resolve(typo)
+        return resolution.country if resolution else None
+
+    resolve("")  # build the index outside the timings
+    print(f"{len(knowledge_base)} countries, {len(keys)} names and aliases, "
+          f"{len(cases)} one-edit typos of names of 8+ letters")
+    results = {
+        "linear scan, edit distance to every name": run(lambda t: linear_scan(t, keys), cases),
+        "trigram index (resolve)": run(resolve, cases),
+    }
+    print_table("latency", {label: stats for label, (_, stats) in results.items()})
+    print()
+    for label, (recall, _) in results.items():
+        print(f"{label:<48} recall {recall:.1%}")
+
+    # Ordinary words must not turn into countries
+    words = ["woman", "while", "people", "capital", "weather", "history", "football", "chicken"]
+    false_hits = [w for w in words if knowledge_base.resolve(w)]
+    print(f"\nfalse positives among {len(words)} ordinary words: {false_hits or 'none'}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,50 @@
+"""
+Generative fallback throughput for batch sizes 1 to 32.
+
+Each row pushes the same burst of prompts through a MicroBatcher capped at
+that batch size and reports requests/s, generated tokens/s and queue wait.
+Needs torch and the model weights (MODEL_NAME).
+
+Usage:
+    python -m benchmarks.bench_generation [prompts per row]
+"""
+import sys
+import time
+from app.agent import Agent
+from app.generation import MicroBatcher
+from app.prompts import GENERAL_QUESTION
+
+BATCH_SIZES = (1, 2, 4, 8, 16, 32)
+
+QUESTIONS = [
+    "Why is the sky blue?",
+    "Who wrote Don Quixote?",
+    "What do bees make?",
+    "How does a rainbow form?",
+    "What is photosynthesis?",
+    "Why do we have seasons?",
+    "What is the largest ocean on Earth?",
+    "Who painted the Mona Lisa?",
+]
+
+def main(prompts: int = 64) -> None:
+    agent = Agent(load_model=True)
+    batch = [GENERAL_QUESTION.format(question=QUESTIONS[i % len(QUESTIONS)]) for i in range(prompts)]
+    agent._generate_batch(batch[:2])  # warm up outside the timings
+
+    print(f"{prompts} prompts per row on {agent.device}")
+    print(f"{'batch':>5} {'wall s':>8} {'req/s':>8} {'tokens/s':>9} {'mean batch':>11} "
+          f"{'wait mean ms':>13} {'wait p95 ms':>12}")
+    for size in BATCH_SIZES:
+        batcher = MicroBatcher(agent._generate_batch, size, max_wait=0.005)
+        start = time.perf_counter()
+        futures = [batcher.submit(prompt) for prompt in batch]
+        for future in futures:
+            future.result()
+        wall = time.perf_counter() - start
+        s = batcher.stats()
+        print(f"{size:>5} {wall:>8.2f} {prompts / wall:>8.2f} {s['tokens_per_second']:>9.1f} "
+              f"{s['mean_batch_size']:>11.1f} {s['queue_wait_mean_ms']:>13.1f} {s['queue_wait_p95_ms']:>12.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
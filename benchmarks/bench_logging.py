@@ -0,0 +1,69 @@
+"""
+Per-request logging overhead: the test questions answered by the agent
+with logging off, through the old synchronous FileHandler + StreamHandler
+(the pre-queue setup), and through the queued JSON pipeline, at DEBUG and
+at INFO, with and without sampling. Console output goes to /dev/null.
+
+Usage:
+    python -m benchmarks.bench_logging [rounds]
+"""
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+from app.agent import Agent
+from app.logs import setup_logging, shutdown_logging, logging_stats
+from benchmarks.common import summarize, time_calls, print_table
+from test_api import TEST_QUESTIONS
+
+def _sync_logging(level: str, path: str) -> None:
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    logging.basicConfig(level=getattr(logging, level), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                        handlers=[logging.FileHandler(path), logging.StreamHandler()], force=True)
+
+def main(rounds: int = 200) -> None:
+    agent = Agent(load_model=False)
+    agent._cache.max_size = 0  # answer every question in full
+    log_main = logging.getLogger("app.main")
+    questions = TEST_QUESTIONS * rounds
+    tmp = tempfile.mkdtemp()
+
+    def run(old_style: bool):
+        it = iter(questions)
+
+        def one():
+            question = next(it)
+            if old_style:
+                # The endpoint used to log every question too
+                log_main.info(f"Processing question: {question}")
+            agent.answer(question)
+        return summarize(time_calls(one, len(questions)))
+
+    setups = [
+        ("off", lambda: _sync_logging("CRITICAL", os.path.join(tmp, "off.log")), True),
+        ("sync file+console, DEBUG", lambda: _sync_logging("DEBUG", os.path.join(tmp, "sync-debug.log")), True),
+        ("sync file+console, INFO", lambda: _sync_logging("INFO", os.path.join(tmp, "sync-info.log")), True),
+        ("queued JSON, DEBUG", lambda: setup_logging("DEBUG", os.path.join(tmp, "q-debug.log")), False),
+        ("queued JSON, INFO", lambda: setup_logging("INFO", os.path.join(tmp, "q-info.log")), False),
+        ("queued JSON, INFO, 10% sampled", lambda: setup_logging(
+            "INFO", os.path.join(tmp, "q-sampled.log"), sample_rate=0.1), False),
+    ]
+    rows, pipeline = {}, {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        for label, setup, old_style in setups:
+            setup()
+            rows[label] = run(old_style)
+            if not old_style:
+                pipeline[label] = logging_stats()
+    shutdown_logging()
+    print_table(f"per request ({len(questions)} questions, cache off)", rows)
+    for label, s in pipeline.items():
+        print(f"{label}: {s['written']} records written in {s['flushes']} flushes "
+              f"({s['queued']} still queued, {s['dropped']} dropped)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,56 @@
+"""
+Bulk evaluation: MathEngine.calculate in a loop versus calculate_many and
+evaluate_template, for 10^3 to 10^6 rows.
+
+The scalar loop is timed on at most 10^5 rows and extrapolated beyond that
+(marked "est").
+
+Usage:
+    python -m benchmarks.bench_math_bulk [max rows]
+"""
+import random
+import sys
+import time
+import numpy as np
+from app.calculators.math_engine import MathEngine
+
+SCALAR_LIMIT = 100_000
+
+def make_rows(n: int, rng: random.Random):
+    prices = [round(rng.uniform(1, 500), 2) for _ in range(n)]
+    quantities = [rng.randint(1, 50) for _ in range(n)]
+    expressions = [f"{p} * {q} * (1 + 0.21) / 12" for p, q in zip(prices, quantities)]
+    return expressions, np.array(prices), np.array(quantities)
+
+def seconds(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(max_rows: int = 1_000_000) -> None:
+    engine = MathEngine()
+    rng = random.Random(42)
+
+    sample, _, _ = make_rows(1000, rng)
+    assert engine.calculate_many(sample) == [engine.calculate(e) for e in sample]
+
+    print(f"{'rows':>9} {'calculate loop s':>17} {'calculate_many s':>17} {'speed-up':>9} "
+          f"{'evaluate_template s':>20}")
+    n = 1000
+    while n <= max_rows:
+        expressions, prices, quantities = make_rows(n, rng)
+        if n <= SCALAR_LIMIT:
+            scalar = seconds(lambda: [engine.calculate(e) for e in expressions])
+            scalar_label = f"{scalar:.3f}"
+        else:
+            part = expressions[:SCALAR_LIMIT]
+            scalar = seconds(lambda: [engine.calculate(e) for e in part]) * n / SCALAR_LIMIT
+            scalar_label = f"{scalar:.3f} est"
+        bulk = seconds(lambda: engine.calculate_many(expressions))
+        template = seconds(lambda: engine.evaluate_template(
+            "p * q * (1 + 0.21) / 12", p=prices, q=quantities))
+        print(f"{n:>9,} {scalar_label:>17} {bulk:>17.3f} {scalar / bulk:>8.1f}x {template:>20.4f}")
+        n *= 10
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
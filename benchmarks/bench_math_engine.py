@@ -0,0 +1,58 @@
+"""
+MathEngine.calculate throughput per tier.
+
+Usage:
+    python -m benchmarks.bench_math_engine [seconds per case]
+"""
+import sys
+import time
+from app.calculators import math_engine
+from app.calculators.math_engine import MathEngine
+from app.calculators.safe_eval import compile_expression
+
+EXPRESSIONS = ["2 + 2", "5 * 10", "100 / 4", "2^10", "(2 + 3) * 4 - 7 / 2", "3.14 * 2 ^ 8 / 7 + 1"]
+
+def rate(fn, seconds: float) -> float:
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for expression in EXPRESSIONS:
+            fn(expression)
+        calls += len(EXPRESSIONS)
+    return calls / (time.perf_counter() - start)
+
+def main(seconds: float = 1.0) -> None:
+    engine = MathEngine()
+    from sympy import sympify
+
+    def legacy(expression: str) -> None:
+        # The previous single-tier path: sympify + evalf on every call
+        clean = engine._clean_expression(expression)
+        expr = sympify(clean)
+        result = expr.evalf()
+        engine._get_calculation_steps(expr)
+        engine._get_result_type(result)
+
+    def numeric_cold(expression: str) -> None:
+        math_engine._parse_numeric.cache_clear()
+        compile_expression.cache_clear()
+        engine.calculate(expression)
+
+    def symbolic_cold(expression: str) -> None:
+        math_engine._parse_symbolic.cache_clear()
+        engine._calculate_symbolic(engine._clean_expression(expression))
+
+    cases = {
+        "legacy sympy (every call)": legacy,
+        "symbolic tier, cold": symbolic_cold,
+        "symbolic tier, memoized": lambda e: engine._calculate_symbolic(engine._clean_expression(e)),
+        "numeric tier, cold": numeric_cold,
+        "numeric tier, memoized": engine.calculate,
+    }
+    print(f"{'tier':<28} {'calculations/s':>15}")
+    for name, fn in cases.items():
+        print(f"{name:<28} {rate(fn, seconds):>15,.0f}")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
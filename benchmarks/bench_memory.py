@@ -0,0 +1,66 @@
+"""
+Concurrency benchmark for per-session memory.
+
+N threads each drive their own session through a question followed by a
+pronoun follow-up, and every follow-up is checked against the country that
+session asked about.
+
+Usage:
+    python -m benchmarks.bench_memory [sessions] [rounds]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import memory
+from app.agent import Agent
+from app.memory import SessionStore
+from benchmarks.common import summarize
+
+COUNTRIES = ["Brazil", "France", "Japan", "Canada", "Germany"]
+
+def run(sessions: int, rounds: int) -> dict:
+    agent = Agent()
+    samples = []
+    mismatches = 0
+
+    def session_worker(i: int) -> None:
+        nonlocal mismatches
+        session_id = f"session-{i}"
+        for r in range(rounds):
+            country = COUNTRIES[(i + r) % len(COUNTRIES)]
+            start = time.perf_counter()
+            agent.process_question(f"What is the area of {country}?", session_id)
+            answer = agent.process_question("And its capital?", session_id)
+            samples.append(time.perf_counter() - start)
+            if country not in answer:
+                mismatches += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session_worker, range(sessions)))
+    elapsed = time.perf_counter() - start
+    stats = summarize(samples)
+    stats["pairs_per_s"] = len(samples) / elapsed
+    stats["mismatches"] = mismatches
+    return stats
+
+def main(sessions: int = 32, rounds: int = 200) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {
+            "in-memory": SessionStore(),
+            "write-behind": SessionStore(db_path=os.path.join(tmp, "memory.sqlite3")),
+        }
+        print(f"{sessions} sessions x {rounds} rounds (question + follow-up)")
+        print(f"{'store':<14} {'pairs/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'mismatches':>11}")
+        for name, store in variants.items():
+            memory.store = store
+            s = run(sessions, rounds)
+            store.close()
+            print(f"{name:<14} {s['pairs_per_s']:>10.0f} {s['p50_ms']:>9.4f} "
+                  f"{s['p99_ms']:>9.4f} {s['mismatches']:>11}")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,47 @@
+"""
+Country mention detection over the full knowledge base: the trie in
+CountryKnowledgeBase.mentions versus a substring scan per name (the
+previous fallback) and one regex alternation of every name.
+
+Usage:
+    python -m benchmarks.bench_mentions [repeat]
+"""
+import re
+import sys
+from app.countries import knowledge_base
+from benchmarks.common import summarize, time_calls, print_table
+
+FILLER = "please tell me something interesting about the history and culture of "
+
+QUESTIONS = {
+    "short, no country": "how are you today?",
+    "short, country": "what is the capital of papua new guinea?",
+    "long, country at end": FILLER * 10 + "uruguay",
+    "long, no country": FILLER * 10 + "nowhere",
+}
+
+def main(repeat: int = 2000) -> None:
+    names = [name.lower() for name, _ in knowledge_base.aliases()]
+    alternation = re.compile(
+        r"(?<!\w)(?:" + "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True)) + r")(?!\w)"
+    )
+
+    def substring_scan(q: str):
+        for name in names:
+            if name in q:
+                return name
+        return None
+
+    knowledge_base.mentions("")  # build the trie outside the timings
+    print(f"{len(knowledge_base)} countries, {len(names)} names and aliases")
+    for label, question in QUESTIONS.items():
+        q = question.lower()
+        rows = {
+            "substring scan per name": summarize(time_calls(lambda: substring_scan(q), repeat)),
+            "regex alternation": summarize(time_calls(lambda: alternation.search(q), repeat)),
+            "trie (mentions)": summarize(time_calls(lambda: knowledge_base.mentions(q), repeat)),
+        }
+        print_table(f"{label} ({len(q)} chars)", rows)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,39 @@
+"""
+Instrumentation overhead: an empty block and a small function timed bare,
+under stage_timer and under @timed, then the cost of rendering /metrics
+after answering the test questions.
+
+Usage:
+    python -m benchmarks.bench_metrics [repeat]
+"""
+import sys
+from app.agent import Agent
+from app.metrics import registry, stage_timer, timed
+from benchmarks.common import summarize, time_calls, print_table
+from test_api import TEST_QUESTIONS
+
+def main(repeat: int = 100000) -> None:
+    def work():
+        return sum(range(10))
+
+    timed_work = timed("bench")(work)
+
+    def timer_block():
+        with stage_timer("bench"):
+            work()
+
+    print_table("per call", {
+        "bare": summarize(time_calls(work, repeat)),
+        "stage_timer": summarize(time_calls(timer_block, repeat)),
+        "@timed": summarize(time_calls(timed_work, repeat)),
+    })
+
+    agent = Agent(load_model=False)
+    for question in TEST_QUESTIONS:
+        agent.process_question(question)
+    text = registry.render()
+    print(f"\n/metrics: {len(text.splitlines())} lines, {len(text)} bytes")
+    print_table("render", {"registry.render()": summarize(time_calls(registry.render, 1000))})
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,80 @@
+"""
+CPU model runtimes compared: fp32, dynamically quantized int8 and ONNX.
+
+Each runtime runs in a fresh interpreter so peak RSS is its own. Decoding
+is greedy (TEMPERATURE=0) so answers can be compared with fp32's; the ONNX
+export is cached under MODEL_ARTIFACT_DIR, so its first run also exports.
+
+Usage:
+    python -m benchmarks.bench_model_runtime [threads]
+"""
+import json
+import os
+import subprocess
+import sys
+
+QUESTIONS = [
+    "Why is the sky blue?",
+    "Who wrote Don Quixote?",
+    "What do bees make?",
+    "How does a rainbow form?",
+    "What is photosynthesis?",
+    "Why do we have seasons?",
+    "What is the largest ocean on Earth?",
+    "Who painted the Mona Lisa?",
+]
+
+_PROBE = """
+import json, resource, time
+from app.agent import Agent
+from app.prompts import GENERAL_QUESTION
+start = time.perf_counter()
+agent = Agent(load_model=True)
+load_s = time.perf_counter() - start
+latencies, answers = [], []
+for question in {questions!r}:
+    start = time.perf_counter()
+    [(text, _)] = agent._generate_batch([GENERAL_QUESTION.format(question=question)])
+    latencies.append(time.perf_counter() - start)
+    answers.append(text)
+latencies.sort()
+print(json.dumps({{
+    "load_s": load_s,
+    "p50_ms": latencies[len(latencies) // 2] * 1000,
+    "max_ms": latencies[-1] * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "answers": answers,
+}}))
+"""
+
+RUNTIMES = ("fp32", "int8", "onnx")
+
+def run_runtime(runtime: str, threads: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "LOG_LEVEL": "WARNING", "MODEL_RUNTIME": runtime, "TEMPERATURE": "0",
+           "MODEL_INTRA_OP_THREADS": str(threads)}
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(questions=QUESTIONS)],
+        cwd=root, capture_output=True, text=True, check=True, env=env,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main(threads: int = 0) -> None:
+    print(f"{len(QUESTIONS)} questions, intra-op threads: {threads or 'torch default'}")
+    print(f"{'runtime':<8} {'load s':>8} {'p50 ms':>9} {'max ms':>9} {'max RSS MB':>11} {'agree w/ fp32':>14}")
+    reference = None
+    for runtime in RUNTIMES:
+        try:
+            r = run_runtime(runtime, threads)
+        except subprocess.CalledProcessError as e:
+            print(f"{runtime:<8} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        if reference is None and runtime == "fp32":
+            reference = r["answers"]
+        agree = (f"{sum(a == b for a, b in zip(r['answers'], reference)) / len(QUESTIONS):.0%}"
+                 if reference else "n/a")
+        print(f"{runtime:<8} {r['load_s']:>8.2f} {r['p50_ms']:>9.1f} {r['max_ms']:>9.1f} "
+              f"{r['max_rss_mb']:>11.1f} {agree:>14}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
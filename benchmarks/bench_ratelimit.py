@@ -0,0 +1,65 @@
+"""
+Per-check cost and memory of the rate limiter versus the old per-IP
+timestamp lists.
+
+Usage:
+    python -m benchmarks.bench_ratelimit
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+from app.ratelimit import SlidingWindowLimiter, SQLiteSlidingWindowLimiter
+
+LIMIT = 100
+
+def legacy_limiter():
+    """The list-of-timestamps check previously in app/main.py."""
+    request_times: Dict[str, List[float]] = {}
+
+    def allow(client_ip: str, now: float) -> bool:
+        if client_ip not in request_times:
+            request_times[client_ip] = []
+        request_times[client_ip] = [t for t in request_times[client_ip] if now - t < 60]
+        if len(request_times[client_ip]) >= LIMIT:
+            return False
+        request_times[client_ip].append(now)
+        return True
+
+    return allow
+
+def per_check_us(allow, keys: int, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        allow(f"10.0.{i % keys // 256}.{i % 256}", time.time())
+    return (time.perf_counter() - start) / calls * 1e6
+
+def memory_kb(allow, keys: int, minutes: int) -> float:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    # Each client makes a few requests per minute, then goes quiet
+    for minute in range(minutes):
+        for i in range(keys):
+            allow(f"{minute}-{i}", minute * 60.0 + i / keys)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used / 1024
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {
+            "legacy lists": lambda: legacy_limiter(),
+            "sliding window": lambda: SlidingWindowLimiter(LIMIT).allow,
+            "sliding window (sqlite)": lambda: SQLiteSlidingWindowLimiter(
+                LIMIT, db_path=os.path.join(tmp, f"limits-{time.time_ns()}.sqlite3")).allow,
+        }
+        print(f"{'limiter':<26} {'hot key us':>11} {'1k keys us':>11} {'memory KB (10k ips x 5 min)':>29}")
+        for name, make in variants.items():
+            hot = per_check_us(make(), keys=1, calls=20000 if "sqlite" not in name else 2000)
+            spread = per_check_us(make(), keys=1000, calls=20000 if "sqlite" not in name else 2000)
+            mem = f"{memory_kb(make(), keys=10000, minutes=5):.0f}" if "sqlite" not in name else "on disk"
+            print(f"{name:<26} {hot:>11.2f} {spread:>11.2f} {mem:>29}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+ResponseEngine construction and per-response cost.
+
+Construction no longer loads gpt2-medium (about 1.4 GB, tens of seconds on
+first use), so it is timed here without the model. Per-response latency
+compares str.format on the raw template with the whole generate_response
+call (history included), and the last table runs eight threads with a
+session each.
+
+Usage:
+    python -m benchmarks.bench_response_engine [repeat]
+"""
+import sys
+import threading
+import time
+from app.response.response_engine import ResponseEngine
+from benchmarks.common import summarize, time_calls, print_table
+
+CASES = {
+    "math": ("What is 2 + 2?", {"expression": "2 + 2", "result": "4"}),
+    "country": ("What is the capital of Brazil?", {"country": "Brazil", "property": "capital", "value": "Brasília"}),
+    "general": ("Hello!", {}),
+}
+
+def main(repeat: int = 20000) -> None:
+    print_table("construction", {
+        "ResponseEngine() (model loaded lazily)": summarize(time_calls(ResponseEngine, 200)),
+    })
+
+    engine = ResponseEngine()
+    rows = {}
+    for template_type, (question, context) in CASES.items():
+        raw = engine.templates[template_type]["greeting" if template_type == "general" else "success"]
+        values = context or {}
+        rows[f"{template_type}: str.format"] = summarize(time_calls(lambda: raw.format_map(values), repeat))
+        rows[f"{template_type}: generate_response"] = summarize(time_calls(
+            lambda: engine.generate_response(question, context, template_type, session_id="bench"), repeat))
+    print_table("per response", rows)
+
+    def worker(session: str) -> None:
+        question, context = CASES["math"]
+        for _ in range(repeat // 8):
+            engine.generate_response(question, context, "math", session_id=session)
+
+    threads = [threading.Thread(target=worker, args=(f"s{i}",)) for i in range(8)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"\n8 threads, 8 sessions: {repeat // 8 * 8 / elapsed:,.0f} responses/s")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
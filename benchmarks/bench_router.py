@@ -0,0 +1,30 @@
+"""
+Per-question latency of the intent router and of Agent.process_question.
+
+Usage:
+    python -m benchmarks.bench_router [repeat]
+"""
+import sys
+from app.router import route
+from app.agent import agent
+from benchmarks.common import summarize, time_calls, print_table
+from test_api import TEST_QUESTIONS
+
+def main(repeat: int = 200) -> None:
+    routing = {}
+    answering = {}
+    all_samples = []
+    for question in TEST_QUESTIONS:
+        routing[question] = summarize(time_calls(lambda: route(question), repeat))
+        samples = time_calls(lambda: agent.process_question(question), repeat)
+        answering[question] = summarize(samples)
+        all_samples.extend(samples)
+
+    print_table("route()", routing)
+    print_table("Agent.process_question()", answering)
+    overall = summarize(all_samples)
+    print(f"\nOverall: p50={overall['p50_ms']:.4f} ms p99={overall['p99_ms']:.4f} ms "
+          f"over {overall['n']} calls")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,109 @@
+"""
+Semantic answer cache: search latency by cache size, and hit rate on a
+paraphrase corpus embedded with the T5 encoder.
+
+Search latency uses random 768-dimensional vectors (flan-t5-base's width)
+and needs no model. The paraphrase part loads MODEL_NAME and is skipped
+when it is unavailable. For each threshold it reports how many later
+paraphrases hit their group's cached answer and how many hit another
+group's answer instead (wrong answers), then how many near misses (same
+wording, another name or number) are similar enough to pass the threshold
+alone and how many the cache still answers wrongly.
+
+Usage:
+    python -m benchmarks.bench_semantic_cache [repeat]
+"""
+import sys
+import numpy as np
+from app.cache import SemanticCache
+from benchmarks.common import summarize, time_calls, print_table
+
+DIM = 768
+
+PARAPHRASES = [
+    ["Who wrote Hamlet?", "Hamlet author?", "Who is the author of Hamlet?", "Who penned Hamlet?"],
+    ["Why is the sky blue?", "What makes the sky blue?", "Why does the sky look blue?"],
+    ["What do bees make?", "What do bees produce?", "What is made by bees?"],
+    ["How does a rainbow form?", "How are rainbows formed?", "What causes a rainbow?"],
+    ["What is photosynthesis?", "Explain photosynthesis.", "What does photosynthesis mean?"],
+    ["Who painted the Mona Lisa?", "Mona Lisa painter?", "Who is the painter of the Mona Lisa?"],
+    ["What is the largest ocean?", "Which ocean is the biggest?", "Name the largest ocean on Earth."],
+    ["Why do we have seasons?", "What causes the seasons?", "Why are there seasons on Earth?"],
+    ["Who invented the telephone?", "Inventor of the telephone?", "Who made the first telephone?"],
+    ["How far is the Moon?", "What is the distance to the Moon?", "How far away is the Moon from Earth?"],
+]
+
+# Pairs that must never share an answer
+NEAR_MISSES = [
+    ("Who wrote Hamlet?", "Who wrote Macbeth?"),
+    ("Who painted the Mona Lisa?", "Who painted the Sistine Chapel?"),
+    ("How far is the Moon?", "How far is Mars?"),
+    ("When was Mozart born?", "When was Beethoven born?"),
+    ("Who invented the telephone?", "Who invented the television?"),
+    ("What is 15% of 200?", "What is 15% of 300?"),
+    ("How many days are in 3 weeks?", "How many days are in 4 weeks?"),
+    ("What year did World War 1 end?", "What year did World War 2 end?"),
+]
+
+THRESHOLDS = (0.80, 0.85, 0.90, 0.92, 0.95)
+
+def search_latency(repeat: int) -> None:
+    rng = np.random.default_rng(42)
+    rows = {}
+    for size in (100, 1000, 10_000):
+        vectors = {f"q{i}": rng.standard_normal(DIM) for i in range(size + 1)}
+        cache = SemanticCache(vectors.__getitem__, max_size=size, threshold=0.9)
+        for i in range(size):
+            cache.set(f"q{i}", i)
+        query = f"q{size}"
+        cache.get(query)  # embed outside the timings
+        rows[f"{size:,} entries"] = summarize(time_calls(lambda: cache.get(query), repeat))
+    print_table(f"brute-force search, {DIM} dimensions", rows)
+
+def paraphrase_hit_rate() -> None:
+    try:
+        from app.agent import Agent
+        agent = Agent(load_model=True)
+    except Exception as e:
+        print(f"\nparaphrase corpus skipped: {e}")
+        return
+    questions = [q for group in PARAPHRASES for q in group] + [q for pair in NEAR_MISSES for q in pair]
+    texts = sorted({q.strip().lower() for q in questions})
+    vectors = dict(zip(texts, (agent._embed(t) for t in texts)))
+
+    print(f"\n{sum(len(g) for g in PARAPHRASES)} questions in {len(PARAPHRASES)} paraphrase groups")
+    print(f"{'threshold':>9} {'hits':>6} {'wrong':>6} {'misses':>7}")
+    for threshold in THRESHOLDS:
+        cache = SemanticCache(vectors.__getitem__, max_size=1000, threshold=threshold)
+        hits = wrong = misses = 0
+        for group_id, group in enumerate(PARAPHRASES):
+            for i, question in enumerate(group):
+                answer = cache.get(question)
+                if answer is None:
+                    cache.set(question, group_id)
+                    # The first question of a group is expected to miss
+                    misses += i > 0
+                elif answer == group_id:
+                    hits += 1
+                else:
+                    wrong += 1
+        print(f"{threshold:>9.2f} {hits:>6} {wrong:>6} {misses:>7}")
+
+    print(f"\n{len(NEAR_MISSES)} near-miss pairs")
+    print(f"{'threshold':>9} {'similar':>8} {'wrong':>6}")
+    for threshold in THRESHOLDS:
+        similar = wrong = 0
+        for cached, asked in NEAR_MISSES:
+            cache = SemanticCache(vectors.__getitem__, max_size=1, threshold=threshold)
+            cache.set(cached, cached)
+            similar += float(vectors[cached.lower()] @ vectors[asked.lower()]
+                             / np.linalg.norm(vectors[cached.lower()]) / np.linalg.norm(vectors[asked.lower()])) >= threshold
+            wrong += cache.get(asked) is not None
+        print(f"{threshold:>9.2f} {similar:>8} {wrong:>6}")
+
+def main(repeat: int = 2000) -> None:
+    search_latency(repeat)
+    paraphrase_hit_rate()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
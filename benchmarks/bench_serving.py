@@ -0,0 +1,165 @@
+"""
+Multi-worker serving: memory per worker and throughput with 1, 2, 4 and 8
+API workers, comparing app.serve (workers forked from one preloaded
+process) with `uvicorn --workers` (each worker imports and loads
+everything itself).
+
+Memory is read from /proc/<pid>/smaps_rollup (Linux): RSS counts shared
+pages in full, PSS splits them between the processes sharing them and
+USS is what the worker alone holds. Throughput is /ask over the test
+questions, driven by separate load processes so the client is not the
+bottleneck. Set MODEL_ENABLED=true (with torch installed) to include the
+model weights.
+
+Usage:
+    python -m benchmarks.bench_serving [seconds] [concurrency]
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+import httpx
+from benchmarks.common import free_port
+from test_api import TEST_QUESTIONS
+
+HEADERS = {"X-API-Key": "development-key"}
+WORKER_COUNTS = (1, 2, 4, 8)
+LOAD_PROCESSES = 4
+
+def _start(mode: str, workers: int, port: int) -> subprocess.Popen:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "API_WORKERS": str(workers), "API_HOST": "127.0.0.1", "API_PORT": str(port),
+           "RATE_LIMIT": str(10 ** 9), "LOG_LEVEL": "WARNING", "LOG_FILE": os.devnull,
+
+           "MODEL_ENABLED": os.environ.get("MODEL_ENABLED", "false")}
+    if mode == "app.serve":
+        cmd = [sys.executable, "-m", "app.serve"]
+    else:
+        # The same shared state, so only the process model differs
+        env.update(RATE_LIMIT_BACKEND="sqlite", MEMORY_SHARED="true",
+                   MODEL_PRELOAD=os.environ.get("MODEL_PRELOAD", "true"))
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+def _wait_ready(port: int, workers: int, proc: subprocess.Popen, timeout: float = 120) -> None:
+    until = time.monotonic() + timeout
+    while time.monotonic() < until:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping", timeout=1)
+            if len(_workers(proc.pid)) >= workers:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+def _workers(parent: int) -> List[int]:
+    """Child processes serving requests, or the parent when it serves alone (uvicorn --workers 1)."""
+    children = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{pid}/cmdline") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        # uvicorn's supervisor also starts a multiprocessing resource tracker
+        if ppid == parent and "resource_tracker" not in cmdline:
+            children.append(int(pid))
+    return children or [parent]
+
+def _memory(pid: int) -> Dict[str, float]:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+async def _load(base_url: str, seconds: float, concurrency: int) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    until = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async def worker(client: httpx.AsyncClient, offset: int) -> None:
+        i = offset
+        while time.perf_counter() < until:
+            r = await client.get("/ask", params={"question": TEST_QUESTIONS[i % len(TEST_QUESTIONS)],
+                                                  "session_id": f"load-{offset}"})
+            counts[r.status_code] = counts.get(r.status_code, 0) + 1
+            i += 1
+
+    async with httpx.AsyncClient(base_url=base_url, headers=HEADERS, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+    return counts
+
+def _load_process(base_url: str, seconds: float, concurrency: int, results) -> None:
+    results.put(asyncio.run(_load(base_url, seconds, concurrency)))
+
+def measure(mode: str, workers: int, seconds: float, concurrency: int) -> dict:
+    port = free_port()
+    proc = _start(mode, workers, port)
+    try:
+        _wait_ready(port, workers, proc)
+        memory = [_memory(pid) for pid in _workers(proc.pid)]
+        results = multiprocessing.Queue()
+        loaders = [multiprocessing.Process(target=_load_process, args=(
+            f"http://127.0.0.1:{port}", seconds, max(1, concurrency // LOAD_PROCESSES), results))
+            for _ in range(LOAD_PROCESSES)]
+        for p in loaders:
+            p.start()
+        counts: Dict[int, int] = {}
+        for _ in loaders:
+            for status, n in results.get().items():
+                counts[status] = counts.get(status, 0) + n
+        for p in loaders:
+            p.join()
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+    n = len(memory) or 1
+    return {
+        "rps": counts.get(200, 0) / seconds,
+        "errors": sum(v for k, v in counts.items() if k != 200),
+        "rss_mb": sum(m["rss"] for m in memory) / n,
+        "pss_mb": sum(m["pss"] for m in memory) / n,
+        "uss_mb": sum(m["uss"] for m in memory) / n,
+    }
+
+def main(seconds: float = 10, concurrency: int = 64) -> None:
+    print(f"{os.cpu_count()} CPUs, model enabled: {os.environ.get('MODEL_ENABLED', 'false')}")
+    print(f"{'mode':<18} {'workers':>7} {'req/s':>9} {'errors':>7} "
+          f"{'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8}  (per worker)")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Load-test sessions stay out of the app's own database
+        os.environ["MEMORY_DB"] = os.path.join(tmp, "memory.sqlite3")
+        for mode in ("app.serve", "uvicorn --workers"):
+            for workers in WORKER_COUNTS:
+                try:
+                    r = measure(mode, workers, seconds, concurrency)
+                except RuntimeError as e:
+                    print(f"{mode:<18} {workers:>7} failed: {e}")
+                    continue
+                print(f"{mode:<18} {workers:>7} {r['rps']:>9.1f} {r['errors']:>7} "
+                      f"{r['rss_mb']:>8.1f} {r['pss_mb']:>8.1f} {r['uss_mb']:>8.1f}")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 64)
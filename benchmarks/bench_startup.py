@@ -0,0 +1,53 @@
+"""
+Startup time and peak RSS of a rule-only agent versus a model-backed one.
+
+Each variant runs in a fresh interpreter so imports are not shared.
+
+Usage:
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+_PROBE = """
+import json, resource, time
+start = time.perf_counter()
+from app.agent import Agent
+agent = Agent(load_model={load_model})
+agent.process_question("What is the capital of Brazil?")
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "startup_s": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "model_loaded": agent.model_loaded,
+}}))
+"""
+
+VARIANTS = {
+    "rule-only": False,
+    "model-backed": True,
+}
+
+def run_variant(load_model: bool) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(load_model=load_model)],
+        cwd=root, capture_output=True, text=True, check=True,
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main() -> None:
+    print(f"{'variant':<14} {'startup s':>10} {'max RSS MB':>11} {'model':>6}")
+    for name, load_model in VARIANTS.items():
+        try:
+            r = run_variant(load_model)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<14} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{name:<14} {r['startup_s']:>10.3f} {r['max_rss_mb']:>11.1f} {str(r['model_loaded']):>6}")
+
+if __name__ == "__main__":
+    main()
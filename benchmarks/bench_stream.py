@@ -0,0 +1,45 @@
+"""
+Time-to-first-byte and total time of POST /ask/stream versus POST /ask/batch.
+
+Starts uvicorn on a local port in a background thread and reads the stream
+with httpx, so TTFB is measured over a real socket.
+
+Usage:
+    python -m benchmarks.bench_stream
+"""
+import time
+import httpx
+from app.config import Config
+from app.main import app, rate_limiter
+from benchmarks.common import start_server
+from test_api import TEST_QUESTIONS
+
+HEADERS = {"X-API-Key": "development-key"}
+
+def main() -> None:
+    rate_limiter.limit = 10 ** 6
+    Config.BATCH_MAX_SIZE = 10 ** 6
+    base_url = start_server(app)
+    print(f"{'size':>6} {'stream TTFB ms':>15} {'stream total ms':>16} {'batch total ms':>15}")
+    with httpx.Client(base_url=base_url, headers=HEADERS, timeout=120) as client:
+        for size in (1, 10, 100, 1000, 10000):
+            # Distinct questions so the answer cache does not hide the work
+            questions = [f"{TEST_QUESTIONS[i % len(TEST_QUESTIONS)]} #{i}" for i in range(size)]
+
+            start = time.perf_counter()
+            with client.stream("POST", "/ask/stream", json={"questions": questions}) as response:
+                lines = response.iter_lines()
+                next(lines)
+                ttfb = time.perf_counter() - start
+                for _ in lines:
+                    pass
+            stream_total = time.perf_counter() - start
+
+            start = time.perf_counter()
+            client.post("/ask/batch", json={"questions": questions})
+            batch_total = time.perf_counter() - start
+
+            print(f"{size:>6} {ttfb * 1000:>15.2f} {stream_total * 1000:>16.2f} {batch_total * 1000:>15.2f}")
+
+if __name__ == "__main__":
+    main()
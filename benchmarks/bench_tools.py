@@ -0,0 +1,44 @@
+"""
+Tool dispatch overhead: each tool called directly versus through the
+Dispatcher (inline, on the pool with a timeout, and from its cache), then
+the per-tool latency histograms after answering the test questions.
+
+Usage:
+    python -m benchmarks.bench_tools [repeat]
+"""
+import sys
+from app.agent import Agent
+from app.dispatcher import Dispatcher, Tool
+from app.tools import get_country_info
+from benchmarks.common import summarize, time_calls, print_table
+from test_api import TEST_QUESTIONS
+
+def main(repeat: int = 5000) -> None:
+    agent = Agent(load_model=False)
+    dispatcher = Dispatcher()
+    dispatcher.register(Tool("country", get_country_info))
+    dispatcher.register(Tool("math", agent._calculate, timeout=2.0, max_concurrency=4))
+    dispatcher.register(Tool("math_cached", agent._calculate, cacheable=True, timeout=2.0))
+
+    expressions = [f"{i} * 7 + 3" for i in range(repeat)]
+    it = iter(expressions * 3)
+    print_table("per call", {
+        "country: direct": summarize(time_calls(lambda: get_country_info("Japan"), repeat)),
+        "country: dispatched inline": summarize(time_calls(lambda: dispatcher.call("country", "Japan"), repeat)),
+        "math: direct": summarize(time_calls(lambda: agent._calculate(next(it)), repeat)),
+        "math: dispatched with timeout": summarize(time_calls(lambda: dispatcher.call("math", next(it)), repeat)),
+        "math: dispatched, cache hit": summarize(time_calls(
+            lambda: dispatcher.call("math_cached", "12 * 7 + 3"), repeat)),
+    })
+
+    for question in TEST_QUESTIONS:
+        agent.process_question(question)
+    print(f"\nafter {len(TEST_QUESTIONS)} test questions")
+    print(f"{'tool':<10} {'cost':<10} {'calls':>6} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for name, s in agent.tool_stats().items():
+        latency = s["latency"]
+        print(f"{name:<10} {s['cost']:<10} {s['calls']:>6} {s['errors']:>7} "
+              f"{latency['p50_ms']:>8.3f} {latency['p95_ms']:>8.3f} {latency['mean_ms']:>8.3f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,91 @@
+import asyncio
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Sequence
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile (nearest rank) of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[k]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as milliseconds."""
+    return {
+        "n": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+def time_calls(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Call fn repeat times and return the per-call latencies in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    """Print one summary row per label."""
+    print(f"\n{title}")
+    print(f"{'':<48} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for label, s in rows.items():
+        print(f"{label[:48]:<48} {s['p50_ms']:>9.4f} {s['p99_ms']:>9.4f} {s['mean_ms']:>9.4f}")
+
+def free_port() -> int:
+    """A local TCP port that was free a moment ago."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(app) -> str:
+    """Serve an ASGI app with uvicorn on a free local port in a daemon thread."""
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+async def run_load(base_url: str, questions: Sequence[str], seconds: float, concurrency: int,
+                   headers: Dict[str, str] = None) -> Dict[str, object]:
+    """
+    Keep `concurrency` /ask requests in flight for `seconds`, cycling through
+    `questions`.
+
+    Returns:
+        dict: "latencies" (seconds, successful requests only) and "statuses"
+            (count per status code, "error" for failed connections)
+    """
+    import httpx
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    until = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def worker(client, offset: int) -> None:
+        i = offset
+        while time.perf_counter() < until:
+            start = time.perf_counter()
+            try:
+                r = await client.get("/ask", params={"question": questions[i % len(questions)]})
+                status = str(r.status_code)
+            except httpx.HTTPError:
+                status = "error"
+            if status == "200":
+                latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            i += 1
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+    return {"latencies": latencies, "statuses": statuses}
@@ -0,0 +1,209 @@
+"""
+Benchmark suite over the test_api.py questions, with results saved as JSON
+so runs can be compared between commits.
+
+`run` times, in process, Agent.process_question per intent and for
+compound questions, MathEngine, get_country_info and session memory
+(in-process and SQLite-shared), then starts the API in a subprocess and load-tests /ask at several concurrency
+levels with httpx, reporting req/s and p50/p95/p99. `compare` prints the
+change per benchmark and exits with status 1 if any got slower than the
+threshold.
+
+Runs offline: the generative model is disabled, so questions no rule
+answers get the fixed "unknown" reply.
+
+Usage:
+    python -m benchmarks.suite run [--out FILE] [--quick]
+    python -m benchmarks.suite compare OLD.json NEW.json [--threshold 0.10]
+"""
+import os
+
+# Must be set before app.config is imported
+os.environ.setdefault("MODEL_ENABLED", "false")
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+import httpx
+from app.agent import Agent
+from app.calculators.math_engine import MathEngine
+from app.memory import SessionStore, set_last_country, get_last_country
+from app.router import route
+from app.tools import get_country_info
+from benchmarks.common import free_port, run_load, summarize, time_calls, print_table
+from test_api import TEST_QUESTIONS
+
+HEADERS = {"X-API-Key": "development-key"}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+EXPRESSIONS = ["2 + 2", "100 / 4", "(15 + 3) * 2 - 7", "2 ^ 10", "sqrt(144) + 3 * 4", "7 / 0"]
+COUNTRIES = ["Brazil", "france", "Japan", "Canada", "Germany", "nowhere"]
+# No rule answers these; with the model disabled they time the fallback path
+FALLBACK_QUESTIONS = ["Who wrote Hamlet?", "Why is the sky blue?", "Tell me a joke"]
+COMPOUND_QUESTIONS = ["What is the capital of France and the population of Japan?",
+                      "Compare the area of Brazil and Canada", "What is 2 + 2 and 3 * 4?"]
+CONCURRENCY = (1, 16, 64)
+
+def _by_intent() -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    for question in TEST_QUESTIONS + FALLBACK_QUESTIONS:
+        groups.setdefault(route(question).intent, []).append(question)
+    groups["compound"] = COMPOUND_QUESTIONS
+    return groups
+
+def _cycle(items: List[str], fn):
+    it = iter(items * 10 ** 6)
+    return lambda: fn(next(it))
+
+def micro(repeat: int) -> Dict[str, Dict[str, float]]:
+    """In-process latency of the agent per intent and of each tool."""
+    results = {}
+    agent = Agent(load_model=False)
+    agent._cache.max_size = 0  # every call answers in full
+    for intent, questions in sorted(_by_intent().items()):
+        results[f"agent.{intent}"] = summarize(time_calls(_cycle(questions, agent.process_question), repeat))
+
+    engine = MathEngine()
+    results["math_engine.calculate"] = summarize(time_calls(_cycle(EXPRESSIONS, engine.calculate), repeat))
+    results["tools.get_country_info"] = summarize(time_calls(_cycle(COUNTRIES, get_country_info), repeat))
+
+    results["memory.set_last_country"] = summarize(time_calls(
+        _cycle(COUNTRIES, lambda c: set_last_country(c, "bench")), repeat))
+    results["memory.get_last_country"] = summarize(time_calls(lambda: get_last_country("bench"), repeat))
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = SessionStore(db_path=os.path.join(tmp, "memory.sqlite3"), shared=True)
+        results["memory.shared.set"] = summarize(time_calls(
+            _cycle(COUNTRIES, lambda c: shared.set("bench", c)), repeat))
+        results["memory.shared.get"] = summarize(time_calls(lambda: shared.get("bench"), repeat))
+        shared.close()
+    return results
+
+def _start_api(port: int, tmp: str) -> subprocess.Popen:
+    env = {**os.environ, "MODEL_ENABLED": "false", "RATE_LIMIT": str(10 ** 9),
+           "LOG_LEVEL": "WARNING", "LOG_FILE": os.devnull,
+           # Load-test sessions stay out of the app's own database
+           "MEMORY_DB": os.path.join(tmp, "memory.sqlite3")}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    until = time.monotonic() + 60
+    while time.monotonic() < until:
+        if proc.poll() is not None:
+            raise RuntimeError("the API exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("the API did not start")
+
+def http(seconds: float) -> Dict[str, Dict[str, float]]:
+    """req/s and latency of /ask over all test questions, per concurrency level."""
+    results = {}
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = _start_api(port, tmp)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(run_load(base_url, TEST_QUESTIONS, 1, 4, HEADERS))  # warm-up
+            for concurrency in CONCURRENCY:
+                load = asyncio.run(run_load(base_url, TEST_QUESTIONS, seconds, concurrency, HEADERS))
+                summary = summarize(load["latencies"])
+                summary["rps"] = len(load["latencies"]) / seconds
+                summary["statuses"] = load["statuses"]
+                results[f"http.ask.c{concurrency}"] = summary
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    return results
+
+def _metadata(quick: bool) -> Dict[str, object]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "quick": quick,
+    }
+
+def run(out: str = None, quick: bool = False) -> str:
+    """Run every benchmark, print the tables and write the JSON file; returns its path."""
+    meta = _metadata(quick)
+    results = micro(500 if quick else 5000)
+    print_table("in process", results)
+    load = http(2 if quick else 10)
+    print_table("HTTP /ask", load)
+    for name, s in load.items():
+        print(f"{name:<48} {s['rps']:>9.1f} req/s  p95 {s['p95_ms']:.2f} ms  {s['statuses']}")
+    results.update(load)
+
+    out = out or os.path.join(RESULTS_DIR, f"{meta['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+    print(f"\nwrote {out}")
+    return out
+
+def compare(old_path: str, new_path: str, threshold: float = 0.10) -> int:
+    """
+    Print the change in p50/p99 (and req/s for HTTP) per benchmark.
+
+    Returns:
+        int: The number of metrics that got worse by more than `threshold`
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'benchmark':<32} {'metric':<7} {'old':>10} {'new':>10} {'change':>8}")
+    regressions = 0
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        a, b = old["results"][name], new["results"][name]
+        for metric, higher_is_better in (("p50_ms", False), ("p99_ms", False), ("rps", True)):
+            if metric not in a or metric not in b or not a[metric]:
+                continue
+            change = (b[metric] - a[metric]) / a[metric]
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            regressions += bool(flag)
+            print(f"{name[:32]:<32} {metric:<7} {a[metric]:>10.4f} {b[metric]:>10.4f} {change:>+8.1%}{flag}")
+    for name in sorted(set(old["results"]) ^ set(new["results"])):
+        print(f"{name[:32]:<32} only in {'old' if name in old['results'] else 'new'}")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--out", help="JSON file (default benchmarks/results/<commit>.json)")
+    run_parser.add_argument("--quick", action="store_true", help="fewer repeats and shorter load")
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args.out, args.quick)
+    else:
+        sys.exit(1 if compare(args.old, args.new, args.threshold) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
+import json
 import os
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -8,6 +10,8 @@ load_dotenv()
 
 # Get API key from environment variable or use a default for development
 API_KEY = os.getenv("API_KEY", "development-key")
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "30"))  # seconds
 
 st.set_page_config(page_title="Agentic AI Chat", layout="centered")
 st.title("🤖 Agentic AI Prototype")
@@ -16,6 +20,15 @@ st.title("🤖 Agentic AI Prototype")
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
+# One conversation id per browser session so follow-ups resolve correctly
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Render chat
+for message in st.session_state.chat_history:
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
 # Input field
 user_input = st.chat_input("Digite sua pergunta...")
 
@@ -23,28 +36,41 @@ user_input = st.chat_input("Digite sua pergunta...")
 if user_input:
     # Add question to history
     st.session_state.chat_history.append({"role": "user", "content": user_input})
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    with st.chat_message("agent"):
+        placeholder = st.empty()
+        answer = ""
+        try:
+            # Call FastAPI with API key and render the answer as it streams in
+            headers = {"X-API-Key": API_KEY}
+            with requests.post(
+                f"{API_URL}/ask/stream",
+                json={"questions": [user_input], "session_id": st.session_state.session_id},
+                headers=headers,
+                stream=True,
+                timeout=REQUEST_TIMEOUT
+            ) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        if event["type"] == "token":
+                            answer += event["text"]
+                        elif event.get("status") == "success":
+                            answer = event["response"] or ""
+                        else:
+                            answer = f"Erro: {event.get('error')}"
+                        placeholder.markdown(answer)
+                else:
+                    answer = f"Erro na requisição: {response.status_code} - {response.text}"
 
-    try:
-        # Call FastAPI with API key
-        headers = {"X-API-Key": API_KEY}
-        response = requests.get(
-            "http://localhost:8000/ask",
-            params={"question": user_input},
-            headers=headers
-        )
-        
-        if response.status_code == 200:
-            answer = response.json()["response"]
-        else:
-            answer = f"Erro na requisição: {response.status_code} - {response.text}"
-
-    except Exception as e:
-        answer = f"[Erro ao conectar ao backend]: {e}"
+        except Exception as e:
+            answer = f"[Erro ao conectar ao backend]: {e}"
+
+        placeholder.markdown(answer)
 
     # Add response to history
     st.session_state.chat_history.append({"role": "agent", "content": answer})
-
-# Render chat
-for message in st.session_state.chat_history:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
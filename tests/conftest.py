@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Must be set before app.config is imported: sessions written while testing
+# (MEMORY_PERSIST or MEMORY_SHARED in the environment) stay out of the app's
+# own database
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("MEMORY_DB", os.path.join(_tmp.name, "memory.sqlite3"))
@@ -1,4 +1,7 @@
-from app.agent import Agent
+from app.agent import Agent, AgentAnswer
+from app.dispatcher import Tool
+from app.tools import get_country_info
+import time
 import pytest
 import logging
 from unittest.mock import patch, MagicMock
@@ -15,6 +18,13 @@ def test_simple_math():
     response = agent.process_question("What is 2 + 2?")
     assert "4" in response
 
+def test_math_answers_are_exact():
+    # Whole results without ".0", others to 15 significant digits
+    agent = Agent()
+    assert agent.process_question("What is 100 / 4?") == "100 / 4 = 25"
+    assert agent.process_question("What is 10 / 3?") == "10 / 3 = 3.33333333333333"
+    assert agent.process_question("What is 2 ^ 70?") == "2 ^ 70 = 1180591620717411303424"
+
 def test_country_info():
     agent = Agent()
     response = agent.process_question("What is the capital of Brazil?")
@@ -78,7 +88,7 @@ def test_cache_miss(mock_get_cached):
 @patch('app.agent.Agent._get_cached_response')
 def test_cache_hit(mock_get_cached):
     agent = Agent()
-    mock_get_cached.return_value = "Cached response"
+    mock_get_cached.return_value = AgentAnswer("Cached response")
     
     response = agent.process_question("What is 5 + 5?")
     assert response == "Cached response"
@@ -88,4 +98,113 @@ def test_logging():
     with patch('logging.Logger.info') as mock_info:
         agent = Agent()
         agent.process_question("What is 2 + 2?")
-        assert mock_info.called 
\ No newline at end of file
+        assert mock_info.called
+
+def test_model_is_loaded_lazily():
+    agent = Agent()
+    agent.process_question("What is the capital of Brazil?")
+    assert not agent.model_loaded
+
+def test_model_disabled():
+    agent = Agent()
+    agent.model_enabled = False
+    with pytest.raises(RuntimeError):
+        agent.model
+
+def test_follow_up_uses_session():
+    agent = Agent()
+    agent.process_question("What is the capital of Japan?", session_id="s1")
+    agent.process_question("What is the capital of France?", session_id="s2")
+    assert "Tokyo" in agent.process_question("And its capital?", session_id="s1")
+    assert "Paris" in agent.process_question("And its capital?", session_id="s2")
+
+def test_cache_is_invalidated_when_country_data_changes():
+    from app.tools import update_country_info, COUNTRY_DATA
+    agent = Agent()
+    original = dict(COUNTRY_DATA["Japan"])
+    assert "Tokyo" in agent.process_question("What is the capital of Japan?")
+    try:
+        update_country_info("Japan", {**original, "capital": "Kyoto"})
+        assert "Kyoto" in agent.process_question("What is the capital of Japan?")
+    finally:
+        update_country_info("Japan", original)
+
+def test_cached_answer_still_updates_session_memory():
+    agent = Agent()
+    agent.process_question("What is the capital of France?", session_id="a")
+    agent.process_question("What is the capital of France?", session_id="b")
+    assert agent.cache_stats()["hits"] == 1
+    assert "Paris" in agent.process_question("And its capital?", session_id="b")
+
+def test_answer_reports_country_and_confidence():
+    agent = Agent()
+    exact = agent.answer("What is the capital of Germany?")
+    assert "Berlin" in exact.response
+    assert (exact.country, exact.confidence) == ("Germany", 1.0)
+
+    typo = agent.answer("What is the capital of Germny?")
+    assert "Berlin" in typo.response
+    assert typo.country == "Germany"
+    assert 0.5 < typo.confidence < 1.0
+
+    assert agent.answer("What is 2 + 2?").confidence is None
+
+def test_compound_question_answers_every_part():
+    agent = Agent()
+    answer = agent.answer("What is the capital of France and the population of Japan?", session_id="compound")
+    assert "Paris" in answer.response and "125,700,000" in answer.response
+    assert answer.country == "Japan"
+    assert "Tokyo" in agent.process_question("And its capital?", session_id="compound")
+
+    compared = agent.process_question("Compare the area of Brazil and Canada")
+    assert compared.endswith("Canada has the larger area.")
+
+def test_compound_question_names_parts_it_cannot_answer():
+    agent = Agent()
+    agent.model_enabled = False
+    response = agent.process_question("Who wrote Hamlet and what is the capital of France?")
+    assert response == "I couldn't answer \"Who wrote Hamlet\". The capital of France is Paris."
+
+def test_compound_question_generates_parts_no_rule_answers():
+    agent = Agent()
+    agent._model_available = lambda: True
+    agent.tools.register(Tool("generate", lambda question: f"Generated for {question}."))
+    response = agent.process_question("Who wrote Hamlet and what is the capital of France?")
+    assert response == "Generated for Who wrote Hamlet. The capital of France is Paris."
+
+def test_compound_question_shares_lookups():
+    agent = Agent()
+    calls = []
+
+    def country(name):
+        calls.append(name)
+        return get_country_info(name)
+
+    agent.tools.register(Tool("country", country))
+    response = agent.process_question("What is the capital, population and area of France?")
+    assert "Paris" in response and "67,390,000" in response and "551,695" in response
+    assert calls == ["France"]
+
+def test_compound_math_runs_concurrently():
+    agent = Agent()
+    calculate = agent.math_engine.calculate
+
+    def slow(expression):
+        time.sleep(0.2)
+        return calculate(expression)
+
+    agent.math_engine.calculate = slow
+    start = time.perf_counter()
+    response = agent.process_question("What is 2 + 2, 3 * 4 and 5 - 1?")
+    assert time.perf_counter() - start < 0.5
+    assert response == "2 + 2 = 4. 3 * 4 = 12. 5 - 1 = 4."
+
+def test_timeouts_are_not_cached():
+    agent = Agent()
+    agent.tools.register(Tool("math", lambda expression: time.sleep(0.2), timeout=0.05))
+    assert "took too long" in agent.process_question("What is 6 * 7?")
+    assert "took too long" in agent.process_question("What is the area of Brazil multiplied by 2?")
+    assert agent.cache_stats()["size"] == 0
+
+    agent.tools.register(Tool("math", agent._calculate))
+    assert agent.process_question("What is 6 * 7?") == "6 * 7 = 42"
@@ -0,0 +1,79 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from app.agent import Agent
+from app.batch import process_batch
+from app.main import app
+
+HEADERS = {"X-API-Key": "development-key"}
+
+def test_results_keep_input_order():
+    agent = Agent()
+    items = [("What is 2 + 2?", None), ("What is the capital of Japan?", None), ("Who are you?", None)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = process_batch(items, agent.process_question, pool)
+    assert [r["question"] for r in results] == [q for q, _ in items]
+    assert all(r["status"] == "success" for r in results)
+    assert "4" in results[0]["response"]
+    assert "Tokyo" in results[1]["response"]
+
+def test_identical_questions_are_answered_once():
+    calls = []
+
+    def answer(question, session_id):
+        calls.append(question)
+        return question.upper()
+
+    items = [("What is 2 + 2?", None), ("what is 2 + 2?", None), ("What is 3 + 3?", None)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = process_batch(items, answer, pool)
+    assert len(calls) == 2
+    assert results[1]["response"] == "WHAT IS 2 + 2?"
+
+def test_sessions_run_in_order():
+    agent = Agent()
+    items = [
+        ("What is the capital of Japan?", "s1"),
+        ("What is the capital of France?", "s2"),
+        ("And its capital?", "s1"),
+        ("And its capital?", "s2"),
+    ]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = process_batch(items, agent.process_question, pool)
+    assert "Tokyo" in results[2]["response"]
+    assert "Paris" in results[3]["response"]
+
+def test_empty_question_is_reported_per_item():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        results = process_batch([("", None), ("Who are you?", None)], Agent().process_question, pool)
+    assert results[0]["status"] == "error"
+    assert results[1]["status"] == "success"
+
+def test_batch_endpoint():
+    client = TestClient(app)
+    response = client.post("/ask/batch", headers=HEADERS, json={
+        "questions": ["What is 2 + 2?", {"question": "What is the capital of Brazil?", "session_id": "x"}]
+    })
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert "Brasília" in results[1]["response"]
+
+def test_stream_endpoint_ndjson():
+    client = TestClient(app)
+    response = client.post("/ask/stream", headers=HEADERS, json={
+        "questions": ["What is 2 + 2?", "Who are you?", "What is 2 + 2?"]
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(e["index"] for e in events) == [0, 1, 2]
+    assert all(e["type"] == "answer" and e["status"] == "success" for e in events)
+
+def test_stream_endpoint_sse():
+    client = TestClient(app)
+    response = client.post("/ask/stream?format=sse", headers=HEADERS, json={"questions": ["Who are you?"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: answer" in response.text
+    assert response.text.rstrip().endswith("event: end\ndata: {}")
@@ -0,0 +1,82 @@
+import time
+import numpy as np
+from app.cache import TTLCache, SemanticCache
+
+def test_hits_and_misses():
+    cache = TTLCache(max_size=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_zero_size_disables_cache():
+    cache = TTLCache(max_size=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+def bag_of_words(text):
+    # Toy embedding: one dimension per known word, punctuation ignored
+    vocab = ["who", "wrote", "author", "hamlet", "macbeth", "sky", "blue", "why"]
+    words = text.replace("?", "").split()
+    return np.array([float(w in words) + float(w == "wrote" and "author" in words) for w in vocab])
+
+def test_semantic_cache_hits_similar_questions():
+    cache = SemanticCache(bag_of_words, max_size=10, threshold=0.8)
+    assert cache.get("Who wrote Hamlet?") is None
+    cache.set("Who wrote Hamlet?", "Shakespeare")
+    assert cache.get("who wrote hamlet") == "Shakespeare"
+    assert cache.get("Who wrote Macbeth?") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+    assert stats["hit_rate"] == 1 / 3
+
+def test_semantic_cache_rejects_near_misses_about_something_else():
+    cache = SemanticCache(bag_of_words, max_size=10, threshold=0.5)
+    cache.set("Who wrote Hamlet?", "Shakespeare")
+    # Similar enough for the threshold, but another play
+    assert cache.get("Who wrote Macbeth?") is None
+    assert cache.get("who wrote macbeth") is None
+    assert cache.get("Hamlet author?") == "Shakespeare"
+    assert cache.stats()["rejected"] == 2
+
+def test_semantic_cache_rejects_different_numbers():
+    cache = SemanticCache(lambda text: np.ones(3), max_size=10, threshold=0.9)
+    cache.set("What is 15% of 200?", "30")
+    assert cache.get("What is 15% of 300?") is None
+    assert cache.get("what is 15% of 200") == "30"
+
+def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(bag_of_words, max_size=2, threshold=0.99)
+    cache.set("who wrote hamlet", "Shakespeare")
+    cache.set("why is the sky blue", "Scattering")
+    cache.get("who wrote hamlet")
+    cache.set("who wrote macbeth", "Also Shakespeare")
+    assert cache.get("why is the sky blue") is None
+    assert cache.get("who wrote hamlet") == "Shakespeare"
+    assert cache.get("who wrote macbeth") == "Also Shakespeare"
+    assert cache.stats()["evictions"] == 1
+
+def test_semantic_cache_can_be_disabled():
+    cache = SemanticCache(bag_of_words, max_size=0, threshold=0.8)
+    cache.set("who wrote hamlet", "Shakespeare")
+    assert cache.get("who wrote hamlet") is None
+    assert len(cache) == 0
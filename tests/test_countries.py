@@ -0,0 +1,97 @@
+from app.countries import Country, CountryKnowledgeBase, knowledge_base, normalize
+from app.router import FALLBACK, INFO, route
+from app.tools import get_country_info
+
+def test_dataset_loaded():
+    assert len(knowledge_base) > 240
+    assert knowledge_base["Japan"] == {"capital": "Tokyo", "population": 125700000, "area": 377975}
+
+def test_alias_lookup():
+    assert knowledge_base.lookup("USA").name == "United States"
+    assert knowledge_base.lookup("Deutschland").name == "Germany"
+    assert knowledge_base.lookup("brasil").name == "Brazil"
+    assert knowledge_base.lookup("  COTE D'IVOIRE ").name == "Côte d'Ivoire"
+    assert knowledge_base.lookup("St. Lucia").name == "Saint Lucia"
+    assert knowledge_base.lookup("the Gambia").name == "Gambia"
+    assert knowledge_base.lookup("Narnia") is None
+
+def test_normalize():
+    assert normalize("Côte d'Ivoire") == normalize("cote divoire") == "cote divoire"
+    assert normalize("Guinea-Bissau") == "guinea bissau"
+    assert normalize("St Kitts & Nevis") == "saint kitts and nevis"
+
+def test_get_country_info_compatible():
+    assert get_country_info("brazil") == {"capital": "Brasília", "population": 214300000, "area": 8515770}
+    assert get_country_info("narnia") == {"error": "Country Narnia not found"}
+
+def test_update_and_add():
+    kb = CountryKnowledgeBase([Country("Japan", "Tokyo", 1, 2, ("Nippon",))])
+    kb.update("nippon", {"capital": "Kyoto", "population": 3, "area": 4})
+    assert kb["Japan"]["capital"] == "Kyoto"
+    kb.update("atlantis", {"capital": "Poseidonia", "population": 5, "area": 6})
+    assert list(kb) == ["Japan", "Atlantis"]
+    kb.add(Country("Japan", "Tokyo", 1, 2))
+    assert kb.lookup("nippon") is None
+    assert kb["japan"]["capital"] == "Tokyo"
+
+def test_router_uses_aliases():
+    r = route("What is the capital of Deutschland?")
+    assert r.intent == INFO
+    assert r.country == "Germany"
+    r = route("Tell me about Nigeria")
+    assert r.intent == FALLBACK
+    assert r.country == "Nigeria"
+    # Whole words only: "woman" does not mention Oman
+    assert route("Tell me about the woman").country is None
+
+def test_mentions_are_word_bounded():
+    found = knowledge_base.mentions("Nigeria and Romania, not Niger")
+    assert [m.country.name for m in found] == ["Nigeria", "Romania", "Niger"]
+    assert knowledge_base.mentions("the woman can tell us") == []
+
+def test_mentions_prefer_longest_name():
+    text = "Is Papua New Guinea bigger than Brazil's neighbours?"
+    found = knowledge_base.mentions(text)
+    assert [m.country.name for m in found] == ["Papua New Guinea", "Brazil"]
+    assert text[found[0].start:found[0].end] == "Papua New Guinea"
+    assert knowledge_base.mentions("st. kitts & nevis")[0].country.name == "Saint Kitts and Nevis"
+
+def test_mentions_see_added_countries():
+    kb = CountryKnowledgeBase([Country("Japan", "Tokyo", 1, 2)])
+    assert kb.mentions("atlantis and japan")[0].country.name == "Japan"
+    kb.update("Atlantis", {"capital": "Poseidonia", "population": 5, "area": 6})
+    assert [m.country.name for m in kb.mentions("atlantis and japan")] == ["Atlantis", "Japan"]
+
+def test_router_extracts_country_from_capture():
+    r = route("What is the capital of beautiful Brazil?")
+    assert r.intent == INFO
+    assert r.country == "Brazil"
+
+def test_resolve_tolerates_typos():
+    assert knowledge_base.resolve("Germany") == (knowledge_base.lookup("Germany"), 1.0)
+    for typo, name in [("germny", "Germany"), ("Cnada", "Canada"), ("japn", "Japan"),
+                       ("Untied States", "United States"), ("Kazakstan", "Kazakhstan")]:
+        resolution = knowledge_base.resolve(typo)
+        assert resolution.country.name == name
+        assert 0.5 < resolution.confidence < 1.0
+
+def test_resolve_rejects_distant_and_short_names():
+    # Ordinary words near a short name are not countries
+    assert knowledge_base.resolve("woman") is None
+    assert knowledge_base.resolve("while") is None
+    assert knowledge_base.resolve("Narnia") is None
+    assert knowledge_base.resolve("ira") is None
+    assert knowledge_base.resolve("germny", max_distance=0) is None
+
+def test_resolve_sees_added_countries():
+    kb = CountryKnowledgeBase([Country("Japan", "Tokyo", 1, 2)])
+    assert kb.resolve("atlantys") is None
+    kb.update("Atlantis", {"capital": "Poseidonia", "population": 5, "area": 6})
+    assert kb.resolve("atlantys").country.name == "Atlantis"
+
+def test_router_corrects_misspelled_country():
+    r = route("What is the capital of Germny?")
+    assert r.intent == INFO
+    assert r.country == "Germany"
+    assert r.confidence < 1.0
+    assert route("What is the capital of Germany?").confidence == 1.0
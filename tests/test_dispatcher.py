@@ -0,0 +1,62 @@
+import threading
+import time
+import pytest
+from app.agent import Agent
+from app.dispatcher import Dispatcher, Tool, ToolTimeoutError, EXPENSIVE
+from app.metrics import Histogram
+
+def test_cacheable_tools_are_called_once_per_argument():
+    calls = []
+    dispatcher = Dispatcher()
+    dispatcher.register(Tool("square", lambda x: calls.append(x) or x * x, cacheable=True))
+    assert [dispatcher.call("square", 3) for _ in range(3)] == [9, 9, 9]
+    assert calls == [3]
+    stats = dispatcher.stats()["square"]
+    assert stats["calls"] == 1
+    assert stats["cache"]["hits"] == 2
+
+def test_timeout():
+    release = threading.Event()
+    dispatcher = Dispatcher()
+    dispatcher.register(Tool("slow", release.wait, EXPENSIVE, timeout=0.05))
+    with pytest.raises(ToolTimeoutError):
+        dispatcher.call("slow", 5)
+    release.set()
+    assert dispatcher.stats()["slow"]["timeouts"] == 1
+
+def test_concurrency_limit_holds_slots_until_calls_end():
+    release = threading.Event()
+    dispatcher = Dispatcher()
+    dispatcher.register(Tool("slow", release.wait, EXPENSIVE, timeout=0.05, max_concurrency=1))
+    with pytest.raises(ToolTimeoutError):
+        dispatcher.call("slow", 5)
+    # The abandoned call still runs, so there is no slot for a second one
+    with pytest.raises(ToolTimeoutError, match="no free slot"):
+        dispatcher.call("slow", 5)
+    release.set()
+    time.sleep(0.05)
+    assert dispatcher.call("slow", 5) is True
+
+def test_errors_are_counted_and_raised():
+    dispatcher = Dispatcher()
+    dispatcher.register(Tool("fail", lambda: 1 / 0))
+    with pytest.raises(ZeroDivisionError):
+        dispatcher.call("fail")
+    stats = dispatcher.stats()["fail"]
+    assert (stats["calls"], stats["errors"]) == (1, 1)
+    assert stats["latency"]["count"] == 1
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for seconds in (0.0005, 0.0005, 0.005, 0.05, 5):
+        histogram.observe(seconds)
+    assert histogram.cumulative() == [2, 3, 4, 5]
+    assert histogram.quantile(0.4) == 0.001
+    assert histogram.quantile(0.8) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+
+def test_agent_uses_math_engine_through_dispatcher():
+    agent = Agent()
+    assert agent.process_question("What is 100 / 4?") == "100 / 4 = 25"
+    assert "division by zero" in agent.process_question("What is 7 / 0?")
+    assert agent.tool_stats()["math"]["calls"] == 2
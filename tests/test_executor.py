@@ -0,0 +1,59 @@
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app import main
+from app.executor import BoundedExecutor, QueueFullError
+
+def test_rejects_when_full():
+    executor = BoundedExecutor(max_workers=1, queue_depth=1)
+    release = threading.Event()
+    first = executor.submit(release.wait)
+    second = executor.submit(release.wait)
+    with pytest.raises(QueueFullError):
+        executor.submit(release.wait)
+    assert executor.rejected == 1
+
+    release.set()
+    first.result()
+    second.result()
+    executor.submit(lambda: None).result()
+    assert executor.in_flight == 0
+    executor.shutdown()
+
+def test_ask_returns_503_when_queue_is_full(monkeypatch):
+    def busy(*args):
+        raise QueueFullError("full")
+
+    monkeypatch.setattr(main.agent_executor, "submit", busy)
+    client = TestClient(main.app)
+    response = client.get("/ask", params={"question": "Who are you?"}, headers={"X-API-Key": "development-key"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+def test_reserve_holds_a_slot_until_released():
+    executor = BoundedExecutor(max_workers=1, queue_depth=0)
+    release = executor.reserve()
+    with pytest.raises(QueueFullError):
+        executor.reserve()
+    release()
+    release()  # a second call does not free another slot
+    assert executor.in_flight == 0
+    executor.reserve()
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: None)
+    executor.shutdown()
+
+def test_stream_returns_503_when_queue_is_full(monkeypatch):
+    def busy():
+        raise QueueFullError("full")
+
+    client = TestClient(main.app)
+    response = client.post("/ask/stream", json={"questions": ["Who are you?"]},
+                           headers={"X-API-Key": "development-key"})
+    assert response.status_code == 200
+    assert main.agent_executor.in_flight == 0
+
+    monkeypatch.setattr(main.agent_executor, "reserve", busy)
+    response = client.post("/ask/stream", json={"questions": ["Who are you?"]},
+                           headers={"X-API-Key": "development-key"})
+    assert response.status_code == 503
@@ -0,0 +1,92 @@
+import threading
+import pytest
+from app.agent import Agent
+from app.config import Config
+from app.generation import MicroBatcher
+
+def echo_batch(calls):
+    def generate_batch(prompts):
+        calls.append(list(prompts))
+        return [(prompt.upper(), len(prompt)) for prompt in prompts]
+    return generate_batch
+
+def test_concurrent_prompts_share_a_batch():
+    calls = []
+    batcher = MicroBatcher(echo_batch(calls), max_batch_size=8, max_wait=0.2)
+    prompts = [f"question {i}" for i in range(8)]
+    futures = [batcher.submit(p) for p in prompts]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert [r.text for r in results] == [p.upper() for p in prompts]
+    assert [r.tokens for r in results] == [len(p) for p in prompts]
+    # All eight arrived within the wait, so one call served them
+    assert len(calls) == 1
+    assert all(r.batch_size == 8 for r in results)
+
+def test_batches_are_capped():
+    calls = []
+    batcher = MicroBatcher(echo_batch(calls), max_batch_size=3, max_wait=0.2)
+    futures = [batcher.submit(str(i)) for i in range(7)]
+    assert [f.result(timeout=5).text for f in futures] == [str(i) for i in range(7)]
+    assert all(len(call) <= 3 for call in calls)
+    assert sum(len(call) for call in calls) == 7
+
+def test_lone_prompt_waits_at_most_max_wait():
+    batcher = MicroBatcher(echo_batch([]), max_batch_size=32, max_wait=0.01)
+    result = batcher.generate("hello", timeout=5)
+    assert result.text == "HELLO"
+    assert result.batch_size == 1
+    assert result.queue_wait < 1
+
+def test_errors_reach_every_caller_in_the_batch():
+    def failing(prompts):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher(failing, max_batch_size=4, max_wait=0.1)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    # The worker survives a failed batch
+    batcher.generate_batch = echo_batch([])
+    assert batcher.generate("c", timeout=5).text == "C"
+
+def test_stats():
+    batcher = MicroBatcher(echo_batch([]), max_batch_size=4, max_wait=0.05)
+    threads = [threading.Thread(target=batcher.generate, args=("abcd",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = batcher.stats()
+    assert stats["requests"] == 4
+    assert stats["tokens"] == 16
+    assert stats["mean_batch_size"] == 4 / stats["batches"]
+    assert stats["tokens_per_second"] > 0
+    assert stats["queue_wait_p95_ms"] >= 0
+
+def test_agent_falls_back_to_the_model():
+    agent = Agent()
+    agent._model = object()  # pretend the model is loaded
+    agent._semantic_cache._embed = lambda q: [1.0]
+    agent.generator.generate_batch = lambda prompts: [("Because of Rayleigh scattering.", 7)] * len(prompts)
+    answer = agent.answer("Why is the sky blue?")
+    assert answer.response == "Because of Rayleigh scattering."
+    assert answer.country is None
+
+def test_agent_without_model_keeps_fallback_reply():
+    agent = Agent()
+    agent.model_enabled = False
+    assert "couldn't process" in agent.process_question("Why is the sky blue?")
+
+def test_agent_reuses_generated_answers_for_paraphrases(monkeypatch):
+    monkeypatch.setattr(Config, "SEMANTIC_CACHE_ENABLED", True)
+    calls = []
+    agent = Agent()
+    agent._model = object()
+    agent.generator.generate_batch = echo_batch(calls)
+    agent._semantic_cache._embed = lambda q: [1.0, 0.0] if "hamlet" in q else [0.0, 1.0]
+    first = agent.answer("Who wrote Hamlet?").response
+    assert agent.answer("Hamlet author?").response == first
+    assert len(calls) == 1
+    assert agent.semantic_cache_stats()["hits"] == 1
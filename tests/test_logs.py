@@ -0,0 +1,63 @@
+import json
+import logging
+import queue
+from fastapi.testclient import TestClient
+from app import main
+from app.config import Config
+from app.executor import BoundedExecutor
+from app.logs import (JsonFormatter, LogWriter, SamplingFilter, SAMPLED, logging_stats, request_id,
+                      setup_logging)
+
+def _record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_formats_lazily_and_keeps_request_id():
+    entry = json.loads(JsonFormatter().format(_record("Processing question: %s", "Olá?", request_id="abc")))
+    assert entry["message"] == "Processing question: Olá?"
+    assert entry["request_id"] == "abc"
+    assert entry["level"] == "INFO"
+
+def test_sampling_keeps_an_even_fraction_of_marked_info_lines():
+    sampler = SamplingFilter(0.25)
+    kept = sum(sampler.filter(_record("q", **SAMPLED)) for _ in range(100))
+    assert kept == 25
+    assert sampler.filter(_record("unmarked"))
+    assert sampler.filter(_record("boom", level=logging.ERROR, **SAMPLED))
+
+def test_writer_flushes_in_batches(tmp_path):
+    log_queue = queue.Queue()
+    path = tmp_path / "agent.log"
+    with open(path, "w") as stream:
+        writer = LogWriter(log_queue, [(stream, JsonFormatter())], batch_size=50)
+        for i in range(200):
+            log_queue.put(_record("line %d", i))
+        writer.start()
+        writer.stop()
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["message"] for line in lines] == [f"line {i}" for i in range(200)]
+    assert writer.flushes == 4
+
+def test_setup_logging_writes_json_lines_with_request_id(tmp_path):
+    path = tmp_path / "agent.log"
+    setup_logging("INFO", log_file=str(path), console=False)
+    try:
+        executor = BoundedExecutor(max_workers=1, queue_depth=0)
+        token = request_id.set("req-1")
+        try:
+            executor.submit(logging.getLogger("app.test").info, "in a worker: %s", 42).result()
+        finally:
+            request_id.reset(token)
+        logging.getLogger("app.test").debug("below the level")
+        executor.shutdown()
+    finally:
+        setup_logging(Config.LOG_LEVEL, log_file=Config.LOG_FILE, text_format=Config.LOG_FORMAT)
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(e["request_id"], e["message"]) for e in entries] == [("req-1", "in a worker: 42")]
+    assert logging_stats()["dropped"] == 0
+
+def test_request_id_header_is_echoed_or_generated():
+    client = TestClient(main.app)
+    assert client.get("/ping", headers={"X-Request-ID": "abc123"}).headers["x-request-id"] == "abc123"
+    assert len(client.get("/ping").headers["x-request-id"]) == 16
@@ -1,3 +1,6 @@
+import time
+import numpy as np
+import pytest
 from app.calculators.math_engine import MathEngine
 
 def test_basic_calculations():
@@ -61,4 +64,65 @@ def test_expression_cleaning():
     
     # Test with different division symbols
     result = engine.calculate("6÷2")
-    assert result["result"] == "3" 
\ No newline at end of file
+    assert result["result"] == "3" 
+def test_numeric_and_symbolic_tiers_agree():
+    engine = MathEngine()
+    for expression in ["2 + 2", "10 / 4", "3.14 * 2", "(2 + 3) * 4 - 7 / 2", "2^0.5"]:
+        clean = engine._clean_expression(expression)
+        fast = engine._calculate_numeric(clean)
+        slow = engine._calculate_symbolic(clean)
+        assert abs(float(fast["result"]) - float(slow["result"])) < 1e-9
+
+def test_result_format():
+    engine = MathEngine()
+    assert engine.calculate("100 / 4") == {
+        "result": "25", "steps": ["Dividing: (100, 4)"], "type": "integer", "expression": "100/4"}
+    assert engine.calculate("10 / 3")["result"] == "3.33333333333333"
+    assert engine.calculate("0.1 + 0.2")["result"] == "0.3"
+    assert engine.calculate("2.5 * 2")["result"] == "5"
+
+def test_symbolic_fallback():
+    engine = MathEngine()
+    # Division by zero cannot be represented by the numeric tier
+    result = engine.calculate("7 / 0")
+    assert result["type"] == "complex"
+
+def test_oversized_expression_is_rejected():
+    engine = MathEngine()
+    result = engine.calculate("9^9^9")
+    assert "error" in result
+
+def test_division_by_zero_does_not_skip_the_budgets():
+    engine = MathEngine()
+    start = time.perf_counter()
+    assert "error" in engine.calculate("1/0+9^9^9")
+    assert "error" in engine.calculate("9^9^9*(2/0)")
+    assert time.perf_counter() - start < 1
+    assert engine.calculate("1/0+9^9")["type"] == "complex"
+
+def test_calculate_many_matches_calculate():
+    engine = MathEngine()
+    expressions = [
+        "2 + 2", "3 * 4", "10 / 2", "10 / 4", "3.14 * 2", "0.1 + 0.2", "(2 + 3) * 4 - 7 / 2",
+        "2^10", "2^(0-3)", "(0.5)^3", "5 - 10", "1 / 3 * 3", "1.2.3", "2 + abc", "",
+        "7 / 0", "2^0.5", "2^100", "99999999999 * 99999999999 - 99999999999 * 99999999998",
+        "1^20000", "007 + 1",
+    ]
+    assert engine.calculate_many(expressions) == [engine.calculate(e) for e in expressions]
+
+def test_calculate_many_groups_by_shape():
+    engine = MathEngine()
+    expressions = [f"{a} * {b} + 0.5" for a in range(20) for b in range(20)]
+    results = engine.calculate_many(expressions)
+    assert results == [engine.calculate(e) for e in expressions]
+    assert results[21]["result"] == "1.5"
+    assert results[21]["steps"] == ["Adding terms: (1 * 1, 0.5)"]
+
+def test_evaluate_template():
+    engine = MathEngine()
+    x = np.arange(5)
+    result = engine.evaluate_template("x ^ 2 + k / 2", x=x, k=3)
+    assert result.tolist() == [1.5, 2.5, 5.5, 10.5, 17.5]
+
+    with pytest.raises(ValueError):
+        engine.evaluate_template("x + y", x=x)
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import time
+import pytest
+from app.memory import SessionStore
+
+def test_sessions_are_isolated():
+    store = SessionStore()
+    store.set("alice", "Brazil")
+    store.set("bob", "Japan")
+    assert store.get("alice") == "Brazil"
+    assert store.get("bob") == "Japan"
+    assert store.get("carol") is None
+
+def test_lru_eviction():
+    store = SessionStore(max_size=2)
+    store.set("a", "Brazil")
+    store.set("b", "Japan")
+    store.get("a")
+    store.set("c", "France")
+    assert store.get("b") is None
+    assert store.get("a") == "Brazil"
+    assert store.get("c") == "France"
+
+def test_ttl_expiry():
+    store = SessionStore(ttl=0.01)
+    store.set("a", "Brazil")
+    time.sleep(0.02)
+    assert store.get("a") is None
+
+def test_write_behind_persistence(tmp_path):
+    db_path = str(tmp_path / "memory.sqlite3")
+    store = SessionStore(db_path=db_path, flush_interval=60)
+    store.set("alice", "Canada")
+    store.flush()
+    store.close()
+
+    reloaded = SessionStore(db_path=db_path)
+    assert reloaded.get("alice") == "Canada"
+    assert reloaded.get("bob") is None
+    reloaded.close()
+
+def test_expired_sessions_are_deleted_from_sqlite(tmp_path):
+    store = SessionStore(ttl=60, db_path=str(tmp_path / "memory.sqlite3"), shared=True, cleanup_every=2)
+    store._write([("old", "Brazil", time.time() - 120)])
+    store.set("new", "Japan")
+    with store._pool.connection() as conn:
+        rows = conn.execute("SELECT session_id FROM sessions").fetchall()
+    assert rows == [("new",)]
+
+def test_failed_write_is_rolled_back(tmp_path):
+    store = SessionStore(db_path=str(tmp_path / "memory.sqlite3"), shared=True)
+    with pytest.raises(sqlite3.Error):
+        store._write([("alice", "Brazil", time.time()), ("bob",)])
+    # Both pooled connections are usable again
+    store.set("alice", "Japan")
+    store.set("bob", "Peru")
+    assert (store.get("alice"), store.get("bob")) == ("Japan", "Peru")
+
+def test_shared_store_is_seen_by_other_workers_at_once(tmp_path):
+    db_path = str(tmp_path / "memory.sqlite3")
+    worker_a = SessionStore(db_path=db_path, shared=True)
+    worker_b = SessionStore(db_path=db_path, shared=True)
+    worker_a.set("alice", "Brazil")
+    assert worker_b.get("alice") == "Brazil"
+    worker_b.set("alice", "Japan")
+    assert worker_a.get("alice") == "Japan"
+
+def test_forked_worker_uses_its_own_connections(tmp_path):
+    store = SessionStore(db_path=str(tmp_path / "memory.sqlite3"), shared=True)
+    store.set("alice", "Brazil")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            store.set("bob", store.get("alice"))
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    assert store.get("bob") == "Brazil"
@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+from app import main
+import json
+import os
+from app.metrics import Registry, SharedMetrics, STAGES, stage_timer, timed
+
+HEADERS = {"X-API-Key": "development-key"}
+
+def test_render_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("endpoint",))
+    latency = registry.histogram("latency_seconds", "Latency", ("stage",))
+    requests.inc("/ask")
+    requests.inc("/ask")
+    latency.labels("routing").observe(0.0003)
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="/ask"} 2' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="routing",le="0.00025"} 0' in text
+    assert 'latency_seconds_bucket{stage="routing",le="0.0005"} 1' in text
+    assert 'latency_seconds_bucket{stage="routing",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{stage="routing"} 1' in text
+    assert text.endswith("\n")
+
+def test_stage_timer_and_timed_record_one_observation_per_call():
+    before = STAGES.labels("test_stage").snapshot()["count"]
+    with stage_timer("test_stage"):
+        pass
+
+    @timed("test_stage")
+    def fail():
+        raise ValueError
+
+    try:
+        fail()
+    except ValueError:
+        pass
+    assert STAGES.labels("test_stage").snapshot()["count"] == before + 2
+
+def test_metrics_endpoint_counts_requests_and_rejections(monkeypatch):
+    client = TestClient(main.app)
+    before = main.REQUESTS.value("/ask", "200")
+    client.get("/ask", params={"question": "What is the capital of Japan?"}, headers=HEADERS)
+    assert main.REQUESTS.value("/ask", "200") == before + 1
+
+    rejected = main.REJECTIONS.value("rate_limit")
+    monkeypatch.setattr(main.rate_limiter, "allow", lambda key: False)
+    assert client.get("/ask", params={"question": "Who are you?"}, headers=HEADERS).status_code == 429
+    assert main.REJECTIONS.value("rate_limit") == rejected + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'agent_requests_total{endpoint="/ask",status="429"}' in response.text
+    assert 'agent_stage_duration_seconds_count{stage="routing"}' in response.text
+    assert 'agent_stage_duration_seconds_count{stage="country_lookup"}' in response.text
+
+def _worker_registry(requests: int, latency: float) -> Registry:
+    registry = Registry()
+    registry.counter("requests_total", "Requests", ("endpoint",)).inc("/ask", amount=requests)
+    registry.histogram("latency_seconds", "Latency", ("stage",)).labels("routing").observe(latency)
+    return registry
+
+def test_shared_metrics_sum_every_worker(tmp_path):
+    shared = SharedMetrics(str(tmp_path), _worker_registry(2, 0.0003))
+    # Another worker's file, and the archive of one that exited
+    with open(tmp_path / "99999999.json", "w") as f:
+        json.dump(_worker_registry(3, 0.002).state(), f)
+    with open(tmp_path / "99999998.json", "w") as f:
+        json.dump(_worker_registry(4, 0.002).state(), f)
+    shared.archive(99999998)
+    assert not os.path.exists(tmp_path / "99999998.json")
+
+    text = shared.render()
+    assert 'requests_total{endpoint="/ask"} 9' in text
+    assert 'latency_seconds_bucket{stage="routing",le="0.0005"} 1' in text
+    assert 'latency_seconds_count{stage="routing"} 3' in text
+
+def test_registry_reset_zeroes_in_place():
+    registry = _worker_registry(2, 0.0003)
+    histogram = registry.histogram("latency_seconds", "Latency", ("stage",)).labels("routing")
+    registry.reset()
+    assert histogram.snapshot()["count"] == 0
+    assert 'requests_total{endpoint="/ask"}' not in registry.render()
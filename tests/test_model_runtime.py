@@ -0,0 +1,18 @@
+import os
+import pytest
+from app import model_runtime
+from app.config import Config
+
+def test_unknown_runtime_is_rejected_before_loading():
+    with pytest.raises(ValueError):
+        model_runtime.load("google/flan-t5-base", "fp16")
+
+def test_artifact_path_is_per_model_and_runtime(monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_ARTIFACT_DIR", "/tmp/models")
+    assert model_runtime.artifact_path("google/flan-t5-base", "onnx") == \
+        os.path.join("/tmp/models", "google--flan-t5-base-onnx")
+
+def test_config_rejects_unknown_runtime(monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_RUNTIME", "tensorrt")
+    with pytest.raises(ValueError):
+        Config.validate()
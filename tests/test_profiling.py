@@ -0,0 +1,58 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from app import main
+from app.profiling import RequestProfiler
+
+HEADERS = {"X-API-Key": "development-key"}
+
+def test_disabled_profiler_calls_through(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    assert profiler.call(lambda x: x * 2, 21) == 42
+    assert profiler.list() == []
+    assert not profiler.authorized("")
+
+def test_one_in_n_calls_is_sampled(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), sample_every=3)
+    assert [profiler.call(abs, -i) for i in range(6)] == [0, 1, 2, 3, 4, 5]
+    assert [p["call"] for p in profiler.list()] == ["abs(-5,)", "abs(-2,)"]
+    assert all(p["reason"] == "sampled" for p in profiler.list())
+
+def test_header_profiles_the_request_and_endpoints_list_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.profiler, "directory", str(tmp_path))
+    monkeypatch.setattr(main.profiler, "token", "secret")
+    client = TestClient(main.app)
+
+    client.get("/ask", params={"question": "What is the capital of Japan?"}, headers=HEADERS)
+    assert client.get("/profiles", headers=HEADERS).json()["profiles"] == []
+
+    response = client.get("/ask", params={"question": "What is the capital of Japan?"},
+                          headers={**HEADERS, "X-Profile": "secret", "X-Request-ID": "req-42"})
+    assert "Tokyo" in response.json()["response"]
+    profiles = client.get("/profiles", headers=HEADERS).json()["profiles"]
+    assert len(profiles) == 1
+    assert profiles[0]["request_id"] == "req-42"
+    assert profiles[0]["reason"] == "header"
+
+    profile = client.get(f"/profiles/{profiles[0]['id']}", headers=HEADERS).json()
+    assert "cumulative" in profile["summary"]
+    raw = client.get(f"/profiles/{profiles[0]['id']}/raw", headers=HEADERS)
+    assert raw.status_code == 200 and raw.content
+    assert client.get("/profiles/../../etc", headers=HEADERS).status_code == 404
+    assert "PROFILE_TOKEN" not in client.get("/config", headers=HEADERS).json()
+
+def test_ring_keeps_the_newest_profiles(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), max_profiles=3, sample_every=1)
+    for i in range(5):
+        profiler.call(sum, [i])
+    assert [p["call"] for p in profiler.list()] == ["sum([4],)", "sum([3],)", "sum([2],)"]
+    assert len(os.listdir(tmp_path)) == 6
+
+def test_unsaved_profile_does_not_change_the_outcome(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    profiler = RequestProfiler(str(blocker / "profiles"), sample_every=1)
+    assert profiler.call(abs, -1) == 1
+    with pytest.raises(ZeroDivisionError):
+        profiler.call(lambda: 1 / 0)
+    assert profiler.list() == []
@@ -0,0 +1,41 @@
+from app.ratelimit import SlidingWindowLimiter, SQLiteSlidingWindowLimiter
+
+def test_limit_is_enforced_per_key():
+    limiter = SlidingWindowLimiter(limit=3, window=60)
+    assert all(limiter.allow("a", now=0) for _ in range(3))
+    assert not limiter.allow("a", now=1)
+    assert limiter.allow("b", now=1)
+
+def test_window_slides():
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    limiter.allow("a", now=0)
+    limiter.allow("a", now=0)
+    assert not limiter.allow("a", now=59)
+    # Halfway into the next window about half of the old requests still count
+    assert limiter.allow("a", now=90)
+    assert not limiter.allow("a", now=90)
+    assert limiter.allow("a", now=200)
+
+def test_idle_keys_are_evicted():
+    limiter = SlidingWindowLimiter(limit=10, window=60)
+    for i in range(100):
+        limiter.allow(f"ip-{i}", now=0)
+    assert len(limiter) == 100
+    limiter.allow("late", now=200)
+    assert len(limiter) == 1
+
+def test_key_count_is_bounded():
+    limiter = SlidingWindowLimiter(limit=10, window=60, max_keys=10)
+    for i in range(100):
+        limiter.allow(f"ip-{i}", now=0)
+    assert len(limiter) == 10
+
+def test_sqlite_backend_is_shared(tmp_path):
+    db_path = str(tmp_path / "limits.sqlite3")
+    worker_a = SQLiteSlidingWindowLimiter(limit=3, window=60, db_path=db_path)
+    worker_b = SQLiteSlidingWindowLimiter(limit=3, window=60, db_path=db_path)
+    assert worker_a.allow("ip", now=0)
+    assert worker_b.allow("ip", now=0)
+    assert worker_a.allow("ip", now=0)
+    assert not worker_b.allow("ip", now=1)
+    assert worker_b.allow("other", now=1)
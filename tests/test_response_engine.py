@@ -1,3 +1,5 @@
+import threading
+from app.config import Config
 from app.response.response_engine import ResponseEngine
 
 def test_math_response():
@@ -66,4 +68,43 @@ def test_conversation_history():
     
     # Test clearing history
     engine.clear_history()
-    assert len(engine.get_conversation_history()) == 0 
\ No newline at end of file
+    assert len(engine.get_conversation_history()) == 0
+
+def test_model_is_not_loaded_on_construction():
+    engine = ResponseEngine()
+    assert not engine.model_loaded
+
+def test_render_formats_answer_templates():
+    engine = ResponseEngine()
+    assert engine.render("answer", "population", country="Japan", population=125700000) == \
+        "The population of Japan is 125,700,000 people."
+
+def test_history_is_per_session_and_bounded(monkeypatch):
+    monkeypatch.setattr(Config, "RESPONSE_HISTORY_SIZE", 3)
+    engine = ResponseEngine()
+    for i in range(5):
+        engine.generate_response(f"q{i}", {}, "general", session_id="a")
+    engine.generate_response("Hello!", {}, "general", session_id="b")
+
+    assert [h["question"] for h in engine.get_conversation_history("a")] == ["q2", "q3", "q4"]
+    assert [h["question"] for h in engine.get_conversation_history("b")] == ["Hello!"]
+    assert engine.get_conversation_history() == []
+    engine.clear_history("a")
+    assert engine.get_conversation_history("a") == []
+    assert len(engine.get_conversation_history("b")) == 1
+
+def test_concurrent_sessions():
+    engine = ResponseEngine()
+
+    def ask(session):
+        for i in range(100):
+            engine.generate_response("What is 2 + 2?", {"expression": "2 + 2", "result": "4"}, "math",
+                                     session_id=session)
+
+    threads = [threading.Thread(target=ask, args=(f"s{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(len(engine.get_conversation_history(f"s{i}")) == min(100, Config.RESPONSE_HISTORY_SIZE)
+               for i in range(8))
@@ -0,0 +1,101 @@
+from app.router import route, decompose, clean_country_name, AREA_MULT, DENSITY, PRONOUN, INFO, MATH, SMALLTALK, FALLBACK
+
+def test_area_multiplication_route():
+    r = route("What is the area of Brazil multiplied by 3?")
+    assert r.intent == AREA_MULT
+    assert r.country == "Brazil"
+    assert r.multiplier == 3
+
+    r = route("Japan's area times 4")
+    assert r.intent == AREA_MULT
+    assert r.country == "Japan"
+    assert r.multiplier == 4
+
+    r = route("Multiply the area of France by 2")
+    assert r.intent == AREA_MULT
+    assert r.country == "France"
+    assert r.multiplier == 2
+
+def test_density_route():
+    r = route("How dense is Canada's population?")
+    assert r.intent == DENSITY
+    assert r.country == "Canada"
+
+def test_pronoun_route():
+    r = route("And its capital?")
+    assert r.intent == PRONOUN
+    assert r.topic == "capital"
+
+    r = route("And the area?")
+    assert r.intent == PRONOUN
+    assert r.topic == "area"
+
+def test_info_route():
+    r = route("France's population")
+    assert r.intent == INFO
+    assert r.country == "France"
+    assert r.topic == "population"
+
+    r = route("How many people live in Canada?")
+    assert r.intent == INFO
+    assert r.topic == "population"
+
+    r = route("How big is Canada?")
+    assert r.intent == INFO
+    assert r.topic == "area"
+
+def test_math_and_smalltalk_routes():
+    r = route("What is 100 / 4?")
+    assert r.intent == MATH
+    assert r.expression == "100 / 4"
+
+    r = route("Who are you and what can you do?")
+    assert r.intent == SMALLTALK
+    assert r.topic == "who"
+
+def test_fallback_route():
+    r = route("Tell me about France")
+    assert r.intent == FALLBACK
+    assert r.country == "France"
+    assert r.topic is None
+
+    r = route("hello")
+    assert r.intent == FALLBACK
+    assert r.country is None
+
+def test_unknown_country_is_not_routed_to_info():
+    r = route("What is the capital of Atlantis?")
+    assert r.intent == FALLBACK
+    assert r.country is None
+
+def test_clean_country_name():
+    assert clean_country_name("the brazil") == "Brazil"
+    assert clean_country_name("japan's") == "Japan"
+    assert clean_country_name("canada has") == "Canada"
+
+def _parts(question):
+    return [(r.intent, r.country, r.topic or r.expression) for r in decompose(question)]
+
+def test_decompose_compound_questions():
+    assert _parts("What is the capital of France and the population of Japan?") == [
+        (INFO, "France", "capital"), (INFO, "Japan", "population")]
+    assert _parts("What is 2 + 2 and 3 * 4?") == [(MATH, None, "2 + 2"), (MATH, None, "3 * 4")]
+
+def test_decompose_fills_in_elided_parts():
+    assert _parts("Compare the area of Brazil and Canada") == [(INFO, "Brazil", "area"), (INFO, "Canada", "area")]
+    assert _parts("What is the capital and population of France?") == [
+        (INFO, "France", "capital"), (INFO, "France", "population")]
+    assert _parts("What is the capital of France and its population?") == [
+        (INFO, "France", "capital"), (INFO, "France", "population")]
+    assert _parts("What is its capital and population?") == [(PRONOUN, None, "capital"), (PRONOUN, None, "population")]
+
+def test_decompose_keeps_single_questions_whole():
+    assert _parts("What is the capital of Bosnia and Herzegovina?") == [(INFO, "Bosnia and Herzegovina", "capital")]
+    assert _parts("And its capital?") == [(PRONOUN, None, "capital")]
+    assert len(decompose("capital of France, Japan, Italy, Spain and Chile", max_parts=4)) == 1
+    assert _parts("Who wrote Hamlet and why is the sky blue?") == [(FALLBACK, None, None)]
+
+def test_decompose_keeps_parts_no_rule_answers():
+    routes = decompose("Who wrote Hamlet and what is the capital of France?")
+    assert [(r.intent, r.country, r.text) for r in routes] == [
+        (FALLBACK, None, "Who wrote Hamlet"), (INFO, "France", None)]
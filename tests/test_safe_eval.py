@@ -0,0 +1,52 @@
+import time
+import pytest
+from app.calculators.safe_eval import safe_eval, EvaluationError
+from app.tools import calculate
+
+@pytest.mark.parametrize("expression", [
+    "2 + 2", "100 / 4", "7 * 6", "2 ** 10", "-3 // 2", "7 % 3", "2 ** -2",
+    "(2 + 3) * 4", "8515770.0 * 3", "1e308 * 1e308", "-(+5)",
+])
+def test_matches_python_arithmetic(expression):
+    assert safe_eval(expression) == eval(expression)
+
+def test_calculate_keeps_string_results():
+    assert calculate("2 + 2") == "4"
+    assert calculate("100 / 4") == "25.0"
+    assert calculate("2^10") == "1024"
+    assert calculate("7 / 0") == "Sorry, I couldn't calculate that: division by zero"
+
+@pytest.mark.parametrize("expression", [
+    "9^9^9",
+    "10^10^10",
+    "2^100000",
+    "99999999^99999",
+    "(10^1000) * (10^1000)",
+    "+".join(["1"] * 1000),
+    "(" * 500 + "1" + ")" * 500,
+    "1" * 100000,
+])
+def test_adversarial_inputs_are_rejected_quickly(expression):
+    start = time.perf_counter()
+    result = calculate(expression)
+    assert result.startswith("Sorry")
+    assert time.perf_counter() - start < 0.5
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "().__class__.__bases__",
+    "abc",
+    "'a' * 10",
+    "[1, 2]",
+    "lambda: 1",
+    "1 if 1 else 2",
+    "True + 1",
+    "1j * 1j",
+])
+def test_non_arithmetic_is_rejected(expression):
+    with pytest.raises((EvaluationError, SyntaxError)):
+        safe_eval(expression)
+
+def test_time_budget():
+    with pytest.raises(EvaluationError):
+        safe_eval("2 * 3 + 4 * 5", time_budget=-1)
@@ -0,0 +1,40 @@
+import asyncio
+from types import SimpleNamespace
+from app import main, model_runtime, serve
+from app.config import Config
+from app.serve import _RequestLimit
+
+def test_request_limit_stops_the_worker_after_limit_requests():
+    async def app(scope, receive, send):
+        pass
+
+    limited = _RequestLimit(app)
+    limited.limit, limited.server = 3, SimpleNamespace(should_exit=False)
+    for _ in range(2):
+        asyncio.run(limited({"type": "http"}, None, None))
+    asyncio.run(limited({"type": "lifespan"}, None, None))
+    assert not limited.server.should_exit
+    asyncio.run(limited({"type": "http"}, None, None))
+    assert limited.server.should_exit
+
+def test_no_limit_by_default():
+    async def app(scope, receive, send):
+        pass
+
+    limited = _RequestLimit(app)
+    asyncio.run(limited({"type": "http"}, None, None))
+    assert limited.server is None
+
+def test_preload_survives_a_model_that_cannot_load(monkeypatch):
+    def load(name, runtime):
+        raise ImportError("No module named 'torch'")
+
+    monkeypatch.delenv("MODEL_PRELOAD", raising=False)
+    monkeypatch.setattr(Config, "MODEL_RUNTIME", "torch")
+    monkeypatch.setattr(Config, "MODEL_WARMUP", False)
+    monkeypatch.setattr(model_runtime, "load", load)
+    monkeypatch.setattr(main.agent, "model_enabled", True)
+    monkeypatch.setattr(serve.gc, "freeze", lambda: None)
+    assert serve.preload() is False
+    assert not main.agent.model_loaded
+    assert not main.agent.model_enabled